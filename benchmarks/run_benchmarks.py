@@ -0,0 +1,341 @@
+"""Benchmark suite for extraction, training and classification.
+
+Runs the project's entry points on the sample PDFs in data/useful and
+data/not-useful (text-layer and scanned documents) and writes a JSON file with
+the results plus environment metadata (Python, platform, CPU count, library
+and Tesseract versions, git commit), so runs can be compared across commits.
+
+Suites:
+    extract   extract_text_from_pdf over every PDF at each --workers count:
+              documents/sec, pages/sec, text-layer and OCR page rates,
+              per-document p50/p95 latency, failures
+    train     train_pdf_classifier on the extracted texts (seconds per run)
+    classify  classify_pdf single-document latency (includes model load),
+              classify_pdfs throughput at each --workers count,
+              predict_texts latency on already extracted text, and the
+              per-call prediction overhead of building a DMatrix versus
+              in-place prediction on the same CSR rows (single document
+              and whole batch)
+
+Usage:
+    python benchmarks/run_benchmarks.py [--suites extract,train,classify] [--repeat 3] [--workers 1,4]
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json --max-regression 0.2
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from src.preprocessing.pdf_text_extraction import iter_pdf_pages
+
+DEFAULT_RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+SAMPLE_DIRS = {"useful": REPO_ROOT / "data" / "useful", "not-useful": REPO_ROOT / "data" / "not-useful"}
+PACKAGES = ("pymupdf", "pytesseract", "pillow", "numpy", "scipy", "scikit-learn", "xgboost", "joblib")
+
+
+def environment():
+    """Describe the machine, libraries and commit the benchmark ran on."""
+    env = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "packages": {},
+    }
+    for name in PACKAGES:
+        try:
+            env["packages"][name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            env["packages"][name] = None
+    try:
+        out = subprocess.run(["tesseract", "--version"], capture_output=True, text=True)
+        env["tesseract"] = (out.stdout or out.stderr).splitlines()[0]
+    except (OSError, IndexError):
+        env["tesseract"] = None
+    try:
+        env["git_commit"] = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        env["git_dirty"] = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        env["git_commit"], env["git_dirty"] = None, None
+    return env
+
+
+def sample_pdfs():
+    """Return [(path, label)] for the bundled sample PDFs."""
+    return [(pdf, label) for label, folder in SAMPLE_DIRS.items() for pdf in sorted(folder.glob("*.pdf"))]
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None}
+    return {"p50": round(float(np.percentile(values, 50)), 4), "p95": round(float(np.percentile(values, 95)), 4)}
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 3) if seconds > 0 else None
+
+
+def _extract_document(pdf_path, ocr_workers=1):
+    """Extract one PDF page by page, returning its text and per-document stats."""
+    stats = {"file": Path(pdf_path).name, "pages": 0, "ocr_pages": 0, "text_s": 0.0, "ocr_s": 0.0, "error": None}
+    texts = []
+    start = time.perf_counter()
+    try:
+        for page in iter_pdf_pages(str(pdf_path), ocr_workers):
+            texts.append(page.text)
+            stats["pages"] += 1
+            if page.ocr:
+                stats["ocr_pages"] += 1
+                stats["ocr_s"] += page.seconds
+            else:
+                stats["text_s"] += page.seconds
+    except Exception as e:
+        # e.g. the tesseract binary is missing; keep the pages extracted so far
+        stats["error"] = f"{type(e).__name__}: {e}"
+    stats["seconds"] = time.perf_counter() - start
+    return "\n".join(texts), stats
+
+
+def _extract_all(pdfs, workers, ocr_workers):
+    paths = [str(p) for p, _ in pdfs]
+    if workers <= 1:
+        return [_extract_document(p, ocr_workers) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_extract_document, paths, [ocr_workers] * len(paths)))
+
+
+def bench_extract(pdfs, workers_list, repeat, ocr_workers=1):
+    results = []
+    for workers in workers_list:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = [stats for _, stats in _extract_all(pdfs, workers, ocr_workers)]
+            runs.append((time.perf_counter() - start, docs))
+        # Report the fastest repetition; the others mostly measure noise and cold caches
+        wall_s, docs = min(runs, key=lambda run: run[0])
+        pages = sum(d["pages"] for d in docs)
+        ocr_pages = sum(d["ocr_pages"] for d in docs)
+        results.append(
+            {
+                "workers": workers,
+                "ocr_workers": ocr_workers,
+                "documents": len(docs),
+                "pages": pages,
+                "ocr_pages": ocr_pages,
+                "failures": sum(1 for d in docs if d["error"]),
+                "wall_s": round(wall_s, 4),
+                "wall_s_all_runs": [round(r[0], 4) for r in runs],
+                "docs_per_s": _rate(len(docs), wall_s),
+                "pages_per_s": _rate(pages, wall_s),
+                "text_pages_per_s": _rate(pages - ocr_pages, sum(d["text_s"] for d in docs)),
+                "ocr_pages_per_s": _rate(ocr_pages, sum(d["ocr_s"] for d in docs)),
+                "doc_latency_s": _percentiles([d["seconds"] for d in docs]),
+                "errors": sorted({d["error"] for d in docs if d["error"]}),
+                "per_document": docs,
+            }
+        )
+    return results
+
+
+def bench_train(texts, labels, repeat, model_dir):
+    from src.model.train_model import train_pdf_classifier
+
+    timings, accuracy = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = train_pdf_classifier(texts, labels, model_dir)
+        timings.append(time.perf_counter() - start)
+        if result is None:
+            return {"error": "Training failed (need at least 2 documents with text per class)"}
+        accuracy = result["accuracy"]
+    return {"documents": len(texts), "train_s": _percentiles(timings), "train_s_all_runs": [round(t, 4) for t in timings], "accuracy": round(float(accuracy), 4)}
+
+
+def bench_classify(pdfs, texts, workers_list, repeat, model_dir):
+    from src.model.pdf_classifier import classify_pdf, classify_pdfs, load_classifier, predict_texts
+
+    result = {}
+
+    latencies = []
+    for _ in range(repeat):
+        for pdf, _ in pdfs:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                classify_pdf(str(pdf), model_dir)
+            latencies.append(time.perf_counter() - start)
+    result["classify_pdf_latency_s"] = _percentiles(latencies)
+
+    start = time.perf_counter()
+    classifier = load_classifier(model_dir)
+    result["model_load_s"] = round(time.perf_counter() - start, 4)
+    predict = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            predict_texts(classifier, [text])
+            predict.append(time.perf_counter() - start)
+    result["predict_latency_s"] = _percentiles(predict)
+    result["predict_overhead"] = _predict_overhead(classifier, texts, repeat)
+
+    result["batch"] = []
+    paths = [pdf for pdf, _ in pdfs]
+    for workers in workers_list:
+        walls = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                records = list(classify_pdfs(paths, model_dir, workers=workers))
+            walls.append(time.perf_counter() - start)
+        wall_s = min(walls)
+        result["batch"].append({"workers": workers, "documents": len(records), "wall_s": round(wall_s, 4), "docs_per_s": _rate(len(records), wall_s)})
+    return result
+
+
+def _predict_overhead(classifier, texts, repeat):
+    """Time the previous DMatrix prediction path against predict_matrix on already vectorized rows."""
+    import xgboost as xgb
+    from src.model.pdf_classifier import predict_matrix
+
+    X = classifier["vectorizer"].transform(texts).tocsr()
+    model, encoder, threshold = classifier["model"], classifier["encoder"], classifier["threshold"]
+
+    def dmatrix_path(rows):
+        probs = model.predict(xgb.DMatrix(rows))
+        return probs, encoder.inverse_transform([1 if p >= threshold else 0 for p in probs])
+
+    paths = {"dmatrix": dmatrix_path, "inplace": lambda rows: predict_matrix(classifier, rows)}
+    result = {}
+    for name, predict in paths.items():
+        single, batch = [], []
+        for _ in range(max(repeat, 5)):
+            for i in range(X.shape[0]):
+                start = time.perf_counter()
+                predict(X[i])
+                single.append((time.perf_counter() - start) * 1e6)
+            start = time.perf_counter()
+            predict(X)
+            batch.append((time.perf_counter() - start) * 1e6)
+        result[name] = {"single_doc_us": _percentiles(single), "batch_us": round(min(batch), 1), "batch_documents": X.shape[0]}
+    return result
+
+
+def flatten_metrics(results):
+    """Flatten a results file into {metric name: value} for comparison between runs."""
+    metrics = {}
+    for run in results.get("extract", []):
+        prefix = f"extract.w{run['workers']}"
+        for key in ("docs_per_s", "pages_per_s", "text_pages_per_s", "ocr_pages_per_s"):
+            metrics[f"{prefix}.{key}"] = run[key]
+        metrics[f"{prefix}.doc_latency_p95_s"] = run["doc_latency_s"]["p95"]
+    train = results.get("train", {})
+    if "train_s" in train:
+        metrics["train.p50_s"] = train["train_s"]["p50"]
+    classify = results.get("classify", {})
+    if classify:
+        metrics["classify.latency_p50_s"] = classify["classify_pdf_latency_s"]["p50"]
+        metrics["classify.latency_p95_s"] = classify["classify_pdf_latency_s"]["p95"]
+        metrics["classify.predict_p50_s"] = classify["predict_latency_s"]["p50"]
+        for name, run in classify.get("predict_overhead", {}).items():
+            metrics[f"classify.{name}.single_doc_p50_us"] = run["single_doc_us"]["p50"]
+            metrics[f"classify.{name}.batch_us"] = run["batch_us"]
+        for run in classify["batch"]:
+            metrics[f"classify.w{run['workers']}.docs_per_s"] = run["docs_per_s"]
+    return {k: v for k, v in metrics.items() if v is not None}
+
+
+def compare(current, baseline, max_regression):
+    """Print metric changes against a baseline results file; returns the regressed metric names."""
+    now, then = flatten_metrics(current), flatten_metrics(baseline)
+    regressions = []
+    print(f"\n=== Compared with {baseline['environment'].get('git_commit')} ===")
+    for name in sorted(now.keys() & then.keys()):
+        old, new = then[name], now[name]
+        if not old:
+            continue
+        change = (new - old) / old
+        # Rates should go up, durations down
+        worse = -change if name.endswith("_per_s") else change
+        flag = "REGRESSION" if worse > max_regression else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<40} {old:>10.4g} -> {new:>10.4g}  {change:+7.1%}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction, training and classification on the sample PDFs.")
+    parser.add_argument("--suites", type=str, default="extract,train,classify", help="Comma-separated suites to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement.")
+    parser.add_argument("--workers", type=str, default="1", help="Comma-separated process counts, e.g. '1,4'.")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="OCR threads per document.")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON path (default: benchmarks/results/<time>-<commit>.json).")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="With --compare: fail if a metric is this much worse (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    suites = {s.strip() for s in args.suites.split(",") if s.strip()}
+    workers_list = [int(w) for w in args.workers.split(",")]
+    pdfs = sample_pdfs()
+    if not pdfs:
+        print("[ERROR] No sample PDFs found in data/useful or data/not-useful.")
+        sys.exit(1)
+
+    results = {"environment": environment(), "config": {"suites": sorted(suites), "repeat": args.repeat, "workers": workers_list, "ocr_workers": args.ocr_workers, "documents": len(pdfs)}}
+
+    if "extract" in suites:
+        print(f"[INFO] Extracting {len(pdfs)} PDFs x{args.repeat} at workers={workers_list}")
+        results["extract"] = bench_extract(pdfs, workers_list, args.repeat, args.ocr_workers)
+
+    if suites & {"train", "classify"}:
+        # One untimed extraction provides the training and prediction texts
+        extracted = [(_extract_document(pdf, args.ocr_workers)[0], label) for pdf, label in pdfs]
+        texts = [text for text, _ in extracted if text.strip()]
+        labels = [label for text, label in extracted if text.strip()]
+        with tempfile.TemporaryDirectory() as model_dir:
+            print(f"[INFO] Training on {len(texts)} documents x{args.repeat}")
+            results["train"] = bench_train(texts, labels, args.repeat if "train" in suites else 1, model_dir)
+            if "classify" in suites and "error" not in results["train"]:
+                print("[INFO] Classifying sample PDFs")
+                results["classify"] = bench_classify(pdfs, texts, workers_list, args.repeat, model_dir)
+        if "train" not in suites:
+            del results["train"]
+
+    commit = (results["environment"]["git_commit"] or "nogit")[:10]
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"{stamp}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    for name, value in flatten_metrics(results).items():
+        print(f"{name:<40} {value:>10.4g}")
+    print(f"[INFO] Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
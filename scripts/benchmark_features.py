@@ -0,0 +1,127 @@
+"""Compare the TF-IDF and hashing feature backends on the labeled corpus.
+
+For each backend this fits the vectorizer on the usual stratified train split,
+trains a booster with the training script's XGBoost settings and reports:
+fit/transform time, peak Python memory while fitting (tracemalloc), pickled
+vectorizer size and load time, and test accuracy.
+
+Texts come from the processed-text directory (or corpus store) + labels.json.
+If that yields fewer than 4 labeled documents, the PDFs in data/useful and
+data/not-useful are extracted instead.
+
+Usage:
+    python scripts/benchmark_features.py [--data-dir data/processed-text] [--n-jobs 4] [--output bench.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import joblib
+import xgboost as xgb
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # add repo root to sys.path
+
+from src.model.features import HASHING_PARAMS, make_vectorizer
+from src.model.train_model import SPLIT_SEED, TEST_SIZE, VECTORIZER_PARAMS, XGB_PARAMS, load_labeled_data
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf
+
+BACKENDS = {"tfidf": VECTORIZER_PARAMS, "hashing": HASHING_PARAMS}
+
+
+def load_pdf_folders(useful_dir="data/useful", not_useful_dir="data/not-useful"):
+    texts, labels = [], []
+    for folder, label in ((useful_dir, "useful"), (not_useful_dir, "not-useful")):
+        for pdf in sorted(Path(folder).glob("*.pdf")):
+            text = extract_text_from_pdf(str(pdf))
+            if text.strip():
+                texts.append(text)
+                labels.append(label)
+    return texts, labels
+
+
+def benchmark_backend(backend, X_train, X_test, y_train, y_test, n_jobs=1):
+    vectorizer = make_vectorizer(backend, BACKENDS[backend], n_jobs=n_jobs)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    X_train_vec = vectorizer.fit_transform(X_train)
+    fit_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    X_test_vec = vectorizer.transform(X_test)
+    transform_s = time.perf_counter() - start
+
+    buf = io.BytesIO()
+    joblib.dump(vectorizer, buf)
+    start = time.perf_counter()
+    buf.seek(0)
+    joblib.load(buf)
+    load_s = time.perf_counter() - start
+
+    # Same booster settings as train_pdf_classifier
+    params = XGB_PARAMS
+    dtrain = xgb.DMatrix(X_train_vec, label=y_train)
+    dtest = xgb.DMatrix(X_test_vec, label=y_test)
+    start = time.perf_counter()
+    model = xgb.train(params, dtrain, num_boost_round=500, evals=[(dtest, "eval")], early_stopping_rounds=20, verbose_eval=False)
+    train_s = time.perf_counter() - start
+    y_pred = (model.predict(dtest) >= 0.5).astype(int)
+
+    return {
+        "backend": backend,
+        "n_features": X_train_vec.shape[1],
+        "fit_transform_s": round(fit_s, 4),
+        "transform_s": round(transform_s, 4),
+        "fit_peak_mb": round(peak / 1e6, 2),
+        "pickle_mb": round(buf.getbuffer().nbytes / 1e6, 3),
+        "pickle_load_s": round(load_s, 4),
+        "train_s": round(train_s, 4),
+        "accuracy": round(float(accuracy_score(y_test, y_pred)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TF-IDF vs hashing feature backends.")
+    parser.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory or corpus store.")
+    parser.add_argument("--labels", type=str, default="data/labels.json", help="Labels JSON file.")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Parallel shards for the hashing backend.")
+    parser.add_argument("--output", type=str, default=None, help="Optional JSON file for the results.")
+    args = parser.parse_args()
+
+    texts, labels, _ = load_labeled_data(args.data_dir, args.labels)
+    if len(texts) < 4:
+        print("[INFO] Not enough processed text; extracting data/useful and data/not-useful instead.")
+        texts, labels = load_pdf_folders()
+    if len(set(labels)) < 2:
+        print("[ERROR] Need labeled documents from at least two classes.")
+        sys.exit(1)
+
+    X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=labels)
+    enc = LabelEncoder()
+    y_train = enc.fit_transform(y_train)
+    y_test = enc.transform(y_test)
+
+    results = [benchmark_backend(backend, X_train, X_test, y_train, y_test, n_jobs=args.n_jobs) for backend in BACKENDS]
+
+    print(f"{len(X_train)} train / {len(X_test)} test documents")
+    columns = list(results[0])
+    print("  ".join(f"{c:>15}" for c in columns))
+    for row in results:
+        print("  ".join(f"{row[c]:>15}" for c in columns))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
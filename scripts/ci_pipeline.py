@@ -4,6 +4,12 @@ Requirements:
  - Env GOOGLE_SERVICE_ACCOUNT_JSON set to Service Account JSON string.
  - Env GOOGLE_DRIVE_ROOT_FOLDER_ID set to the Drive folder containing 'useful' and 'not-useful'.
  - Optional env CI_FILES_PER_CLASS (default 1).
+ - Optional env EXTRACTION_CACHE_DIR (default data/extraction-cache); set to an
+   empty string to disable the extraction cache.
+ - Optional env PIPELINE_REPORT (default data/pipeline-report.json): JSON run report
+   with per-stage counts, bytes, failures and p50/p95 durations.
+ - Optional env PROMETHEUS_TEXTFILE: also write the run metrics in Prometheus
+   textfile format to this path.
 
 This script DOES NOT save PDFs locally. It streams bytes and writes extracted text
 into data/processed-text/*.txt, and writes data/labels.json. No training.
@@ -16,6 +22,7 @@ import json
 from pathlib import Path
 from typing import Dict, List
 import subprocess
+import time
 
 import sys
 from pathlib import Path as _Path
@@ -33,7 +40,9 @@ from scripts.google_drive.drive_io import (
     download_file_bytes,
     sanitize_filename,
 )
+from scripts.pipeline_metrics import PipelineMetrics, ocr_summary, DEFAULT_REPORT_PATH
 from src.preprocessing.pdf_text_extraction import extract_text_from_pdf_bytes
+from src.preprocessing.extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR
 
 
 def write_labels(labels: Dict[str, str], output_file: Path):
@@ -43,6 +52,17 @@ def write_labels(labels: Dict[str, str], output_file: Path):
 
 
 def main():
+    metrics = PipelineMetrics("ci_pipeline")
+    try:
+        run(metrics)
+    finally:
+        metrics.write_json(os.environ.get("PIPELINE_REPORT", DEFAULT_REPORT_PATH))
+        if os.environ.get("PROMETHEUS_TEXTFILE"):
+            metrics.write_prometheus(os.environ["PROMETHEUS_TEXTFILE"])
+        print("\n".join(metrics.summary_lines()))
+
+
+def run(metrics: PipelineMetrics):
     root_id = os.environ.get("GOOGLE_DRIVE_ROOT_FOLDER_ID")
     if not root_id:
         raise RuntimeError("Missing GOOGLE_DRIVE_ROOT_FOLDER_ID environment variable")
@@ -67,6 +87,9 @@ def main():
     out_dir.mkdir(parents=True, exist_ok=True)
     print(f"Output directory ready: {out_dir}")
 
+    cache_dir = os.environ.get("EXTRACTION_CACHE_DIR", DEFAULT_CACHE_DIR)
+    cache = ExtractionCache(cache_dir) if cache_dir else None
+
     labels: Dict[str, str] = {}
 
     for folder_id, label in [(useful_id, "useful"), (not_useful_id, "not useful")]:
@@ -76,22 +99,41 @@ def main():
         for idx, f in enumerate(files, 1):
             pdf_name = f.get("name", f.get("id", "file"))
             print(f"[{idx}/{len(files)}] Processing: {pdf_name}")
-            pdf_bytes = download_file_bytes(service, f["id"])
+            with metrics.stage("download", pdf_name) as obs:
+                pdf_bytes = download_file_bytes(service, f["id"])
+                obs["bytes"] = len(pdf_bytes)
             print(f"Downloaded {len(pdf_bytes)} bytes")
-            text = extract_text_from_pdf_bytes(pdf_bytes)
+            page_stats: List[Dict] = []
+            start = time.perf_counter()
+            text = extract_text_from_pdf_bytes(pdf_bytes, cache=cache, page_stats=page_stats)
+            metrics.observe("extract", time.perf_counter() - start, pdf_name, len(pdf_bytes), failed=not text.strip(), error=None if text.strip() else "No text extracted")
+            ocr = ocr_summary(page_stats)
+            if ocr["ocr_pages"]:
+                metrics.observe("ocr", ocr["render_s"] + ocr["ocr_s"], pdf_name, failed=not text.strip())
+                metrics.count("ocr_pages", ocr["ocr_pages"])
             stem = sanitize_filename(pdf_name)
             txt_name = f"{stem}.txt"
-            (out_dir / txt_name).write_text(text, encoding="utf-8")
+            with metrics.stage("write", txt_name) as obs:
+                data = text.encode("utf-8")
+                (out_dir / txt_name).write_bytes(data)
+                obs["bytes"] = len(data)
             labels[txt_name] = label
             print(f"Extracted {len(text)} chars to {txt_name}")
 
     write_labels(labels, Path("data/labels.json"))
     print(f"\nWrote {len(labels)} labels to data/labels.json")
     print(f"Extracted {len(labels)} text files to {out_dir}")
+    if cache is not None:
+        print(f"Extraction cache: {cache.hits} hits, {cache.misses} misses")
+        metrics.count("cache_hits", cache.hits)
+        metrics.count("cache_misses", cache.misses)
 
     # Train model on the CI sample
     print("\nStarting model training on CI sample...")
-    r = subprocess.run([sys.executable, "src/model/train_model.py"], env={**os.environ, "CI_TRAIN": "1"})
+    with metrics.stage("train") as obs:
+        r = subprocess.run([sys.executable, "src/model/train_model.py"], env={**os.environ, "CI_TRAIN": "1"})
+        obs["failed"] = r.returncode != 0
+        obs["error"] = f"train_model.py exited with {r.returncode}" if r.returncode else None
     if r.returncode != 0:
         print("Model training failed")
         raise SystemExit(r.returncode)
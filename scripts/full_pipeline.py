@@ -10,14 +10,31 @@ API Mode Environment variables:
  - GOOGLE_DRIVE_USE_SHARED_DRIVE=true (if using shared drives / shared folders)
 
 Usage:
- - API mode: python full_pipeline.py --api
- - Local mode: python full_pipeline.py --local <path_to_pdfs>
+ - API mode: python full_pipeline.py --api [--incremental]
+ - Local mode: python full_pipeline.py --local <path_to_pdfs> [--workers N]
 
 Behavior:
  - API mode: Streams every PDF (no local PDF persistence) and writes extracted text to data/processed-text.
+ - API mode: PDFs larger than --spool-threshold-mb are spooled to a temporary file and
+   memory-mapped rather than held in memory, and at most --memory-budget-mb of documents
+   are downloaded or being extracted at once.
+ - API mode with --incremental: Uses data/drive-manifest.json and the Drive Changes API to only
+   download new or modified PDFs; byte-identical duplicates (same md5Checksum) are skipped and
+   unchanged PDFs moved to the other folder are only relabeled.
  - Local mode: Processes PDFs from specified local directory (expects 'useful' and 'not-useful' subfolders).
  - Generates labels.json based on folder origin.
+ - Updates the full-text keyword index (data/corpus-index.sqlite) used by
+   src/preprocessing/corpus_index.py for corpus audits (skip with --no-corpus-index).
+ - Indexes candidate passages (tables, empty-stomach / sample-size sentences) of new or changed
+   text files into data/passages for the extraction model (skip with --no-passage-index).
+ - Every mode appends each finished (or failed) document to data/pipeline-journal.jsonl;
+   --resume skips completed documents and retries failed ones up to --max-attempts times.
+   A document whose download fails or that yields no text (corrupt PDF, OCR failure) is
+   journaled as failed, not done. --incremental also saves the manifest after every document.
  - Trains model with src/model/train_model.py.
+ - Writes a JSON run report with per-stage counts, bytes, failures and p50/p95 durations
+   (download, extract, ocr, write, train) to data/pipeline-report.json, and optionally a
+   Prometheus textfile (--prometheus-textfile).
 """
 
 from __future__ import annotations
@@ -26,9 +43,11 @@ import os
 import json
 import argparse
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import subprocess
 import sys
+import time
 
 import sys
 from pathlib import Path as _Path2
@@ -43,17 +62,25 @@ from scripts.google_drive.drive_io import (
     get_drive_service,
     find_child_folder_id,
     list_pdfs_in_folder,
-    download_file_bytes,
+    download_file_spooled,
     sanitize_filename,
+    ConcurrentDownloader,
+    MemoryBudget,
+    DEFAULT_SPOOL_THRESHOLD,
+    DEFAULT_MEMORY_BUDGET,
+    load_manifest,
+    save_manifest,
+    manifest_entry,
+    incremental_changes,
+    DEFAULT_MANIFEST_PATH,
 )
-from src.preprocessing.pdf_text_extraction import extract_text_from_pdf_bytes
-
-
-def run(cmd):
-    print(f"$ {' '.join(cmd)}")
-    r = subprocess.run(cmd)
-    if r.returncode != 0:
-        sys.exit(r.returncode)
+from scripts.pipeline_metrics import PipelineMetrics, ocr_summary, DEFAULT_REPORT_PATH
+from scripts.run_journal import RunJournal, DEFAULT_JOURNAL_PATH, DEFAULT_MAX_ATTEMPTS
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf, extract_text_from_pdf_bytes, estimate_extraction_cost
+from src.preprocessing.extraction_cache import ExtractionCache, DEFAULT_CACHE_DIR
+from src.preprocessing.corpus_index import CorpusIndex, DEFAULT_DB_PATH as DEFAULT_INDEX_DB
+from src.preprocessing.passages import build_index as build_passage_index, DEFAULT_INDEX_DIR as DEFAULT_PASSAGE_DIR
+from src.utils import profiling
 
 
 def write_labels(labels: Dict[str, str], output_file: Path):
@@ -62,8 +89,8 @@ def write_labels(labels: Dict[str, str], output_file: Path):
         json.dump(labels, f, indent=2)
 
 
-def process_api_mode():
-    """Download PDFs from Google Drive and process them."""
+def _connect_drive_folders():
+    """Connect to Drive and return (service, useful folder id, not-useful folder id)."""
     root_id = os.environ.get("GOOGLE_DRIVE_ROOT_FOLDER_ID")
     if not root_id:
         raise RuntimeError("Missing GOOGLE_DRIVE_ROOT_FOLDER_ID environment variable")
@@ -75,30 +102,294 @@ def process_api_mode():
         raise RuntimeError(f"Could not find 'useful' subfolder under root folder {root_id}")
     if not not_useful_id:
         raise RuntimeError(f"Could not find 'not-useful' subfolder under root folder {root_id}")
+    return service, useful_id, not_useful_id
+
+
+def _download_stream(
+    service,
+    files: List[Dict],
+    download_workers: int = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+):
+    """Yield (file, SpooledPDF) pairs, downloading concurrently when download_workers > 1.
+
+    A file whose download failed is yielded with the exception in place of
+    the SpooledPDF, so one bad file doesn't end the run. The caller must close
+    each SpooledPDF before asking for the next one.
+    """
+    metrics = metrics or PipelineMetrics("full_pipeline")
+    if download_workers <= 1:
+        for f in files:
+            try:
+                with metrics.stage("download", f.get("name")) as obs:
+                    payload = download_file_spooled(service, f, spool_threshold)
+                    obs["bytes"] = payload.nbytes
+            except Exception as e:
+                payload = e
+            yield f, payload
+        return
+
+    def on_download(f, nbytes, seconds, retries):
+        metrics.observe("download", seconds, f.get("name"), nbytes)
+        metrics.count("download_retries", retries)
+
+    budget = MemoryBudget(memory_budget)
+    downloader = ConcurrentDownloader(workers=download_workers, on_download=on_download, spool_threshold=spool_threshold, budget=budget)
+    for f, payload in downloader.download(files, return_exceptions=True):
+        if isinstance(payload, Exception):
+            metrics.observe("download", 0.0, f.get("name"), failed=True, error=f"{type(payload).__name__}: {payload}")
+        yield f, payload
+    print("Download throughput per worker:")
+    print(downloader.report())
+    print(f"Peak documents in flight: {budget.peak / 1e6:.1f} MB (budget {budget.max_bytes / 1e6:.0f} MB)")
+
+
+def _drive_version(f: Dict) -> Optional[str]:
+    """Content version of a Drive file for the run journal (md5 for binary files, else modification time)."""
+    return f.get("md5Checksum") or f.get("modifiedTime")
+
+
+def _local_version(pdf_path: Path) -> str:
+    st = pdf_path.stat()
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def _report_resume(journal: RunJournal, metrics: PipelineMetrics):
+    if journal.skipped or journal.gave_up:
+        print(f"Resuming: {journal.skipped} documents already done, {journal.gave_up} skipped after {journal.max_attempts} failed attempts")
+    metrics.count("resume_skipped", journal.skipped)
+    metrics.count("resume_gave_up", journal.gave_up)
+
+
+def _record_extraction(metrics: PipelineMetrics, name: str, text: str, seconds: float, nbytes: int, page_stats: List[Dict]):
+    """Record the extract stage (and the OCR share of it) for one document."""
+    metrics.observe("extract", seconds, name, nbytes, failed=not text.strip(), error=None if text.strip() else "No text extracted")
+    ocr = ocr_summary(page_stats)
+    if ocr["ocr_pages"]:
+        # A Tesseract failure aborts the whole document, so no text means OCR failed too
+        metrics.observe("ocr", ocr["render_s"] + ocr["ocr_s"], name, failed=not text.strip())
+        metrics.count("ocr_pages", ocr["ocr_pages"])
+
+
+def _extract_bytes(pdf_bytes, name: str, cache: Optional[ExtractionCache], metrics: PipelineMetrics) -> str:
+    page_stats: List[Dict] = []
+    start = time.perf_counter()
+    with profiling.stage(f"extract-{name}"):
+        text = extract_text_from_pdf_bytes(pdf_bytes, cache=cache, page_stats=page_stats)
+    _record_extraction(metrics, name, text, time.perf_counter() - start, len(pdf_bytes), page_stats)
+    return text
+
+
+def _extract_payload(payload, name: str, cache: Optional[ExtractionCache], metrics: PipelineMetrics) -> str:
+    """Extract a downloaded PDF (or re-raise its download error); raises if no text came out.
+
+    The extraction functions log errors and return "" rather than raising, so
+    an empty result is what marks a corrupt PDF or a failed OCR run.
+    """
+    if isinstance(payload, Exception):
+        raise payload
+    with payload:
+        text = _extract_bytes(payload.view(), name, cache, metrics)
+    if not text.strip():
+        raise RuntimeError("No text extracted")
+    return text
+
+
+def _write_text(path: Path, text: str, metrics: PipelineMetrics):
+    with metrics.stage("write", path.name) as obs:
+        data = text.encode("utf-8")
+        path.write_bytes(data)
+        obs["bytes"] = len(data)
+
+
+def process_api_mode(
+    cache: Optional[ExtractionCache] = None,
+    download_workers: int = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    journal: Optional[RunJournal] = None,
+):
+    """Download PDFs from Google Drive and process them.
+
+    Each document is journaled as it finishes; documents the journal already
+    has (when resuming) are not downloaded again.
+    """
+    metrics = metrics or PipelineMetrics("full_pipeline", mode="api")
+    journal = journal or RunJournal()
+    service, useful_id, not_useful_id = _connect_drive_folders()
 
     out_dir = Path("data/processed-text")
     out_dir.mkdir(parents=True, exist_ok=True)
-    labels: Dict[str, str] = {}
-    count=1
+    labels: Dict[str, str] = journal.labels()
+    files: List[Dict] = []
     for folder_id, label in [(useful_id, "useful"), (not_useful_id, "not-useful")]:
-        files = list_pdfs_in_folder(service, folder_id, max_files=None)
-        print(f"Found {len(files)} PDFs in folder label '{label}'")
-        for f in files:
-            pdf_bytes = download_file_bytes(service, f["id"])
-            text = extract_text_from_pdf_bytes(pdf_bytes)
+        folder_files = list_pdfs_in_folder(service, folder_id, max_files=None)
+        print(f"Found {len(folder_files)} PDFs in folder label '{label}'")
+        files.extend({**f, "label": label} for f in folder_files)
+    files = [f for f in files if journal.should_process(f"drive:{f['id']}", _drive_version(f), out_dir)]
+    _report_resume(journal, metrics)
+
+    count=1
+    # labels.json is written even if the run dies part way (e.g. a Drive quota error)
+    try:
+        for f, payload in _download_stream(service, files, download_workers, metrics, spool_threshold, memory_budget):
+            key, version = f"drive:{f['id']}", _drive_version(f)
             stem = sanitize_filename(f.get("name", f.get("id", "file")))
             txt_name = f"{stem}.txt"
-            (out_dir / txt_name).write_text(text, encoding="utf-8")
-            labels[txt_name] = label
+            try:
+                text = _extract_payload(payload, f.get("name", f["id"]), cache, metrics)
+                _write_text(out_dir / txt_name, text, metrics)
+            except Exception as e:
+                journal.failed(key, version, f"{type(e).__name__}: {e}")
+                print(f"Error processing {f.get('name', f['id'])}: {e}")
+                continue
+            journal.done(key, version, txt_name, f["label"])
+            labels[txt_name] = f["label"]
             print(f"{count} Processed {f['name']}")
             count+=1
+    finally:
+        write_labels(labels, Path("data/labels.json"))
+        print(f"Wrote {len(labels)} labeled text files.")
+
+
+def process_api_incremental(
+    cache: Optional[ExtractionCache] = None,
+    manifest_path: Path = Path(DEFAULT_MANIFEST_PATH),
+    download_workers: int = 1,
+    metrics: Optional[PipelineMetrics] = None,
+    spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    journal: Optional[RunJournal] = None,
+):
+    """Download and process only new or modified Drive PDFs since the last run.
+
+    Existing labels.json entries are kept; removed Drive files have their text
+    and labels dropped, and unchanged files moved to the other folder only
+    have their label rewritten. The manifest is saved after every document, so an
+    interrupted run picks up where it stopped, but its Changes API page token
+    only advances once every pending file has been processed: failed files
+    come up again next run (with --resume, until they have failed
+    max_attempts times). Each document is also journaled like in API mode.
+    """
+    metrics = metrics or PipelineMetrics("full_pipeline", mode="api-incremental")
+    journal = journal or RunJournal()
+    service, useful_id, not_useful_id = _connect_drive_folders()
+    manifest = load_manifest(manifest_path)
+    delta = incremental_changes(service, {useful_id: "useful", not_useful_id: "not-useful"}, manifest)
+    print(f"Incremental sync: {len(delta['pending'])} new/modified, {len(delta['duplicates'])} duplicates, {len(delta['removed'])} removed, {len(delta['relabeled'])} relabeled")
+    metrics.count("skipped_duplicates", len(delta["duplicates"]))
+    metrics.count("removed_files", len(delta["removed"]))
+    metrics.count("relabeled_files", len(delta["relabeled"]))
+
+    out_dir = Path("data/processed-text")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    labels_path = Path("data/labels.json")
+    labels: Dict[str, str] = {}
+    if labels_path.exists():
+        with labels_path.open("r", encoding="utf-8") as fh:
+            labels = json.load(fh)
+    files = manifest.setdefault("files", {})
+    # Documents saved to the manifest by a run that died before writing labels.json
+    labels.update((entry["txt_name"], entry["label"]) for entry in files.values() if entry.get("txt_name"))
+
+    for file_id in delta["removed"]:
+        entry = files.pop(file_id)
+        txt_name = entry.get("txt_name")
+        if txt_name:
+            labels.pop(txt_name, None)
+            (out_dir / txt_name).unlink(missing_ok=True)
+        print(f"Removed {entry.get('name')}")
+
+    # Moved to the other folder without changes: only the label is rewritten, the text stays
+    for f in delta["relabeled"]:
+        txt_name = files[f["id"]].get("txt_name")
+        files[f["id"]] = manifest_entry(f, f["label"], txt_name)
+        if txt_name:
+            labels[txt_name] = f["label"]
+        print(f"Relabeled {f['name']} as {f['label']}")
+
+    # The original of a duplicate may itself be pending in this run (e.g. the first sync)
+    names = {file_id: entry.get("name") for file_id, entry in files.items()}
+    names.update((f["id"], f.get("name")) for f in delta["pending"])
+    for f in delta["duplicates"]:
+        files[f["id"]] = manifest_entry(f, f["label"], None)
+        print(f"Skipped {f['name']} (identical to {names.get(f['duplicate_of'], f['duplicate_of'])})")
+
+    save_manifest(manifest, manifest_path)
+
+    pending = [f for f in delta["pending"] if journal.should_process(f"drive:{f['id']}", _drive_version(f), out_dir)]
+    _report_resume(journal, metrics)
+    failures = 0
+    count = 1
+    try:
+        for f, payload in _download_stream(service, pending, download_workers, metrics, spool_threshold, memory_budget):
+            key, version = f"drive:{f['id']}", _drive_version(f)
+            stem = sanitize_filename(f.get("name", f.get("id", "file")))
+            txt_name = f"{stem}.txt"
+            try:
+                text = _extract_payload(payload, f.get("name", f["id"]), cache, metrics)
+                previous = files.get(f["id"])
+                if previous and previous.get("txt_name") and previous["txt_name"] != txt_name:
+                    labels.pop(previous["txt_name"], None)
+                    (out_dir / previous["txt_name"]).unlink(missing_ok=True)
+                _write_text(out_dir / txt_name, text, metrics)
+            except Exception as e:
+                failures += 1
+                journal.failed(key, version, f"{type(e).__name__}: {e}")
+                print(f"Error processing {f.get('name', f['id'])}: {e}")
+                continue
+            labels[txt_name] = f["label"]
+            files[f["id"]] = manifest_entry(f, f["label"], txt_name)
+            save_manifest(manifest, manifest_path)
+            journal.done(key, version, txt_name, f["label"])
+            print(f"{count} Processed {f['name']}")
+            count += 1
+
+        if failures:
+            print(f"[WARN] {failures} documents failed; keeping the previous Drive page token so they are retried next run")
+        else:
+            manifest["page_token"] = delta["page_token"]
+            save_manifest(manifest, manifest_path)
+    finally:
+        write_labels(labels, labels_path)
+        print(f"Wrote {len(labels)} labeled text files.")
+
 
-    write_labels(labels, Path("data/labels.json"))
-    print(f"Wrote {len(labels)} labeled text files.")
+_worker_cache: Optional[ExtractionCache] = None
 
 
-def process_local_mode(data_path: Path):
-    """Process PDFs from local directory."""
+def _init_worker(cache_dir: Optional[str], cache_max_bytes: int, profile_dir: Optional[str] = None):
+    """Open the shared extraction cache once per pool worker (and profile it if requested)."""
+    global _worker_cache
+    profiling.init_worker(profile_dir)
+    _worker_cache = ExtractionCache(cache_dir, cache_max_bytes) if cache_dir else None
+
+
+def _extract_local_pdf(pdf_path: str, cache: Optional[ExtractionCache] = None) -> Tuple[str, Dict]:
+    """Extract text from a local PDF (runs inside pool workers); the file is memory-mapped, not read.
+
+    Returns the text and the timing/OCR stats needed by the parent's metrics.
+    """
+    page_stats: List[Dict] = []
+    start = time.perf_counter()
+    with profiling.stage(f"extract-{Path(pdf_path).name}"):
+        text = extract_text_from_pdf(pdf_path, cache=cache if cache is not None else _worker_cache, page_stats=page_stats)
+    return text, {"seconds": time.perf_counter() - start, "bytes": os.path.getsize(pdf_path), "page_stats": page_stats}
+
+
+def process_local_mode(data_path: Path, workers: int = 1, cache: Optional[ExtractionCache] = None, metrics: Optional[PipelineMetrics] = None, journal: Optional[RunJournal] = None):
+    """Process PDFs from local directory.
+
+    With workers > 1, extraction is fanned out across a process pool and the
+    most expensive documents (by estimate_extraction_cost) are submitted first.
+    Each document is journaled as it finishes; documents the journal already
+    has (when resuming) are skipped.
+    """
+    metrics = metrics or PipelineMetrics("full_pipeline", mode="local")
+    journal = journal or RunJournal()
     if not data_path.exists():
         raise RuntimeError(f"Data path does not exist: {data_path}")
     
@@ -112,28 +403,63 @@ def process_local_mode(data_path: Path):
     
     out_dir = Path("data/processed-text")
     out_dir.mkdir(parents=True, exist_ok=True)
-    labels: Dict[str, str] = {}
-    
+    labels: Dict[str, str] = journal.labels()
+
+    def key(pdf_path: Path) -> str:
+        return f"local:{pdf_path.relative_to(data_path).as_posix()}"
+
+    jobs: List[Tuple[Path, str]] = []
     for folder, label in [(useful_dir, "useful"), (not_useful_dir, "not-useful")]:
         pdf_files = list(folder.glob("*.pdf"))
         print(f"Found {len(pdf_files)} PDFs in local folder '{label}'")
-        
-        for pdf_path in pdf_files:
-            try:
-                with open(pdf_path, "rb") as f:
-                    pdf_bytes = f.read()
-                text = extract_text_from_pdf_bytes(pdf_bytes)
-                stem = pdf_path.stem
-                txt_name = f"{stem}.txt"
-                (out_dir / txt_name).write_text(text, encoding="utf-8")
-                labels[txt_name] = label
-                print(f"Processed {pdf_path.name}")
-            except Exception as e:
-                print(f"Error processing {pdf_path.name}: {e}")
-                continue
-    
-    write_labels(labels, Path("data/labels.json"))
-    print(f"Wrote {len(labels)} labeled text files.")
+        jobs.extend((pdf_path, label) for pdf_path in pdf_files if journal.should_process(key(pdf_path), _local_version(pdf_path), out_dir))
+    _report_resume(journal, metrics)
+
+    def record(pdf_path: Path, label: str, result: Tuple[str, Dict]):
+        text, stats = result
+        _record_extraction(metrics, pdf_path.name, text, stats["seconds"], stats["bytes"], stats["page_stats"])
+        if not text.strip():
+            # Extraction logs corrupt PDFs and OCR failures and returns ""; already counted as an extract failure
+            journal.failed(key(pdf_path), _local_version(pdf_path), "No text extracted")
+            print(f"Error processing {pdf_path.name}: no text extracted")
+            return
+        txt_name = f"{pdf_path.stem}.txt"
+        _write_text(out_dir / txt_name, text, metrics)
+        journal.done(key(pdf_path), _local_version(pdf_path), txt_name, label)
+        labels[txt_name] = label
+        print(f"Processed {pdf_path.name}")
+
+    def failed(pdf_path: Path, e: Exception):
+        metrics.observe("extract", 0.0, pdf_path.name, failed=True, error=f"{type(e).__name__}: {e}")
+        journal.failed(key(pdf_path), _local_version(pdf_path), f"{type(e).__name__}: {e}")
+        print(f"Error processing {pdf_path.name}: {e}")
+
+    # labels.json is written even if the run is interrupted; the journal has the rest
+    try:
+        if workers <= 1:
+            for pdf_path, label in jobs:
+                try:
+                    record(pdf_path, label, _extract_local_pdf(str(pdf_path), cache))
+                except Exception as e:
+                    failed(pdf_path, e)
+                    continue
+        else:
+            # Longest-job-first keeps large scanned documents from becoming the long tail
+            jobs.sort(key=lambda job: estimate_extraction_cost(str(job[0])), reverse=True)
+            print(f"Extracting {len(jobs)} PDFs with {workers} worker processes")
+            cache_args = (str(cache.cache_dir), cache.max_bytes) if cache is not None else (None, 0)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(*cache_args, profiling.output_dir())) as pool:
+                futures = {pool.submit(_extract_local_pdf, str(pdf_path)): (pdf_path, label) for pdf_path, label in jobs}
+                for future in as_completed(futures):
+                    pdf_path, label = futures[future]
+                    try:
+                        record(pdf_path, label, future.result())
+                    except Exception as e:
+                        failed(pdf_path, e)
+                        continue
+    finally:
+        write_labels(labels, Path("data/labels.json"))
+        print(f"Wrote {len(labels)} labeled text files.")
 
 
 def main():
@@ -160,19 +486,172 @@ Examples:
         metavar="PATH",
         help="Use local mode with PDFs from specified directory (should contain 'useful' and 'not-useful' subfolders)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes for local-mode extraction (default: 1)"
+    )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="API mode: number of concurrent Drive downloads (default: 1)"
+    )
+    parser.add_argument(
+        "--spool-threshold-mb",
+        type=int,
+        default=DEFAULT_SPOOL_THRESHOLD // (1024 * 1024),
+        metavar="MB",
+        help=f"API mode: spool PDFs larger than this to a temporary file instead of memory (default: {DEFAULT_SPOOL_THRESHOLD // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+        metavar="MB",
+        help=f"API mode: total size of PDFs downloading or being extracted at once (default: {DEFAULT_MEMORY_BUDGET // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="API mode: only download new or modified PDFs using the local Drive manifest"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=Path(DEFAULT_MANIFEST_PATH),
+        metavar="PATH",
+        help=f"Drive sync manifest used by --incremental (default: {DEFAULT_MANIFEST_PATH})"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run, skipping documents completed in the journal and retrying failed ones up to --max-attempts times"
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        default=Path(DEFAULT_JOURNAL_PATH),
+        metavar="PATH",
+        help=f"Per-document run journal replayed by --resume (default: {DEFAULT_JOURNAL_PATH})"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        metavar="N",
+        help=f"With --resume, skip documents that have already failed N times (default: {DEFAULT_MAX_ATTEMPTS})"
+    )
+    parser.add_argument(
+        "--no-passage-index",
+        action="store_true",
+        help=f"Don't update the candidate passage index in {DEFAULT_PASSAGE_DIR}"
+    )
+    parser.add_argument(
+        "--no-corpus-index",
+        action="store_true",
+        help=f"Don't update the full-text keyword index {DEFAULT_INDEX_DB}"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(DEFAULT_CACHE_DIR),
+        metavar="PATH",
+        help=f"Extraction cache directory keyed by PDF hash (default: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=1024,
+        metavar="MB",
+        help="Size limit of the extraction cache before LRU eviction (default: 1024)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-extract text, ignoring the extraction cache"
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=Path(DEFAULT_REPORT_PATH),
+        metavar="PATH",
+        help=f"JSON run report with per-stage metrics (default: {DEFAULT_REPORT_PATH})"
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Write a CPU/memory profile per document and for training, plus a hot-spot summary, to DIR"
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Also write the run metrics in Prometheus textfile format to PATH"
+    )
     
-    if args.local:
-        print(f"Running in LOCAL mode with data path: {args.local}")
-        process_local_mode(args.local)
-    else:  # args.api
-        print("Running in API mode (Google Drive)")
-        process_api_mode()
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    mode = "local" if args.local else ("api-incremental" if args.incremental else "api")
+    metrics = PipelineMetrics("full_pipeline", mode=mode)
+    if args.profile:
+        profiling.enable(args.profile)
     
-    print("Beginning model training...")
-    run([sys.executable, "src/model/train_model.py"])
-    print("Training complete.")
+    # The report is written even if the run fails part way, so a long run still leaves its numbers behind
+    try:
+        if args.local:
+            print(f"Running in LOCAL mode with data path: {args.local}")
+            with RunJournal(args.journal, resume=args.resume, max_attempts=args.max_attempts) as journal:
+                process_local_mode(args.local, workers=args.workers, cache=cache, metrics=metrics, journal=journal)
+        else:  # args.api
+            print("Running in API mode (Google Drive)")
+            spool = {"spool_threshold": args.spool_threshold_mb * 1024 * 1024, "memory_budget": args.memory_budget_mb * 1024 * 1024}
+            with RunJournal(args.journal, resume=args.resume, max_attempts=args.max_attempts) as journal:
+                if args.incremental:
+                    process_api_incremental(cache=cache, manifest_path=args.manifest, download_workers=args.download_workers, metrics=metrics, journal=journal, **spool)
+                else:
+                    process_api_mode(cache=cache, download_workers=args.download_workers, metrics=metrics, journal=journal, **spool)
+        if cache is not None and args.workers <= 1:
+            print(f"Extraction cache: {cache.hits} hits, {cache.misses} misses")
+            metrics.count("cache_hits", cache.hits)
+            metrics.count("cache_misses", cache.misses)
+
+        if not args.no_passage_index:
+            with metrics.stage("passages"):
+                indexed, unchanged = build_passage_index(Path("data/processed-text"), Path(DEFAULT_PASSAGE_DIR))
+            print(f"Indexed candidate passages of {indexed} documents ({unchanged} unchanged) in {DEFAULT_PASSAGE_DIR}")
+        if not args.no_corpus_index:
+            with metrics.stage("index"), CorpusIndex(DEFAULT_INDEX_DB) as index:
+                counts = index.update(Path("data/processed-text"))
+                index.sync_labels(Path("data/labels.json"))
+            print(f"Keyword index {DEFAULT_INDEX_DB}: {', '.join(f'{v} {k}' for k, v in counts.items())}")
+
+        print("Beginning model training...")
+        with metrics.stage("train") as obs:
+            train_cmd = [sys.executable, "src/model/train_model.py"] + (["--profile", str(args.profile)] if args.profile else [])
+            print(f"$ {' '.join(train_cmd)}")
+            returncode = subprocess.run(train_cmd).returncode
+            obs["failed"] = returncode != 0
+            obs["error"] = f"train_model.py exited with {returncode}" if returncode else None
+        if returncode != 0:
+            sys.exit(returncode)
+        print("Training complete.")
+    finally:
+        metrics.write_json(args.report)
+        if args.prometheus_textfile:
+            metrics.write_prometheus(args.prometheus_textfile)
+        print("\n".join(metrics.summary_lines()))
+        print(f"Run report written to {args.report}")
+        if args.profile:
+            print(f"Profile summary written to {profiling.write_summary()}")
 
 
 if __name__ == "__main__":
@@ -7,7 +7,13 @@ Environment variables required:
 Optional:
  - GOOGLE_DRIVE_USE_SHARED_DRIVE=true (enables includeItemsFromAllDrives/supportsAllDrives)
 
-This module streams PDF bytes without saving the PDF to disk.
+This module streams PDF bytes without saving the PDF to disk. Large PDFs are
+spooled to an anonymous temporary file (deleted on close) and memory-mapped
+instead of being held in memory; see SpooledPDF and MemoryBudget.
+
+Incremental sync keeps a local manifest (file id, modifiedTime, md5Checksum,
+size) plus a Changes API page token so later runs only fetch new or modified
+PDFs. See load_manifest / incremental_changes.
 """
 
 from __future__ import annotations
@@ -15,31 +21,51 @@ from __future__ import annotations
 import os
 import io
 import re
-from typing import List, Dict, Optional, Tuple
+import json
+import mmap
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
 
+import httplib2
+import google_auth_httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 
 from scripts.env_loader import load_env
 
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
+PDF_MIME_TYPE = "application/pdf"
+FILE_FIELDS = "id, name, mimeType, modifiedTime, md5Checksum, size, parents, trashed"
+DEFAULT_MANIFEST_PATH = "data/drive-manifest.json"
+# Downloads larger than this are written to a temporary file instead of memory
+DEFAULT_SPOOL_THRESHOLD = 32 * 1024 * 1024
+# Total size of documents downloaded or being extracted at once (ConcurrentDownloader)
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
 
 
 def _use_all_drives() -> bool:
     return os.environ.get("GOOGLE_DRIVE_USE_SHARED_DRIVE", "false").lower() in {"1", "true", "yes"}
 
 
-def get_drive_service():
+def get_drive_credentials():
     load_env()  # Load .env file if present
     creds_info = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON")
     if not creds_info:
         raise RuntimeError("Missing GOOGLE_SERVICE_ACCOUNT_JSON environment variable")
+    return service_account.Credentials.from_service_account_info(json.loads(creds_info), scopes=SCOPES)
 
-    import json
 
-    creds = service_account.Credentials.from_service_account_info(json.loads(creds_info), scopes=SCOPES)
-    return build("drive", "v3", credentials=creds, cache_discovery=False)
+def get_drive_service():
+    return build("drive", "v3", credentials=get_drive_credentials(), cache_discovery=False)
 
 
 def find_child_folder_id(service, parent_id: str, name: str) -> Optional[str]:
@@ -65,7 +91,7 @@ def list_pdfs_in_folder(service, folder_id: str, max_files: Optional[int] = None
     q = f"'{folder_id}' in parents and mimeType = 'application/pdf' and trashed = false"
     params = {
         "q": q,
-        "fields": "nextPageToken, files(id, name, mimeType, modifiedTime)",
+        "fields": f"nextPageToken, files({FILE_FIELDS})",
         "pageSize": 100,
         "orderBy": "modifiedTime desc" if order_desc else "modifiedTime",
     }
@@ -101,6 +127,419 @@ def download_file_bytes(service, file_id: str) -> bytes:
     return buf.getvalue()
 
 
+class SpooledPDF:
+    """A downloaded PDF kept in memory while small and in a temporary file once large.
+
+    Written to like a file (MediaIoBaseDownload does this chunk by chunk).
+    Once the data passes `threshold` bytes (or straight away if `size_hint`
+    says it will) it lives in an anonymous temporary file. view() returns a
+    zero-copy memoryview for PyMuPDF: the BytesIO buffer itself, or a
+    read-only mmap of the temp file. close() releases the view, the file and,
+    via on_close, any memory budget held for the document.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_SPOOL_THRESHOLD, size_hint: Optional[int] = None, on_close: Optional[Callable[[], None]] = None):
+        self.threshold = threshold
+        self.on_close = on_close
+        self._file = tempfile.TemporaryFile() if size_hint and size_hint > threshold else io.BytesIO()
+        self._mmap = None
+        self._view = None
+        self.closed = False
+
+    @property
+    def spooled(self) -> bool:
+        """True if the data is on disk rather than in memory."""
+        return not isinstance(self._file, io.BytesIO)
+
+    @property
+    def nbytes(self) -> int:
+        return self._file.seek(0, io.SEEK_END) if self._view is None else self._view.nbytes
+
+    def write(self, data) -> int:
+        if not self.spooled and self._file.tell() + len(data) > self.threshold:
+            spooled = tempfile.TemporaryFile()
+            spooled.write(self._file.getbuffer())
+            self._file = spooled
+        return self._file.write(data)
+
+    def view(self) -> memoryview:
+        """Return a read-only, zero-copy view of the whole PDF (valid until close())."""
+        if self._view is None:
+            if not self.spooled:
+                self._view = self._file.getbuffer().toreadonly()
+            elif self.nbytes == 0:
+                self._view = memoryview(b"")
+            else:
+                self._file.flush()
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+        return self._view
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._view is not None:
+            self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+        if self.on_close is not None:
+            self.on_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def download_file_spooled(service, f: Dict, threshold: int = DEFAULT_SPOOL_THRESHOLD) -> SpooledPDF:
+    """Download a Drive file into a SpooledPDF (memory below threshold, temp file above)."""
+    size = int(f["size"]) if f.get("size") else None
+    request = service.files().get_media(fileId=f["id"], supportsAllDrives=_use_all_drives())
+    payload = SpooledPDF(threshold, size_hint=size)
+    try:
+        downloader = MediaIoBaseDownload(payload, request, chunksize=chunk_size_for(size))
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+    except BaseException:
+        payload.close()
+        raise
+    return payload
+
+
+class MemoryBudget:
+    """Counting semaphore over bytes, limiting the size of documents in flight.
+
+    A single document larger than the whole budget is admitted once nothing
+    else holds any of it, so oversized files are processed alone rather than
+    never.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int, blocking: bool = True) -> Optional[int]:
+        """Reserve nbytes (capped at the budget); returns the amount held, or None if not blocking and unavailable."""
+        nbytes = min(nbytes, self.max_bytes)
+        with self._cond:
+            if not blocking and self.in_use + nbytes > self.max_bytes:
+                return None
+            self._cond.wait_for(lambda: self.in_use + nbytes <= self.max_bytes)
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            return nbytes
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+
+# Drive errors worth retrying: rate limiting and transient server failures
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+
+
+def chunk_size_for(size: Optional[int]) -> int:
+    """Pick a download chunk size: whole file in one request up to MAX_CHUNK_SIZE."""
+    if not size:
+        return 1024 * 1024
+    # Round up to a multiple of 256 KiB
+    chunk = -(-size // MIN_CHUNK_SIZE) * MIN_CHUNK_SIZE
+    return max(MIN_CHUNK_SIZE, min(chunk, MAX_CHUNK_SIZE))
+
+
+class ConcurrentDownloader:
+    """Download many Drive files at once, one HTTP connection per worker thread.
+
+    googleapiclient service objects (and the httplib2 transport under them) are
+    not thread-safe, so each worker thread builds its own service on top of a
+    shared set of credentials and reuses it (keep-alive) for all its downloads.
+    Requests failing with 429/5xx or network errors are retried with
+    exponential backoff and jitter.
+
+    on_download, if given, is called from the worker thread as
+    on_download(file, nbytes, seconds, retries) after each successful download.
+
+    Downloads are delivered as SpooledPDF objects (files over spool_threshold
+    bytes go to a temporary file). Each document holds its size against
+    budget from the moment its download starts until the consumer closes it,
+    so memory in flight stays bounded however slow extraction is.
+    """
+
+    def __init__(
+        self,
+        credentials=None,
+        workers: int = 4,
+        max_retries: int = 5,
+        timeout: int = 120,
+        on_download: Optional[Callable] = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        budget: Optional[MemoryBudget] = None,
+    ):
+        self.credentials = credentials or get_drive_credentials()
+        self.on_download = on_download
+        self.spool_threshold = spool_threshold
+        self.budget = budget or MemoryBudget()
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.stats: Dict[str, Dict] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+            service = build("drive", "v3", http=http, cache_discovery=False)
+            self._local.service = service
+        return service
+
+    def _record(self, f: Dict, nbytes: int, seconds: float, retries: int):
+        if self.on_download is not None:
+            self.on_download(f, nbytes, seconds, retries)
+        worker = threading.current_thread().name
+        with self._lock:
+            s = self.stats.setdefault(worker, {"files": 0, "bytes": 0, "seconds": 0.0, "retries": 0})
+            s["files"] += 1
+            s["bytes"] += nbytes
+            s["seconds"] += seconds
+            s["retries"] += retries
+
+    def download_one(self, f: Dict) -> SpooledPDF:
+        """Download a single file, retrying transient failures."""
+        size = int(f["size"]) if f.get("size") else None
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            payload = SpooledPDF(self.spool_threshold, size_hint=size)
+            try:
+                request = self._service().files().get_media(fileId=f["id"], supportsAllDrives=_use_all_drives())
+                downloader = MediaIoBaseDownload(payload, request, chunksize=chunk_size_for(size))
+                done = False
+                while not done:
+                    _, done = downloader.next_chunk()
+                self._record(f, payload.nbytes, time.perf_counter() - start, attempt)
+                return payload
+            except BaseException as e:
+                payload.close()
+                if not isinstance(e, (HttpError, httplib2.HttpLib2Error, socket.timeout, ConnectionError)):
+                    raise
+                status = getattr(e, "status_code", None) or getattr(getattr(e, "resp", None), "status", None)
+                if isinstance(e, HttpError) and int(status or 0) not in RETRYABLE_STATUS:
+                    raise
+                if attempt == self.max_retries:
+                    raise
+                # Drop the connection in case it is the problem
+                self._local.service = None
+                delay = min(60.0, 2**attempt) + random.uniform(0, 1)
+                print(f"[WARN] Download of {f.get('name', f['id'])} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _cost(self, f: Dict) -> int:
+        """Budget charged for a file: its size, or the spool threshold when Drive doesn't report one."""
+        return int(f["size"]) if f.get("size") else self.spool_threshold
+
+    def download(self, files: List[Dict], return_exceptions: bool = False) -> Iterator[Tuple[Dict, SpooledPDF]]:
+        """Yield (file, SpooledPDF) pairs as downloads finish.
+
+        The consumer must close each SpooledPDF (e.g. `with payload:`) before
+        asking for the next one; closing returns its share of the budget. A new
+        download starts only when at most 2 * workers are queued and the budget
+        has room, so finished files don't pile up in memory when the consumer
+        (e.g. OCR) is slower than the network.
+
+        A download that still fails after its retries is raised from the
+        generator, ending it; with return_exceptions it is yielded as
+        (file, exception) instead and the remaining files keep downloading.
+        """
+        pending = deque(files)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="drive-download") as pool:
+            in_flight = {}
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < 2 * self.workers:
+                        # Only wait for budget when nothing is in flight; otherwise a queued
+                        # download would never be handed over to release its share.
+                        held = self.budget.acquire(self._cost(pending[0]), blocking=not in_flight)
+                        if held is None:
+                            break
+                        f = pending.popleft()
+                        in_flight[pool.submit(self.download_one, f)] = (f, held)
+                    future = next(as_completed(in_flight))
+                    f, held = in_flight.pop(future)
+                    try:
+                        payload = future.result()
+                    except BaseException as e:
+                        self.budget.release(held)
+                        if not return_exceptions or not isinstance(e, Exception):
+                            raise
+                        yield f, e
+                        continue
+                    payload.on_close = lambda held=held: self.budget.release(held)
+                    yield f, payload
+            finally:
+                # Consumer stopped early (or a download failed): free what was still queued
+                for future, (_, held) in in_flight.items():
+                    if not future.cancel() and future.exception() is None:
+                        future.result().close()
+                    self.budget.release(held)
+
+    def report(self) -> str:
+        """Return a per-worker throughput summary."""
+        lines = []
+        for worker, s in sorted(self.stats.items()):
+            rate = s["bytes"] / s["seconds"] if s["seconds"] else 0.0
+            lines.append(f"{worker}: {s['files']} files, {s['bytes'] / 1e6:.1f} MB, {rate / 1e6:.2f} MB/s, {s['retries']} retries")
+        total_bytes = sum(s["bytes"] for s in self.stats.values())
+        lines.append(f"total: {total_bytes / 1e6:.1f} MB")
+        return "\n".join(lines)
+
+
+def load_manifest(path=DEFAULT_MANIFEST_PATH) -> Dict:
+    """Load the incremental sync manifest, or an empty one if it doesn't exist yet."""
+    path = Path(path)
+    if not path.exists():
+        return {"page_token": None, "files": {}}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict, path=DEFAULT_MANIFEST_PATH):
+    """Atomically write the incremental sync manifest."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def manifest_entry(f: Dict, label: str, txt_name: Optional[str]) -> Dict:
+    """Build the manifest record kept for a synced Drive file."""
+    return {
+        "name": f.get("name"),
+        "label": label,
+        "txt_name": txt_name,
+        "modifiedTime": f.get("modifiedTime"),
+        "md5Checksum": f.get("md5Checksum"),
+        "size": int(f["size"]) if f.get("size") else None,
+    }
+
+
+def get_start_page_token(service) -> str:
+    params = {"supportsAllDrives": True} if _use_all_drives() else {}
+    return service.changes().getStartPageToken(**params).execute()["startPageToken"]
+
+
+def list_changes(service, page_token: str) -> Tuple[List[Dict], str]:
+    """Return all changes since page_token and the token to resume from next time."""
+    params = {
+        "pageToken": page_token,
+        "fields": f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+        "pageSize": 1000,
+        "spaces": "drive",
+    }
+    if _use_all_drives():
+        params.update(
+            {
+                "supportsAllDrives": True,
+                "includeItemsFromAllDrives": True,
+            }
+        )
+
+    changes: List[Dict] = []
+    while True:
+        resp = service.changes().list(**params).execute()
+        changes.extend(resp.get("changes", []))
+        if "newStartPageToken" in resp:
+            return changes, resp["newStartPageToken"]
+        params["pageToken"] = resp["nextPageToken"]
+
+
+def _is_modified(f: Dict, entry: Optional[Dict]) -> bool:
+    if entry is None:
+        return True
+    if f.get("md5Checksum") and entry.get("md5Checksum"):
+        return f["md5Checksum"] != entry["md5Checksum"]
+    return f.get("modifiedTime") != entry.get("modifiedTime")
+
+
+def incremental_changes(service, folder_labels: Dict[str, str], manifest: Dict) -> Dict:
+    """Work out which PDFs in the labeled folders need to be (re)processed.
+
+    folder_labels maps Drive folder id -> label. On the first run (no page token
+    in the manifest) every PDF is listed; afterwards only the Changes API delta
+    since the stored token is read.
+
+    Returns a dict with:
+     - pending: new or modified files (each with an added "label" key)
+     - duplicates: files whose md5Checksum matches a file already synced or
+       pending, so downloading them again would be wasted work
+     - removed: manifest ids that were deleted, trashed or moved out of the folders
+     - relabeled: unchanged files moved to the other labeled folder (each with
+       its new "label"); only their label changes, nothing is downloaded
+     - page_token: token to store in the manifest once pending files are processed
+    """
+    known = manifest.get("files", {})
+    candidates: List[Dict] = []
+    removed: List[str] = []
+
+    if not manifest.get("page_token"):
+        # Take the token before listing so nothing changed mid-listing is missed
+        page_token = get_start_page_token(service)
+        for folder_id, label in folder_labels.items():
+            for f in list_pdfs_in_folder(service, folder_id, max_files=None):
+                candidates.append({**f, "label": label})
+    else:
+        changes, page_token = list_changes(service, manifest["page_token"])
+        for change in changes:
+            file_id = change.get("fileId")
+            f = change.get("file") or {}
+            parents = [p for p in f.get("parents", []) if p in folder_labels]
+            if change.get("removed") or f.get("trashed") or f.get("mimeType") != PDF_MIME_TYPE or not parents:
+                if file_id in known:
+                    removed.append(file_id)
+                continue
+            candidates.append({**f, "label": folder_labels[parents[0]]})
+
+    pending: List[Dict] = []
+    duplicates: List[Dict] = []
+    relabeled: List[Dict] = []
+    seen_md5 = {entry["md5Checksum"]: file_id for file_id, entry in known.items() if entry.get("md5Checksum") and entry.get("txt_name") and file_id not in removed}
+    for f in candidates:
+        entry = known.get(f["id"])
+        if not _is_modified(f, entry):
+            # Moving a file between folders keeps its md5 and only changes its parent
+            if entry.get("label") != f["label"]:
+                relabeled.append(f)
+            continue
+        md5 = f.get("md5Checksum")
+        if md5 and seen_md5.get(md5, f["id"]) != f["id"]:
+            duplicates.append({**f, "duplicate_of": seen_md5[md5]})
+            continue
+        if md5:
+            seen_md5[md5] = f["id"]
+        pending.append(f)
+
+    # A skipped duplicate whose original disappeared now has to be processed itself
+    removed_md5 = {known[file_id].get("md5Checksum") for file_id in removed} - {None}
+    for file_id, entry in known.items():
+        md5 = entry.get("md5Checksum")
+        if entry.get("txt_name") is None and md5 in removed_md5 and file_id not in removed and md5 not in seen_md5:
+            seen_md5[md5] = file_id
+            pending.append({"id": file_id, "name": entry["name"], "md5Checksum": md5, "modifiedTime": entry.get("modifiedTime"), "size": entry.get("size"), "label": entry["label"]})
+
+    return {"pending": pending, "duplicates": duplicates, "removed": removed, "relabeled": relabeled, "page_token": page_token}
+
+
 def sanitize_filename(name: str) -> str:
     # Remove extension for stem-like behavior
     name = re.sub(r"\.[Pp][Dd][Ff]$", "", name)
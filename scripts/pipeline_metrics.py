@@ -0,0 +1,181 @@
+"""Per-stage metrics and run reports for the data pipelines.
+
+A PipelineMetrics object collects one observation per document and stage
+(download, extract, ocr, write, train, ...): duration, bytes and whether it
+failed, plus free-form counters (OCR'd pages, cache hits, ...). At the end of
+a run it can write
+
+ - a JSON report with per-stage counts, bytes, failures, total and
+   p50/p95/max seconds per document, and the counters;
+ - a Prometheus textfile (for node_exporter's textfile collector).
+
+Usage:
+    metrics = PipelineMetrics("full_pipeline", mode="local")
+    with metrics.stage("write", document=name) as obs:
+        path.write_text(text)
+        obs["bytes"] = len(text)
+    metrics.count("ocr_pages", 3)
+    metrics.write_json("data/pipeline-report.json")
+    metrics.write_prometheus("/var/lib/node_exporter/textfile/fracfeed.prom")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_REPORT_PATH = "data/pipeline-report.json"
+METRIC_PREFIX = "fracfeed_pipeline"
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in 0..100) of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def _label_value(value) -> str:
+    """Escape a Prometheus label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def ocr_summary(page_stats: Iterable[Dict]) -> Dict:
+    """Summarize the page_stats list filled by the extraction functions (one entry per OCR'd page)."""
+    pages = list(page_stats)
+    return {
+        "ocr_pages": len(pages),
+        "render_s": sum(p.get("render_s", 0.0) + p.get("convert_s", 0.0) for p in pages),
+        "ocr_s": sum(p.get("ocr_s", 0.0) for p in pages),
+    }
+
+
+class PipelineMetrics:
+    """Thread-safe collector of per-document stage observations and counters."""
+
+    def __init__(self, pipeline: str, mode: Optional[str] = None):
+        self.pipeline = pipeline
+        self.mode = mode
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.observations: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, document: Optional[str] = None, nbytes: int = 0, failed: bool = False, error: Optional[str] = None):
+        """Record one completed (or failed) stage for a document."""
+        with self._lock:
+            self.observations.append({"stage": stage, "document": document, "seconds": seconds, "bytes": nbytes, "failed": failed, "error": error})
+
+    @contextmanager
+    def stage(self, stage: str, document: Optional[str] = None):
+        """Time a block as one observation; yields a dict whose 'bytes' key may be set.
+
+        Exceptions are recorded as failures and re-raised.
+        """
+        obs = {"bytes": 0}
+        start = time.perf_counter()
+        try:
+            yield obs
+        except Exception as e:
+            self.observe(stage, time.perf_counter() - start, document, obs["bytes"], failed=True, error=f"{type(e).__name__}: {e}")
+            raise
+        self.observe(stage, time.perf_counter() - start, document, obs["bytes"], failed=obs.get("failed", False), error=obs.get("error"))
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_summary(self) -> Dict[str, Dict]:
+        stages: Dict[str, Dict] = {}
+        with self._lock:
+            observations = list(self.observations)
+        for stage in dict.fromkeys(o["stage"] for o in observations):
+            obs = [o for o in observations if o["stage"] == stage]
+            seconds = [o["seconds"] for o in obs]
+            stages[stage] = {
+                "count": len(obs),
+                "failures": sum(1 for o in obs if o["failed"]),
+                "bytes": sum(o["bytes"] for o in obs),
+                "total_s": round(sum(seconds), 4),
+                "p50_s": round(_percentile(seconds, 50), 4),
+                "p95_s": round(_percentile(seconds, 95), 4),
+                "max_s": round(max(seconds), 4),
+            }
+        return stages
+
+    def report(self) -> Dict:
+        with self._lock:
+            failures = [{"stage": o["stage"], "document": o["document"], "error": o["error"]} for o in self.observations if o["failed"]]
+            counters = dict(self.counters)
+        return {
+            "pipeline": self.pipeline,
+            "mode": self.mode,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self._start, 4),
+            "stages": self.stage_summary(),
+            "counters": counters,
+            "failures": failures,
+        }
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for stage, s in self.stage_summary().items():
+            lines.append(f"{stage:<10} {s['count']:>6} docs {s['failures']:>4} failed {s['bytes'] / 1e6:>9.1f} MB {s['total_s']:>9.1f}s total  p50 {s['p50_s']:.3f}s  p95 {s['p95_s']:.3f}s")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value:g}")
+        return lines
+
+    def write_json(self, path) -> Dict:
+        report = self.report()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return report
+
+    def prometheus_text(self) -> str:
+        labels = f'pipeline="{_label_value(self.pipeline)}"' + (f',mode="{_label_value(self.mode)}"' if self.mode else "")
+        out = []
+
+        def metric(name, kind, help_text, samples):
+            out.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            out.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for extra, value in samples:
+                out.append(f"{METRIC_PREFIX}_{name}{{{labels}{extra}}} {value}")
+
+        stages = self.stage_summary()
+        metric("stage_documents_total", "counter", "Documents processed per stage.", [(f',stage="{_label_value(k)}"', s["count"]) for k, s in stages.items()])
+        metric("stage_failures_total", "counter", "Failed documents per stage.", [(f',stage="{_label_value(k)}"', s["failures"]) for k, s in stages.items()])
+        metric("stage_bytes_total", "counter", "Bytes handled per stage.", [(f',stage="{_label_value(k)}"', s["bytes"]) for k, s in stages.items()])
+        metric("stage_seconds_total", "counter", "Time spent per stage.", [(f',stage="{_label_value(k)}"', s["total_s"]) for k, s in stages.items()])
+        metric(
+            "stage_document_seconds",
+            "gauge",
+            "Per-document stage duration quantiles.",
+            [(f',stage="{_label_value(k)}",quantile="{q}"', s[key]) for k, s in stages.items() for q, key in (("0.5", "p50_s"), ("0.95", "p95_s"), ("1", "max_s"))],
+        )
+        for name, value in sorted(self.counters.items()):
+            metric(f"{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total", "counter", f"Pipeline counter {name}.", [("", value)])
+        metric("run_seconds", "gauge", "Wall time of the last run.", [("", round(time.perf_counter() - self._start, 4))])
+        metric("last_run_timestamp_seconds", "gauge", "Unix time the last run finished.", [("", int(time.time()))])
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the textfile atomically so the collector never reads a partial file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.prometheus_text(), encoding="utf-8")
+        os.replace(tmp, path)
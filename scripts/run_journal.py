@@ -0,0 +1,121 @@
+"""Append-only per-document journal for resumable pipeline runs.
+
+Every document the pipeline finishes (or fails on) is appended to a JSON
+Lines file as soon as it is done, and the line is flushed and fsync'ed, so a
+crash or a Drive quota error part way through a run loses at most the
+document being processed. A later run started with --resume replays the
+journal to
+
+ - skip documents completed with the same version (Drive md5Checksum /
+   modifiedTime, or local size and mtime) whose text file still exists;
+ - retry failed documents (download errors, or no text extracted from a
+   corrupt PDF or a failed OCR run) until the same version has failed
+   max_attempts times;
+ - rebuild the labels of everything completed so far.
+
+Each line is one record:
+
+    {"key": "drive:<file id>", "version": "...", "status": "done", "txt_name": "a.txt", "label": "useful", "time": ...}
+    {"key": "local:useful/b.pdf", "version": "...", "status": "failed", "error": "RuntimeError: ...", "time": ...}
+
+A partial last line (the process died mid-write) is ignored.
+
+Usage:
+    journal = RunJournal("data/pipeline-journal.jsonl", resume=True)
+    if journal.should_process(key, version, out_dir):
+        ...
+        journal.done(key, version, txt_name, label)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_JOURNAL_PATH = "data/pipeline-journal.jsonl"
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class RunJournal:
+    """Append-only record of completed and failed documents, replayed by --resume."""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, resume: bool = False, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.completed: Dict[str, Dict] = {}
+        # key -> (version, consecutive failures of that version)
+        self.failures: Dict[str, Tuple[Optional[str], int]] = {}
+        self.skipped = 0
+        self.gave_up = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self._replay()
+        self._fh = self.path.open("a" if resume else "w", encoding="utf-8")
+        if resume and self._fh.tell() and not self.path.read_bytes().endswith(b"\n"):
+            self._fh.write("\n")  # terminate a partial last line
+
+    def _replay(self):
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        key = record["key"]
+        if record["status"] == "done":
+            self.completed[key] = record
+            self.failures.pop(key, None)
+        else:
+            self.completed.pop(key, None)
+            version, count = self.failures.get(key, (None, 0))
+            self.failures[key] = (record.get("version"), count + 1 if version == record.get("version") else 1)
+
+    def _append(self, record: Dict):
+        record["time"] = round(time.time(), 3)
+        with self._lock:
+            self._fh.write(json.dumps(record) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._apply(record)
+
+    def should_process(self, key: str, version: Optional[str], out_dir: Path) -> bool:
+        """False if the document is already done (same version, text file present) or out of attempts."""
+        done = self.completed.get(key)
+        if done is not None and done.get("version") == version and (out_dir / done["txt_name"]).exists():
+            self.skipped += 1
+            return False
+        failed_version, count = self.failures.get(key, (None, 0))
+        if failed_version == version and count >= self.max_attempts:
+            self.gave_up += 1
+            print(f"[WARN] Skipping {key}: failed {count} times")
+            return False
+        return True
+
+    def done(self, key: str, version: Optional[str], txt_name: str, label: str):
+        self._append({"key": key, "version": version, "status": "done", "txt_name": txt_name, "label": label})
+
+    def failed(self, key: str, version: Optional[str], error: str):
+        self._append({"key": key, "version": version, "status": "failed", "error": error})
+
+    def labels(self) -> Dict[str, str]:
+        """txt_name -> label for every completed document."""
+        return {r["txt_name"]: r["label"] for r in self.completed.values()}
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,72 @@
+"""Check the startup time of the command-line entry points against a budget.
+
+Each CLI is started with --help several times; the median wall time minus the
+median time of a bare interpreter is its startup overhead. The script also
+lists heavy dependencies (PyMuPDF, Tesseract bindings, PIL, xgboost,
+scikit-learn, ...) that were imported just to print the help text, which
+should be none for the extraction and classification CLIs.
+
+Usage:
+    python scripts/startup_budget.py [--runs 5]
+
+Exits with status 1 if any CLI is over its budget or imports a heavy module.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Startup overhead budget (ms above a bare interpreter) for `<cli> --help`
+BUDGETS_MS = {
+    "src/preprocessing/pdf_text_extraction.py": 150,
+    "src/model/pdf_classifier.py": 200,
+    "src/model/model_bundle.py": 250,
+    "src/preprocessing/corpus_store.py": 100,
+}
+HEAVY_MODULES = ("fitz", "pymupdf", "pytesseract", "PIL", "xgboost", "sklearn", "scipy", "joblib")
+
+
+def _wall_time(args, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=REPO_ROOT, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def heavy_imports(script):
+    """Return the heavy top-level modules imported by `python <script> --help`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", script, "--help"], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    imported = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            imported.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return sorted(imported.intersection(HEAVY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup time against a budget.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per CLI (the median is reported).")
+    args = parser.parse_args()
+
+    baseline = _wall_time([sys.executable, "-c", "pass"], args.runs)
+    print(f"Bare interpreter: {baseline * 1000:.0f} ms")
+    failed = False
+    for script, budget_ms in BUDGETS_MS.items():
+        overhead_ms = (_wall_time([sys.executable, script, "--help"], args.runs) - baseline) * 1000
+        heavy = heavy_imports(script)
+        ok = overhead_ms <= budget_ms and not heavy
+        failed |= not ok
+        status = "OK  " if ok else "OVER"
+        print(f"{status} {script:<45} {overhead_ms:6.0f} ms (budget {budget_ms} ms){'  heavy imports: ' + ', '.join(heavy) if heavy else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Long-running PDF classifier service.
+
+Keeps the booster, vectorizer and label encoder resident and serves
+classification requests over localhost HTTP or a Unix socket, so a request
+only pays for extraction and prediction instead of interpreter startup and
+artifact loading.
+
+Usage:
+    python src/model/pdf_classifier.py --serve [--port 8765 | --socket /tmp/fracfeed.sock]
+
+Requests:
+    POST /classify  with JSON {"pdf_path": "..."}  or raw PDF bytes (Content-Type: application/pdf)
+    GET  /health
+
+Requests are handled on one thread each. PyMuPDF is not thread-safe, so text
+extraction is handed to a pool of processes (one document per process at a
+time) and concurrent requests extract in parallel; their texts are then grouped
+by BatchPredictor into a single in-place prediction over one sparse matrix.
+Each response includes a latency breakdown (extract, including any wait for a
+free extraction process, queue, predict, total) in seconds.
+"""
+
+import json
+import os
+import queue
+import socketserver
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.model import pdf_classifier
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf_bytes
+
+DEFAULT_PORT = 8765
+
+
+class BatchPredictor:
+    """Collects texts submitted from many threads and scores them together.
+
+    The worker thread waits for a first request, then keeps collecting for up
+    to max_wait seconds (or until max_batch texts) before running a single
+    prediction for the whole batch.
+    """
+
+    def __init__(self, classifier, max_batch=64, max_wait=0.01):
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="batch-predictor", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queue a text for scoring and return a Future resolving to a result dict."""
+        future = Future()
+        self._queue.put((text, time.perf_counter(), future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            start = time.perf_counter()
+            try:
+                probs, labels = pdf_classifier.predict_texts(self.classifier, [text for text, _, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            predict_s = time.perf_counter() - start
+            for (_, queued_at, future), prob, label in zip(batch, probs, labels):
+                future.set_result(
+                    {
+                        "label": str(label),
+                        "probability": round(float(prob), 6),
+                        "threshold": self.classifier["threshold"],
+                        "batch_size": len(batch),
+                        "timings": {"queue_s": round(start - queued_at, 6), "predict_s": round(predict_s, 6)},
+                    }
+                )
+
+
+class ClassifierRequestHandler(BaseHTTPRequestHandler):
+    # Set on the subclass created by make_server
+    predictor = None
+    extractor = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/classify":
+            self._send_json(404, {"error": "Not found"})
+            return
+        received = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        body = self.rfile.read(length)
+
+        start = time.perf_counter()
+        if self.headers.get("Content-Type", "").startswith("application/pdf"):
+            name = self.headers.get("X-File-Name", "upload.pdf")
+            text = self.extractor.submit(extract_text_from_pdf_bytes, body).result()
+        else:
+            try:
+                name = json.loads(body)["pdf_path"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "Expected JSON {'pdf_path': ...} or application/pdf body"})
+                return
+            if not Path(name).exists():
+                self._send_json(404, {"error": f"File not found: {name}"})
+                return
+            text = self.extractor.submit(pdf_classifier.extract_text_from_pdf, name).result()
+        extract_s = time.perf_counter() - start
+
+        if not text.strip():
+            self._send_json(422, {"file": name, "error": "No text extracted"})
+            return
+
+        result = self.predictor.submit(text).result()
+        result["file"] = name
+        result["timings"]["extract_s"] = round(extract_s, 6)
+        result["timings"]["total_s"] = round(time.perf_counter() - received, 6)
+        self._send_json(200, result)
+
+
+class _ExtractorShutdownMixin:
+    """Shut the request handler's extraction pool down with the server."""
+
+    def server_close(self):
+        super().server_close()
+        self.RequestHandlerClass.extractor.shutdown(wait=False, cancel_futures=True)
+
+
+class ClassifierHTTPServer(_ExtractorShutdownMixin, ThreadingHTTPServer):
+    pass
+
+
+class ThreadingUnixHTTPServer(_ExtractorShutdownMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket left behind by a previous run; refuse to delete anything that isn't a socket."""
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    os.unlink(socket_path)
+
+
+def make_server(classifier, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, max_batch=64, max_wait=0.01, extract_workers=None, extractor=None):
+    """Create (but don't start) an HTTP server bound to localhost or a Unix socket.
+
+    Text extraction runs on `extractor` (any concurrent.futures executor), by
+    default a pool of extract_workers processes (default: one per CPU). The
+    pool is shut down by server_close().
+
+    Raises FileExistsError if socket_path exists and is not a socket.
+    """
+    if socket_path:
+        _remove_stale_socket(socket_path)
+    if extractor is None:
+        extractor = ProcessPoolExecutor(max_workers=extract_workers)
+    handler = type("BoundClassifierRequestHandler", (ClassifierRequestHandler,), {"predictor": BatchPredictor(classifier, max_batch, max_wait), "extractor": extractor})
+    if socket_path:
+        return ThreadingUnixHTTPServer(str(socket_path), handler)
+    return ClassifierHTTPServer((host, port), handler)
+
+
+def serve(model_dir="src/model/models", host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+    classifier = pdf_classifier.load_classifier(model_dir)
+    if classifier is None:
+        return 1
+    try:
+        server = make_server(classifier, host, port, socket_path)
+    except FileExistsError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    print(f"[INFO] Classifier service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path:
+            _remove_stale_socket(socket_path)
+    return 0
@@ -0,0 +1,89 @@
+"""
+Feature backends for the PDF classifier
+-------------------------
+
+The default backend is sklearn's TfidfVectorizer, which has to count every
+distinct 1-3-gram in the corpus before keeping the top max_features. The
+"hashing" backend below hashes n-grams straight into a fixed number of
+columns and only learns an IDF vector, so it needs no vocabulary, its memory
+does not grow with the number of distinct n-grams, and documents can be
+vectorized in independent shards (optionally in parallel).
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+HASHING_PARAMS = {
+    "n_features": 2**18,
+    "stop_words": "english",
+    "ngram_range": (1, 3),
+}
+
+
+class HashingTfidfVectorizer:
+    """TF-IDF over hashed n-gram counts (stateless hashing + a learned IDF vector).
+
+    Mirrors TfidfVectorizer's defaults: smooth IDF, raw term counts and L2
+    row normalization, so it can be swapped in without changing the model.
+    """
+
+    def __init__(self, n_features=2**18, ngram_range=(1, 3), stop_words="english", n_jobs=1, shard_size=500):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.n_jobs = n_jobs
+        self.shard_size = shard_size
+        self.idf_ = None
+
+    def _hasher(self):
+        return HashingVectorizer(n_features=self.n_features, ngram_range=self.ngram_range, stop_words=self.stop_words, alternate_sign=False, norm=None, dtype=np.float32)
+
+    def _counts(self, texts):
+        texts = list(texts)
+        shards = [texts[i : i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        if not shards:
+            return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        hasher = self._hasher()
+        if self.n_jobs == 1 or len(shards) == 1:
+            parts = [hasher.transform(shard) for shard in shards]
+        else:
+            parts = Parallel(n_jobs=self.n_jobs)(delayed(hasher.transform)(shard) for shard in shards)
+        return sparse.vstack(parts, format="csr")
+
+    def _fit_idf(self, counts):
+        n_docs = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+
+    def _weight(self, counts):
+        return normalize(counts.multiply(self.idf_).tocsr(), norm="l2", copy=False)
+
+    def fit(self, texts):
+        self._fit_idf(self._counts(texts))
+        return self
+
+    def fit_transform(self, texts):
+        counts = self._counts(texts)
+        self._fit_idf(counts)
+        return self._weight(counts)
+
+    def transform(self, texts):
+        return self._weight(self._counts(texts))
+
+    def __getstate__(self):
+        # n_jobs is a property of the machine that trained the model, not of the model
+        state = self.__dict__.copy()
+        state["n_jobs"] = 1
+        return state
+
+
+def make_vectorizer(backend="tfidf", params=None, n_jobs=1):
+    """Create the feature vectorizer for a backend name ("tfidf" or "hashing")."""
+    if backend == "tfidf":
+        return TfidfVectorizer(**(params or {}))
+    if backend == "hashing":
+        return HashingTfidfVectorizer(**(params or HASHING_PARAMS), n_jobs=n_jobs)
+    raise ValueError(f"Unknown feature backend: {backend}")
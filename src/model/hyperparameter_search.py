@@ -0,0 +1,259 @@
+"""
+Hyperparameter search for the PDF classifier
+-------------------------
+
+Runs stratified k-fold cross-validation of XGBoost parameter sets on the
+training split. A fresh vectorizer is fit on each fold's training documents
+(fitting one on the whole split would leak the validation documents'
+vocabulary and IDF into every fold), and each fold is vectorized once for
+all trials. Trials run in n_jobs parallel processes (each booster gets
+cpu_count / n_jobs threads); every process builds each fold's DMatrix once
+and reuses it for all of its trials, which stop early once validation
+logloss stops improving.
+
+Strategies:
+    grid     every combination of the search space
+    random   n_trials random combinations
+    halving  successive halving: score n_trials random combinations with a
+             small boosting budget, keep the best 1/factor, multiply the
+             budget by factor, repeat
+
+The ranked trials are written to search_results.csv / .json in the output
+directory, and the best parameters are retrained with train_pdf_classifier
+to produce the usual model artifacts.
+
+Usage:
+    python src/model/hyperparameter_search.py --strategy halving --n-trials 27 --n-jobs 4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.model.features import HASHING_PARAMS, make_vectorizer
+from src.model.train_model import EARLY_STOPPING_ROUNDS, NUM_BOOST_ROUND, SPLIT_SEED, TEST_SIZE, VECTORIZER_PARAMS, XGB_PARAMS, load_labeled_data, train_pdf_classifier
+
+DEFAULT_SPACE = {
+    "eta": [0.03, 0.05, 0.1, 0.2],
+    "max_depth": [3, 4, 6, 8],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.5, 0.8, 1.0],
+    "min_child_weight": [1, 3, 5],
+    "alpha": [0.0, 1.0],
+    "lambda": [1.0, 5.0],
+}
+
+
+def grid_candidates(space):
+    """Every combination of the space's value lists, as a list of param dicts."""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_candidates(space, n_trials, seed=SPLIT_SEED):
+    """n_trials distinct random combinations (all of them if the grid is smaller)."""
+    grid = grid_candidates(space)
+    if n_trials >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, n_trials)
+
+
+def fold_data(X, y, folds, vectorizer_factory=None):
+    """(X_train, y_train, X_val, y_val) for each (train_idx, val_idx) fold.
+
+    X is a feature matrix sliced per fold, or, with vectorizer_factory, a
+    list of texts: a new vectorizer is then fit on the fold's training texts
+    only and used to transform its validation texts.
+    """
+    data = []
+    for train_idx, val_idx in folds:
+        if vectorizer_factory is None:
+            X_train, X_val = X[train_idx], X[val_idx]
+        else:
+            vectorizer = vectorizer_factory()
+            X_train = vectorizer.fit_transform([X[i] for i in train_idx]).tocsr()
+            X_val = vectorizer.transform([X[i] for i in val_idx]).tocsr()
+        data.append((X_train, y[train_idx], X_val, y[val_idx]))
+    return data
+
+
+def _run_trials(trials, data, num_boost_round, nthread):
+    """Cross-validate a chunk of (trial_id, params), building each fold's DMatrix pair once for the whole chunk."""
+    dmatrices = [(xgb.DMatrix(X_train, label=y_train, nthread=nthread), xgb.DMatrix(X_val, label=y_val, nthread=nthread), y_val) for X_train, y_train, X_val, y_val in data]
+    return [_run_trial(trial_id, params, dmatrices, num_boost_round, nthread) for trial_id, params in trials]
+
+
+def _run_trial(trial_id, params, dmatrices, num_boost_round, nthread):
+    """Cross-validate one param set; returns mean validation metrics over the folds."""
+    start = time.perf_counter()
+    losses, accuracies, rounds = [], [], []
+    for dtrain, dval, y_val in dmatrices:
+        booster = xgb.train({**params, "nthread": nthread}, dtrain, num_boost_round=num_boost_round, evals=[(dval, "eval")], early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+        prob = booster.predict(dval, iteration_range=(0, booster.best_iteration + 1))
+        losses.append(log_loss(y_val, prob, labels=[0, 1]))
+        accuracies.append(accuracy_score(y_val, (prob >= 0.5).astype(int)))
+        rounds.append(booster.best_iteration + 1)
+    return {
+        "trial": trial_id,
+        "logloss": float(np.mean(losses)),
+        "accuracy": float(np.mean(accuracies)),
+        "best_rounds": int(round(np.mean(rounds))),
+        "budget": num_boost_round,
+        "seconds": round(time.perf_counter() - start, 3),
+        "params": params,
+    }
+
+
+def _evaluate(candidates, y, data, num_boost_round, n_jobs, rung=0):
+    base = XGB_PARAMS.copy()
+    num_pos = int(y.sum())
+    base["scale_pos_weight"] = (len(y) - num_pos) / max(num_pos, 1)
+    nthread = max(1, (os.cpu_count() or 1) // n_jobs)
+    trials = [(trial_id, {**base, **params}) for trial_id, params in candidates]
+    # One chunk per process (round-robin), so DMatrix construction is paid n_jobs times per fold, not once per trial
+    chunks = [trials[i::n_jobs] for i in range(min(n_jobs, len(trials)))]
+    results = [r for chunk in Parallel(n_jobs=n_jobs)(delayed(_run_trials)(chunk, data, num_boost_round, nthread) for chunk in chunks) for r in chunk]
+    for r in results:
+        r["rung"] = rung
+    return sorted(results, key=lambda r: r["trial"])
+
+
+def run_search(X, y, space=None, strategy="random", n_trials=20, n_folds=5, n_jobs=1, num_boost_round=NUM_BOOST_ROUND, min_rounds=25, factor=3, seed=SPLIT_SEED, vectorizer_factory=None):
+    """Search XGBoost params on a feature matrix X (CSR) with 0/1 labels y.
+
+    With vectorizer_factory, X is a list of texts instead and each fold gets
+    its own vectorizer fit on its training texts (see fold_data).
+
+    Returns all trial results ranked best first (lowest mean logloss; for
+    successive halving, trials that reached later rungs rank first).
+    """
+    space = space or DEFAULT_SPACE
+    y = np.asarray(y)
+    # Never ask for more folds than the smallest class can fill
+    n_folds = min(n_folds, int(np.bincount(y).min()))
+    if n_folds < 2:
+        raise ValueError("Each class needs at least 2 training samples for cross-validation.")
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed).split(np.zeros(len(y)), y))
+
+    if strategy == "grid":
+        candidates = grid_candidates(space)
+    elif strategy in ("random", "halving"):
+        candidates = random_candidates(space, n_trials, seed)
+    else:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+    candidates = list(enumerate(candidates))
+    data = fold_data(X, y, folds, vectorizer_factory)
+
+    if strategy != "halving":
+        results = _evaluate(candidates, y, data, num_boost_round, n_jobs)
+        return sorted(results, key=lambda r: r["logloss"])
+
+    results = []
+    budget, rung = min(min_rounds, num_boost_round), 0
+    while True:
+        rung_results = sorted(_evaluate(candidates, y, data, budget, n_jobs, rung), key=lambda r: r["logloss"])
+        results.extend(rung_results)
+        if len(rung_results) <= 1 or budget >= num_boost_round:
+            break
+        keep = {r["trial"] for r in rung_results[: max(1, math.ceil(len(rung_results) / factor))]}
+        candidates = [(trial_id, params) for trial_id, params in candidates if trial_id in keep]
+        budget, rung = min(budget * factor, num_boost_round), rung + 1
+    return sorted(results, key=lambda r: (-r["rung"], r["logloss"]))
+
+
+def save_results(results, output_dir):
+    """Write the ranked trials to search_results.json and search_results.csv."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / "search_results.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    param_keys = sorted({k for r in results for k in r["params"]})
+    with open(output_dir / "search_results.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "trial", "rung", "budget", "logloss", "accuracy", "best_rounds", "seconds"] + param_keys)
+        for rank, r in enumerate(results, 1):
+            writer.writerow([rank, r["trial"], r["rung"], r["budget"], f"{r['logloss']:.5f}", f"{r['accuracy']:.4f}", r["best_rounds"], r["seconds"]] + [r["params"].get(k, "") for k in param_keys])
+
+
+def print_results(results, top=10):
+    print("\n=== Hyperparameter Search ===")
+    print(f"{'rank':>4} {'trial':>5} {'rung':>4} {'budget':>6} {'logloss':>8} {'acc':>6} {'rounds':>6}  params")
+    for rank, r in enumerate(results[:top], 1):
+        tuned = {k: v for k, v in r["params"].items() if k not in ("objective", "eval_metric", "scale_pos_weight")}
+        print(f"{rank:>4} {r['trial']:>5} {r['rung']:>4} {r['budget']:>6} {r['logloss']:>8.4f} {r['accuracy']:>6.2f} {r['best_rounds']:>6}  {tuned}")
+    print("=============================\n")
+
+
+# Search on the training split (vectorized per fold), then retrain the best params into output_dir.
+def search_pdf_classifier(texts, labels, output_dir="src/model/models", feature_backend="tfidf", space=None, strategy="random", n_trials=20, n_folds=5, n_jobs=1, feature_cache_dir=None):
+    if len(set(labels)) < 2:
+        print("[ERROR] Need at least two classes.")
+        return None
+
+    try:
+        # Same split as train_pdf_classifier, so the held-out test set never takes part in the search
+        X_train, _, y_train, _ = train_test_split(texts, labels, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=labels)
+    except ValueError as e:
+        print(f"[ERROR] train_test_split failed: {e}")
+        return None
+
+    y = LabelEncoder().fit_transform(y_train)
+    vectorizer_factory = partial(make_vectorizer, feature_backend, VECTORIZER_PARAMS if feature_backend == "tfidf" else HASHING_PARAMS, n_jobs=n_jobs)
+
+    try:
+        results = run_search(list(X_train), y, space, strategy, n_trials, n_folds, n_jobs, vectorizer_factory=vectorizer_factory)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return None
+
+    save_results(results, output_dir)
+    print_results(results)
+
+    best = results[0]
+    tuned = {k: v for k, v in best["params"].items() if k != "scale_pos_weight"}
+    train_result = train_pdf_classifier(texts, labels, output_dir, feature_cache_dir=feature_cache_dir, feature_backend=feature_backend, n_jobs=n_jobs, xgb_params=tuned)
+    if train_result is None:
+        return None
+    return {"best": best, "results": results, "accuracy": train_result["accuracy"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the XGBoost PDF classifier.")
+    parser.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory or corpus store.")
+    parser.add_argument("--labels", type=str, default="data/labels.json", help="Labels JSON file.")
+    parser.add_argument("--output-dir", type=str, default="src/model/models", help="Where to write search results and the best model.")
+    parser.add_argument("--strategy", choices=["grid", "random", "halving"], default="random", help="Search strategy.")
+    parser.add_argument("--n-trials", type=int, default=20, help="Parameter sets to try (random/halving).")
+    parser.add_argument("--folds", type=int, default=5, help="Stratified cross-validation folds.")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1, help="Trials to run in parallel.")
+    parser.add_argument("--space", type=str, default=None, help="JSON file mapping XGBoost params to lists of values.")
+    parser.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf", help="Feature backend.")
+    parser.add_argument("--feature-cache-dir", type=str, default="data/feature-cache", help="Feature cache for the final retrain ('' to disable).")
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space, "r", encoding="utf-8") as f:
+            space = json.load(f)
+
+    texts, labels, _ = load_labeled_data(args.data_dir, args.labels)
+    result = search_pdf_classifier(texts, labels, args.output_dir, args.features, space, args.strategy, args.n_trials, args.folds, args.n_jobs, args.feature_cache_dir or None)
+    if result is None:
+        sys.exit(1)
+    print(f"Best trial {result['best']['trial']} retrained. Test accuracy: {result['accuracy']:.2f}")
@@ -0,0 +1,183 @@
+"""
+Single-file model bundle for the PDF classifier
+-------------------------
+
+Stores only what inference needs in one uncompressed .npz file:
+
+    meta      JSON: format version, feature backend and its settings, class
+              labels, decision threshold
+    terms     vocabulary n-grams as UTF-8 bytes, in column order (tfidf only)
+    offsets   start offset of every term in `terms`, plus the end offset
+    idf       IDF weight per feature column
+    booster   XGBoost model in binary UBJSON form
+
+On older scikit-learn releases a pickled TfidfVectorizer also carries
+`stop_words_`, every n-gram pruned by max_features, which dwarfs the
+vocabulary that is actually used; the bundle never stores it. Loading rebuilds the vectorizer from the arrays without unpickling.
+
+Usage:
+    python src/model/model_bundle.py convert --model-dir src/model/models
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+BUNDLE_FILE = "pdf_classifier.bundle.npz"
+FORMAT_VERSION = 1
+
+# TfidfVectorizer settings that affect transform(); fit-only settings (max_features, min_df, ...) are dropped
+TFIDF_TRANSFORM_PARAMS = (
+    "analyzer",
+    "binary",
+    "decode_error",
+    "encoding",
+    "input",
+    "lowercase",
+    "ngram_range",
+    "norm",
+    "smooth_idf",
+    "stop_words",
+    "strip_accents",
+    "sublinear_tf",
+    "token_pattern",
+    "use_idf",
+)
+
+
+def _vectorizer_arrays(vectorizer):
+    """Return (backend, settings, terms, offsets, idf) for a fitted vectorizer."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.model.features import HashingTfidfVectorizer
+
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        settings = {"n_features": vectorizer.n_features, "ngram_range": list(vectorizer.ngram_range), "stop_words": vectorizer.stop_words}
+        return "hashing", settings, np.zeros(0, np.uint8), np.zeros(1, np.int64), np.asarray(vectorizer.idf_, np.float32)
+
+    if isinstance(vectorizer, TfidfVectorizer):
+        params = vectorizer.get_params()
+        if params["preprocessor"] is not None or params["tokenizer"] is not None or callable(params["analyzer"]):
+            raise ValueError("Vectorizers with custom callables can't be bundled.")
+        settings = {k: params[k] for k in TFIDF_TRANSFORM_PARAMS}
+        settings["ngram_range"] = list(settings["ngram_range"])
+        if not isinstance(settings["stop_words"], (str, type(None))):
+            settings["stop_words"] = sorted(settings["stop_words"])
+        settings["dtype"] = np.dtype(params["dtype"]).name
+
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        encoded = [t.encode("utf-8") for t in terms]
+        offsets = np.zeros(len(encoded) + 1, np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return "tfidf", settings, np.frombuffer(b"".join(encoded), np.uint8), offsets, np.asarray(vectorizer.idf_)
+
+    raise ValueError(f"Unsupported vectorizer type: {type(vectorizer).__name__}")
+
+
+def _rebuild_vectorizer(backend, settings, terms, offsets, idf):
+    if backend == "hashing":
+        from src.model.features import HashingTfidfVectorizer
+
+        vectorizer = HashingTfidfVectorizer(n_features=settings["n_features"], ngram_range=tuple(settings["ngram_range"]), stop_words=settings["stop_words"])
+        vectorizer.idf_ = idf
+        return vectorizer
+
+    if backend == "tfidf":
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        params = dict(settings)
+        params["ngram_range"] = tuple(params["ngram_range"])
+        params["dtype"] = np.dtype(params["dtype"]).type
+        vectorizer = TfidfVectorizer(**params)
+        raw = terms.tobytes()
+        bounds = offsets.tolist()
+        vectorizer.vocabulary_ = {raw[bounds[i] : bounds[i + 1]].decode("utf-8"): i for i in range(len(bounds) - 1)}
+        vectorizer.idf_ = idf.astype(params["dtype"])
+        return vectorizer
+
+    raise ValueError(f"Unknown feature backend in bundle: {backend}")
+
+
+def save_bundle(path, model, vectorizer, classes, threshold):
+    """Write booster, vectorizer and label classes to a single bundle file."""
+    backend, settings, terms, offsets, idf = _vectorizer_arrays(vectorizer)
+    meta = {"format_version": FORMAT_VERSION, "backend": backend, "vectorizer": settings, "classes": [str(c) for c in classes], "threshold": threshold}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8),
+            terms=terms,
+            offsets=offsets,
+            idf=idf,
+            booster=np.frombuffer(bytes(model.save_raw("ubj")), np.uint8),
+        )
+
+
+def load_bundle(path):
+    """Load a bundle into the classifier dict used by pdf_classifier (model, vectorizer, encoder, threshold)."""
+    import xgboost as xgb
+    from sklearn.preprocessing import LabelEncoder
+
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format version {meta.get('format_version')} (expected {FORMAT_VERSION})")
+        vectorizer = _rebuild_vectorizer(meta["backend"], meta["vectorizer"], data["terms"], data["offsets"], data["idf"])
+        model = xgb.Booster()
+        model.load_model(bytearray(data["booster"].tobytes()))
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.asarray(meta["classes"])
+    return {"model": model, "vectorizer": vectorizer, "encoder": encoder, "threshold": meta["threshold"]}
+
+
+def convert_artifacts(model_dir="src/model/models", output=None, threshold=None):
+    """Convert pdf_classifier.json + tfidf_vectorizer.pkl + label_encoder.pkl into a bundle; returns its path."""
+    import joblib
+    import xgboost as xgb
+    from src.model.pdf_classifier import CLASSIFICATION_THRESHOLD
+
+    model_dir = Path(model_dir)
+    model = xgb.Booster()
+    model.load_model(str(model_dir / "pdf_classifier.json"))
+    vectorizer = joblib.load(model_dir / "tfidf_vectorizer.pkl")
+    encoder = joblib.load(model_dir / "label_encoder.pkl")
+    output = Path(output) if output else model_dir / BUNDLE_FILE
+    save_bundle(output, model, vectorizer, encoder.classes_, CLASSIFICATION_THRESHOLD if threshold is None else threshold)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or inspect single-file classifier bundles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Convert existing model artifacts into a bundle.")
+    conv.add_argument("--model-dir", type=str, default="src/model/models", help="Directory with the booster, vectorizer and encoder.")
+    conv.add_argument("--output", type=str, default=None, help=f"Bundle path (default: <model-dir>/{BUNDLE_FILE}).")
+    conv.add_argument("--threshold", type=float, default=None, help="Decision threshold to store (default: CLASSIFICATION_THRESHOLD).")
+    info = sub.add_parser("info", help="Print a bundle's metadata.")
+    info.add_argument("bundle", type=str)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        model_dir = Path(args.model_dir)
+        missing = [n for n in ("pdf_classifier.json", "tfidf_vectorizer.pkl", "label_encoder.pkl") if not (model_dir / n).exists()]
+        if missing:
+            print(f"[ERROR] Missing {', '.join(missing)} in {model_dir}")
+            sys.exit(1)
+        output = convert_artifacts(model_dir, args.output, args.threshold)
+        print(f"Wrote {output} ({output.stat().st_size / 1e6:.2f} MB)")
+    else:
+        with np.load(args.bundle, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            meta["n_features"] = int(data["idf"].shape[0])
+        print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
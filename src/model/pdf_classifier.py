@@ -1,47 +1,112 @@
 import argparse
-import joblib
+import contextlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import xgboost as xgb
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parents[2]))
-from src.preprocessing.pdf_text_extraction import extract_text_from_pdf
+from src.preprocessing.pdf_text_extraction import PAGE_SEPARATOR, extract_text_from_pdf, extract_page_range
+from src.utils import profiling
 
+# Probability above which a PDF is labeled useful
+CLASSIFICATION_THRESHOLD = 0.70
 
-# Classify a single PDF as useful or not useful based on its text content.
-def classify_pdf(pdf_path, model_dir="src/model/models"):
-    model_path = Path(model_dir) / "pdf_classifier.json"
-    vectorizer_path = Path(model_dir) / "tfidf_vectorizer.pkl"
-    encoder_path = Path(model_dir) / "label_encoder.pkl"
+# Screening mode: page prefixes scored in turn (None = whole document), and how far
+# from the threshold a probability must be to stop without reading more pages
+SCREEN_STAGES = (3, 10, None)
+SCREEN_MARGIN = 0.2
+
+
+# Booster, vectorizer and label encoder files written by train_model.py
+ARTIFACT_FILES = ("pdf_classifier.json", "tfidf_vectorizer.pkl", "label_encoder.pkl")
+
+
+# True if model_dir has a model bundle or every separate artifact; only checks the files, nothing is loaded.
+def model_files_exist(model_dir="src/model/models"):
+    from src.model.model_bundle import BUNDLE_FILE
+
+    model_dir = Path(model_dir)
+    return (model_dir / BUNDLE_FILE).exists() or all((model_dir / name).exists() for name in ARTIFACT_FILES)
+
+
+# Load the booster, TF-IDF vectorizer and label encoder once so they can be reused across PDFs.
+# A single-file bundle (see model_bundle.py) is preferred over the separate artifacts.
+# xgboost, sklearn and joblib are imported here rather than at module load so the CLI starts fast.
+# nthread sets the booster's prediction threads once, here (default: all cores).
+def load_classifier(model_dir="src/model/models", nthread=None):
+    import joblib
+    import xgboost as xgb
+    from src.model.model_bundle import BUNDLE_FILE, load_bundle
 
-    if not model_path.exists() or not vectorizer_path.exists() or not encoder_path.exists():
+    bundle_path = Path(model_dir) / BUNDLE_FILE
+    if bundle_path.exists():
+        try:
+            classifier = load_bundle(bundle_path)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[ERROR] Could not load model bundle {bundle_path}: {e}")
+            return None
+        if nthread is not None:
+            classifier["model"].set_param({"nthread": nthread})
+        return classifier
+
+    model_path, vectorizer_path, encoder_path = (Path(model_dir) / name for name in ARTIFACT_FILES)
+
+    if not model_files_exist(model_dir):
         print(f"[ERROR] Missing model, encoder, or vectorizer in {model_dir}")
-        return
+        return None
 
-    # Load model, encoder, and TF-IDF vectorizer
     model = xgb.Booster()
     model.load_model(str(model_path))
-    vectorizer = joblib.load(vectorizer_path)
-    encoder = joblib.load(encoder_path)
+    if nthread is not None:
+        model.set_param({"nthread": nthread})
+    return {
+        "model": model,
+        "vectorizer": joblib.load(vectorizer_path),
+        "encoder": joblib.load(encoder_path),
+        "threshold": CLASSIFICATION_THRESHOLD,
+    }
+
+
+# Score a sparse feature matrix (CSR, one row per document) in one vectorized call and
+# return NumPy arrays (probabilities, labels). inplace_predict reads the CSR arrays
+# directly, so no DMatrix is built per call. The booster is shared (batch workers, the
+# classifier service), so nothing about it is changed here; see load_classifier's nthread.
+def predict_matrix(classifier, X):
+    import numpy as np
+
+    probs = classifier["model"].inplace_predict(X.tocsr())
+    # Index classes_ directly: LabelEncoder.inverse_transform's input checks cost more than a small prediction
+    classes = (probs >= classifier["threshold"]).astype(np.intp)
+    return probs, classifier["encoder"].classes_[classes]
+
+
+# Score a batch of texts and return (probabilities, labels).
+def predict_texts(classifier, texts):
+    return predict_matrix(classifier, classifier["vectorizer"].transform(texts))
+
+
+# Classify a single PDF as useful or not useful based on its text content.
+def classify_pdf(pdf_path, model_dir="src/model/models", nthread=None):
+    with profiling.stage("load_model"):
+        classifier = load_classifier(model_dir, nthread)
+    if classifier is None:
+        return
 
     # Extract text from PDF
-    text = extract_text_from_pdf(pdf_path)
+    with profiling.stage(f"extract-{Path(pdf_path).stem}"):
+        text = extract_text_from_pdf(pdf_path)
     if not text.strip():
         print(f"[ERROR] No text extracted from {pdf_path}. Skipping classification.")
         return
 
-    # Transform text into vectorized TF-IDF format
-    X_vec = vectorizer.transform([text])
+    with profiling.stage("predict"):
+        probs, pred_labels = predict_texts(classifier, [text])
+    pred_prob = probs[0]
+    pred_label = pred_labels[0]
 
-    # Wrap in DMatrix for XGBoost prediction
-    dtest = xgb.DMatrix(X_vec)
-    pred_prob = model.predict(dtest)[0]
-    pred_class = 1 if pred_prob >= 0.70 else 0
-
-    # Convert numeric class back into original label name
-    pred_label = encoder.inverse_transform([pred_class])[0]
-
-    if pred_class == 0:
+    if pred_prob < classifier["threshold"]:
         confidence = 1 - pred_prob
     else:
         confidence = pred_prob
@@ -52,10 +117,221 @@ def classify_pdf(pdf_path, model_dir="src/model/models"):
     print("=================================\n")
 
 
-if __name__ == "__main__":
+def _extract_timed(pdf_path):
+    start = time.perf_counter()
+    # Keep extraction progress messages out of the JSONL stream on stdout
+    with contextlib.redirect_stdout(sys.stderr), profiling.stage(f"extract-{Path(pdf_path).stem}"):
+        text = extract_text_from_pdf(str(pdf_path))
+    return text, time.perf_counter() - start
+
+
+def _extracted_texts(pdf_paths, workers):
+    """Yield (path, text, seconds) with extraction spread over a process pool."""
+    if workers <= 1:
+        for pdf_path in pdf_paths:
+            yield (pdf_path, *_extract_timed(pdf_path))
+        return
+    pending = iter(pdf_paths)
+    with ProcessPoolExecutor(max_workers=workers, initializer=profiling.init_worker, initargs=(profiling.output_dir(),)) as pool:
+        # Bound the number of queued documents so extracted text doesn't pile up in memory
+        in_flight = {pool.submit(_extract_timed, p): p for _, p in zip(range(2 * workers), pending)}
+        while in_flight:
+            future = next(as_completed(in_flight))
+            pdf_path = in_flight.pop(future)
+            nxt = next(pending, None)
+            if nxt is not None:
+                in_flight[pool.submit(_extract_timed, nxt)] = nxt
+            yield (pdf_path, *future.result())
+
+
+# Classify many PDFs with a single model load, yielding one result dict per PDF.
+def classify_pdfs(pdf_paths, model_dir="src/model/models", workers=1, batch_size=256, nthread=None):
+    with profiling.stage("load_model"):
+        classifier = load_classifier(model_dir, nthread)
+    if classifier is None:
+        return
+
+    def score(batch):
+        start = time.perf_counter()
+        with profiling.stage("predict-batch"):
+            probs, pred_labels = predict_texts(classifier, [text for _, text, _ in batch])
+        # Vectorizing and predicting is done per batch, so report the amortized share
+        per_doc = (time.perf_counter() - start) / len(batch)
+        for (pdf_path, _, extract_s), prob, label in zip(batch, probs, pred_labels):
+            yield {
+                "file": str(pdf_path),
+                "label": str(label),
+                "probability": round(float(prob), 6),
+                "threshold": classifier["threshold"],
+                "timings": {"extract_s": round(extract_s, 4), "predict_s": round(per_doc, 6)},
+            }
+
+    batch = []
+    for pdf_path, text, extract_s in _extracted_texts(pdf_paths, workers):
+        if not text.strip():
+            yield {"file": str(pdf_path), "error": "No text extracted", "timings": {"extract_s": round(extract_s, 4)}}
+            continue
+        batch.append((pdf_path, text, extract_s))
+        if len(batch) >= batch_size:
+            yield from score(batch)
+            batch = []
+    if batch:
+        yield from score(batch)
+
+
+# Classify a PDF from a page prefix, reading more pages only while the score is ambiguous.
+def screen_pdf(pdf_path, classifier, stages=SCREEN_STAGES, margin=SCREEN_MARGIN):
+    with profiling.stage(f"screen-{Path(pdf_path).stem}"):
+        return _screen_pdf(pdf_path, classifier, stages, margin)
+
+
+def _screen_pdf(pdf_path, classifier, stages, margin):
+    start_time = time.perf_counter()
+    texts, start, page_count = [], 0, None
+    result = None
+    for stage, stop in enumerate(stages):
+        pages, page_count = extract_page_range(str(pdf_path), start, stop)
+        texts.extend(pages)
+        start = page_count if stop is None else min(stop, page_count)
+        text = PAGE_SEPARATOR.join(texts)
+        if not text.strip():
+            # Likely a failed extraction or a blank prefix; only more pages can help
+            if start >= page_count:
+                break
+            continue
+        probs, pred_labels = predict_texts(classifier, [text])
+        prob, label = float(probs[0]), str(pred_labels[0])
+        decided = abs(prob - classifier["threshold"]) >= margin
+        result = {
+            "file": str(pdf_path),
+            "label": label,
+            "probability": round(prob, 6),
+            "threshold": classifier["threshold"],
+            "pages_used": start,
+            "page_count": page_count,
+            "escalations": stage,
+            "decided_early": decided and start < page_count,
+            "timings": {"total_s": round(time.perf_counter() - start_time, 4)},
+        }
+        if decided or start >= page_count:
+            return result
+    if result is not None:
+        # The stages ran out (e.g. "3,10") while the score was still ambiguous: keep the last score
+        return result
+    return {"file": str(pdf_path), "error": "No text extracted", "timings": {"total_s": round(time.perf_counter() - start_time, 4)}}
+
+
+_screen_classifier = None
+
+
+def _init_screen_worker(model_dir, profile_dir=None):
+    global _screen_classifier
+    profiling.init_worker(profile_dir)
+    _screen_classifier = load_classifier(model_dir)
+
+
+def _screen_in_worker(pdf_path, stages, margin):
+    if _screen_classifier is None:
+        raise RuntimeError("Could not load the classifier in a screening worker")
+    with contextlib.redirect_stdout(sys.stderr):
+        return screen_pdf(pdf_path, _screen_classifier, stages, margin)
+
+
+# Screen many PDFs, yielding one result dict per PDF (in completion order when workers > 1).
+def screen_pdfs(pdf_paths, model_dir="src/model/models", workers=1, stages=SCREEN_STAGES, margin=SCREEN_MARGIN):
+    if workers <= 1:
+        classifier = load_classifier(model_dir)
+        if classifier is None:
+            return
+        for pdf_path in pdf_paths:
+            with contextlib.redirect_stdout(sys.stderr):
+                record = screen_pdf(pdf_path, classifier, stages, margin)
+            yield record
+        return
+    # Each worker loads its own copy, so the parent only checks the files are there
+    if not model_files_exist(model_dir):
+        print(f"[ERROR] Missing model, encoder, or vectorizer in {model_dir}")
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_screen_worker, initargs=(model_dir, profiling.output_dir())) as pool:
+        futures = [pool.submit(_screen_in_worker, p, stages, margin) for p in pdf_paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _parse_stages(value):
+    return tuple(None if part.strip().lower() in {"all", "none"} else int(part) for part in value.split(","))
+
+
+# Collect PDF paths from a folder and/or a text file listing one path per line.
+def collect_pdf_paths(input_dir=None, file_list=None):
+    paths = []
+    if input_dir:
+        paths.extend(sorted(Path(input_dir).glob("*.pdf")))
+    if file_list:
+        with open(file_list, "r", encoding="utf-8") as f:
+            paths.extend(Path(line.strip()) for line in f if line.strip())
+    return paths
+
+
+def main():
     parser = argparse.ArgumentParser(description="Classify a PDF as useful or not useful.")
     parser.add_argument("--pdf-path", type=str, help="Path to the PDF file to classify.")
+    parser.add_argument("--input-dir", type=str, help="Classify every PDF in this folder (batch mode).")
+    parser.add_argument("--file-list", type=str, help="Classify PDFs listed one per line in this file (batch mode).")
+    parser.add_argument("--output", type=str, help="Batch mode: write JSONL results here instead of stdout.")
+    parser.add_argument("--workers", type=int, default=1, help="Batch mode: number of extraction processes.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Batch mode: PDFs vectorized and scored together.")
+    parser.add_argument("--threads", type=int, default=None, help="XGBoost prediction threads (default: all cores).")
+    parser.add_argument("--screen", action="store_true", help="Score a page prefix first and only read more pages when the result is ambiguous.")
+    parser.add_argument("--screen-stages", type=_parse_stages, default=SCREEN_STAGES, help="Screen mode: comma-separated page counts to try, e.g. '3,10,all'.")
+    parser.add_argument("--screen-margin", type=float, default=SCREEN_MARGIN, help="Screen mode: stop once |probability - threshold| >= margin.")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived classification service (see classifier_service.py).")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Service mode: address to bind.")
+    parser.add_argument("--port", type=int, default=8765, help="Service mode: TCP port to listen on.")
+    parser.add_argument("--socket", type=str, help="Service mode: listen on this Unix socket path instead of TCP.")
     parser.add_argument("--model_dir", type=str, default="src/model/models", help="Directory containing the trained model and TF-IDF vectorizer.")
+    parser.add_argument("--profile", type=str, default=None, metavar="DIR", help="Write CPU/memory profiles per stage/document and a hot-spot summary to DIR.")
     args = parser.parse_args()
 
-    classify_pdf(args.pdf_path, args.model_dir)
+    if args.serve:
+        from src.model.classifier_service import serve
+
+        sys.exit(serve(args.model_dir, args.host, args.port, args.socket))
+
+    if args.profile:
+        profiling.enable(args.profile)
+    try:
+        _run(args)
+    finally:
+        if args.profile:
+            print(f"[INFO] Profile summary written to {profiling.write_summary()}", file=sys.stderr)
+
+
+def _run(args):
+    if not (args.input_dir or args.file_list or args.screen):
+        # Fail before loading the model when there is nothing to classify
+        if not args.pdf_path or not Path(args.pdf_path).exists():
+            print(f"[ERROR] File not found: {args.pdf_path}")
+            sys.exit(1)
+        classify_pdf(args.pdf_path, args.model_dir, nthread=args.threads)
+        return
+
+    pdf_paths = collect_pdf_paths(args.input_dir, args.file_list)
+    if args.pdf_path:
+        pdf_paths.append(Path(args.pdf_path))
+    if args.screen:
+        records = screen_pdfs(pdf_paths, args.model_dir, workers=args.workers, stages=args.screen_stages, margin=args.screen_margin)
+    else:
+        records = classify_pdfs(pdf_paths, args.model_dir, workers=args.workers, batch_size=args.batch_size, nthread=args.threads)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
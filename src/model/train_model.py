@@ -8,16 +8,50 @@ to determine whether a PDF is useful for predator diet data analysis.
 
 from pathlib import Path
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
 
 import xgboost as xgb
+import sklearn
+import argparse
+import hashlib
 import joblib
 import json
+import shutil
 import sys
 from collections import Counter
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.corpus_store import CorpusStore, is_corpus_store
+from src.preprocessing.near_duplicates import DEFAULT_INDEX_PATH, DEFAULT_THRESHOLD, collapse_duplicates, update_index
+from src.model.features import HASHING_PARAMS, make_vectorizer
+from src.model.model_bundle import BUNDLE_FILE, save_bundle
+from src.model.pdf_classifier import CLASSIFICATION_THRESHOLD
+from src.utils import profiling
+
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+VECTORIZER_PARAMS = {
+    "max_features": 10000,
+    "stop_words": "english",
+    "ngram_range": (1, 3),
+}
+
+# XGBoost parameters (scale_pos_weight is added per dataset)
+XGB_PARAMS = {
+    "objective": "binary:logistic",  # binary classification
+    "eval_metric": "logloss",  # log loss metric
+    "eta": 0.05,  # learning rate
+    "max_depth": 6,
+    "subsample": 0.8,  # use 80% of data per boosting round
+    "alpha": 1.0,  # L1 regularization
+    "lambda": 1.0,  # L2 regularization
+}
+NUM_BOOST_ROUND = 500
+EARLY_STOPPING_ROUNDS = 20
+# Feature cache entries kept (most recently used first); each holds a fitted vectorizer and two DMatrix files
+FEATURE_CACHE_ENTRIES = 3
+
 
 # Load training texts and their labels
 def load_labeled_data(data_dir="data/processed-text", labels_file="data/labels.json"):
@@ -27,8 +61,21 @@ def load_labeled_data(data_dir="data/processed-text", labels_file="data/labels.j
     with open(labels_file, "r", encoding="utf-8") as f:
         labels_map = json.load(f)
 
-    # Iterate through processed text files
     texts, labels, filenames = [], [], []
+
+    # Sharded corpus store: one sequential scan instead of a file open per document
+    if is_corpus_store(data_dir):
+        with CorpusStore(data_dir) as store:
+            for fname, text in store.iter_documents():
+                if fname in labels_map:
+                    texts.append(text)
+                    labels.append(labels_map[fname])
+                    filenames.append(fname)
+                else:
+                    print(f"[WARN] No label found for {fname}, skipping.")
+        return texts, labels, filenames
+
+    # Iterate through processed text files
     for txt_file in data_dir.glob("*.txt"):
         fname = txt_file.name
         if fname in labels_map:
@@ -42,8 +89,72 @@ def load_labeled_data(data_dir="data/processed-text", labels_file="data/labels.j
     return texts, labels, filenames
 
 
-# Train an XGBoost text classifier with TF-IDF features.
-def train_pdf_classifier(texts, labels, output_dir="src/model/models"):
+# Cache key for the feature matrices: corpus content, split and vectorizer settings, library versions.
+def feature_cache_key(X_train, X_test, y_train, y_test, vectorizer_params=VECTORIZER_PARAMS, backend="tfidf"):
+    h = hashlib.sha256()
+    for split, texts, ys in (("train", X_train, y_train), ("test", X_test, y_test)):
+        h.update(split.encode("utf-8"))
+        for text, y in zip(texts, ys):
+            h.update(hashlib.sha256(text.encode("utf-8")).digest())
+            h.update(str(int(y)).encode("utf-8"))
+    settings = {"backend": backend, "vectorizer": vectorizer_params, "test_size": TEST_SIZE, "seed": SPLIT_SEED, "sklearn": sklearn.__version__, "xgboost": xgb.__version__}
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Delete all but the `keep` most recently used feature cache entries (by the mtime of their "complete" marker).
+def prune_feature_cache(cache_dir, keep=FEATURE_CACHE_ENTRIES):
+    def last_used(entry):
+        marker = entry / "complete"
+        return marker.stat().st_mtime if marker.exists() else entry.stat().st_mtime
+
+    # Only touch directories named like a cache key, in case cache_dir points somewhere shared
+    entries = [p for p in Path(cache_dir).iterdir() if p.is_dir() and len(p.name) == 64 and all(c in "0123456789abcdef" for c in p.name)]
+    for entry in sorted(entries, key=last_used, reverse=True)[keep:]:
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+# Fit the feature vectorizer and build DMatrix objects, reusing a cached copy when the inputs are unchanged.
+def build_features(X_train, X_test, y_train, y_test, cache_dir=None, backend="tfidf", n_jobs=1, cache_entries=FEATURE_CACHE_ENTRIES):
+    vectorizer_params = VECTORIZER_PARAMS if backend == "tfidf" else HASHING_PARAMS
+    entry = None
+    if cache_dir is not None:
+        entry = Path(cache_dir) / feature_cache_key(X_train, X_test, y_train, y_test, vectorizer_params, backend)
+        if (entry / "complete").exists():
+            print(f"[INFO] Using cached features from {entry}")
+            vectorizer = joblib.load(entry / "vectorizer.pkl")
+            dtrain = xgb.DMatrix(str(entry / "train.dmatrix"))
+            dtest = xgb.DMatrix(str(entry / "test.dmatrix"))
+            # Mark the entry as recently used so pruning keeps it
+            (entry / "complete").touch()
+            return vectorizer, dtrain, dtest
+
+    # Build TF-IDF (or hashed TF-IDF) vectorizer for extracting text features
+    vectorizer = make_vectorizer(backend, vectorizer_params, n_jobs=n_jobs)
+
+    # Fit TF-IDF transformer on training data and apply to test data
+    X_train_vec = vectorizer.fit_transform(X_train)
+    X_test_vec = vectorizer.transform(X_test)
+
+    # Convert to DMatrix for XGBoost
+    dtrain = xgb.DMatrix(X_train_vec, label=y_train)
+    dtest = xgb.DMatrix(X_test_vec, label=y_test)
+
+    if entry is not None:
+        entry.mkdir(parents=True, exist_ok=True)
+        joblib.dump(vectorizer, entry / "vectorizer.pkl")
+        dtrain.save_binary(str(entry / "train.dmatrix"))
+        dtest.save_binary(str(entry / "test.dmatrix"))
+        # Written last so a partially written entry is never used
+        (entry / "complete").touch()
+        prune_feature_cache(cache_dir, cache_entries)
+
+    return vectorizer, dtrain, dtest
+
+
+# Train an XGBoost text classifier with TF-IDF features ("tfidf") or hashed TF-IDF features ("hashing").
+# xgb_params overrides entries of XGB_PARAMS (e.g. the best trial of hyperparameter_search.py).
+def train_pdf_classifier(texts, labels, output_dir="src/model/models", feature_cache_dir=None, feature_backend="tfidf", n_jobs=1, xgb_params=None, num_boost_round=NUM_BOOST_ROUND):
 
     # Ensure dataset is not empty
     if not texts or not labels:
@@ -62,7 +173,7 @@ def train_pdf_classifier(texts, labels, output_dir="src/model/models"):
 
     try:
         # Stratified splitter ensures class balance in train/test sets
-        X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=0.2, random_state=42, stratify=labels)
+        X_train, X_test, y_train, y_test = train_test_split(texts, labels, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=labels)
     except ValueError as e:
         print(f"[ERROR] train_test_split failed: {e}")
         return None
@@ -77,35 +188,18 @@ def train_pdf_classifier(texts, labels, output_dir="src/model/models"):
     num_neg = len(y_train) - num_pos
     scale_pos_weight = num_neg / max(num_pos, 1)
 
-    # Build TF-IDF vectorizer for extracting text features
-    vectorizer = TfidfVectorizer(
-        max_features=10000,
-        stop_words="english",
-        ngram_range=(1, 3),
-    )
-
-    # Fit TF-IDF transformer on training data and apply to test data
-    X_train_vec = vectorizer.fit_transform(X_train)
-    X_test_vec = vectorizer.transform(X_test)
-
-    # Convert to DMatrix for XGBoost
-    dtrain = xgb.DMatrix(X_train_vec, label=y_train)
-    dtest = xgb.DMatrix(X_test_vec, label=y_test)
+    # Build (or reuse cached) TF-IDF features and DMatrix objects
+    with profiling.stage("features"):
+        vectorizer, dtrain, dtest = build_features(X_train, X_test, y_train, y_test, cache_dir=feature_cache_dir, backend=feature_backend, n_jobs=n_jobs)
 
     # XGBoost parameters
-    params = {
-        "objective": "binary:logistic",  # binary classification
-        "eval_metric": "logloss",  # log loss metric
-        "eta": 0.05,  # learning rate
-        "max_depth": 6,
-        "subsample": 0.8,  # use 80% of data per boosting round
-        "alpha": 1.0,  # L1 regularization
-        "lambda": 1.0,  # L2 regularization
-        "scale_pos_weight": scale_pos_weight,
-    }
+    params = {**XGB_PARAMS, "scale_pos_weight": scale_pos_weight, **(xgb_params or {})}
 
     # Train the model
-    model = xgb.train(params, dtrain, num_boost_round=500, evals=[(dtrain, "train"), (dtest, "eval")], early_stopping_rounds=20, verbose_eval=True)  # stop if no improvement for 20 rounds
+    with profiling.stage("boost"):
+        model = xgb.train(
+            params, dtrain, num_boost_round=num_boost_round, evals=[(dtrain, "train"), (dtest, "eval")], early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=True
+        )  # stop if no improvement for 20 rounds
 
     # Predict on test set and convert probabilities to labels
     y_pred_prob = model.predict(dtest)
@@ -123,13 +217,39 @@ def train_pdf_classifier(texts, labels, output_dir="src/model/models"):
     model.save_model(str(Path(output_dir) / "pdf_classifier.json"))
     joblib.dump(vectorizer, Path(output_dir) / "tfidf_vectorizer.pkl")
     joblib.dump(enc, Path(output_dir) / "label_encoder.pkl")
+    save_bundle(Path(output_dir) / BUNDLE_FILE, model, vectorizer, enc.classes_, CLASSIFICATION_THRESHOLD)
 
     return {"accuracy": acc}
 
 
 if __name__ == "__main__":
-    texts, labels, _ = load_labeled_data()
-    result = train_pdf_classifier(texts, labels, "src/model/models")
+    parser = argparse.ArgumentParser(description="Train the TF-IDF + XGBoost PDF classifier.")
+    parser.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory or corpus store.")
+    parser.add_argument("--labels", type=str, default="data/labels.json", help="Labels JSON file.")
+    parser.add_argument("--output-dir", type=str, default="src/model/models", help="Where to write model artifacts.")
+    parser.add_argument("--features", choices=["tfidf", "hashing"], default="tfidf", help="Feature backend: vocabulary TF-IDF or hashed TF-IDF.")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Hashing backend: vectorize document shards in parallel.")
+    parser.add_argument(
+        "--feature-cache-dir", type=str, default="data/feature-cache", help=f"Cache of fitted vectorizers and feature matrices, keeping the {FEATURE_CACHE_ENTRIES} most recently used ('' to disable)."
+    )
+    parser.add_argument("--profile", type=str, default=None, metavar="DIR", help="Write CPU/memory profiles per training stage and a hot-spot summary to DIR.")
+    parser.add_argument("--dedup", action="store_true", help="Keep one document per near-duplicate cluster before the train/test split.")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD, help="Estimated Jaccard similarity at which documents count as near-duplicates.")
+    parser.add_argument("--dedup-index", type=str, default=DEFAULT_INDEX_PATH, help="Incrementally updated MinHash index used by --dedup ('' to disable).")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.enable(args.profile)
+    with profiling.stage("load_data"):
+        texts, labels, filenames = load_labeled_data(args.data_dir, args.labels)
+    if args.dedup:
+        with profiling.stage("dedup"):
+            clusters = update_index(zip(filenames, texts), args.dedup_index or None).clusters(args.dedup_threshold)
+            texts, labels, filenames, dropped = collapse_duplicates(texts, labels, filenames, clusters)
+        print(f"[INFO] Dropped {len(dropped)} near-duplicate documents ({len(clusters)} clusters)")
+    result = train_pdf_classifier(texts, labels, args.output_dir, feature_cache_dir=args.feature_cache_dir or None, feature_backend=args.features, n_jobs=args.n_jobs)
+    if args.profile:
+        print(f"[INFO] Profile summary written to {profiling.write_summary()}")
     if result is None:
         sys.exit(1)
     print(f"Model trained successfully! Accuracy: {result['accuracy']:.2f}")
@@ -0,0 +1,210 @@
+"""Keyword index and query CLI over the processed text corpus.
+
+An SQLite FTS5 full-text index of data/processed-text (or a corpus store),
+joined with labels.json, so corpus audits like "which documents mention
+'stomach contents' and 'empty' but are labeled not useful?" take
+milliseconds instead of a grep over every text file:
+
+    python src/preprocessing/corpus_index.py build
+    python src/preprocessing/corpus_index.py query '"stomach contents" AND empty' --label not-useful
+
+Queries use FTS5 syntax: terms are ANDed by default; AND, OR, NOT and
+parentheses combine them, "double quotes" make a phrase, NEAR(a b, 10) finds
+terms close together and diet* matches a prefix. Matching ignores case and
+diacritics; hyphenated words need quotes ("non-empty").
+
+Builds are incremental: only files whose size or modification time changed
+are re-indexed, and removed files are dropped. Labels are reloaded whenever
+labels.json changes.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.corpus_store import CorpusStore, is_corpus_store
+
+DEFAULT_DB_PATH = "data/corpus-index.sqlite"
+SCHEMA_VERSION = "1"
+SNIPPET_TOKENS = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, doc_id INTEGER NOT NULL, version TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (name TEXT PRIMARY KEY, label TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(name UNINDEXED, body, tokenize = 'unicode61 remove_diacritics 2');
+"""
+
+
+def _iter_sources(data_dir) -> Iterator[Tuple[str, str, Callable[[], str]]]:
+    """Yield (name, version, load text) for every document in a text directory or corpus store."""
+    if is_corpus_store(data_dir):
+        with CorpusStore(data_dir) as store:
+            for name, loc in sorted(store.index.items(), key=lambda item: item[1]):
+                yield name, "store:{}:{}:{}".format(*loc), lambda name=name: store.get(name)
+        return
+    for txt_file in sorted(Path(data_dir).glob("*.txt")):
+        st = txt_file.stat()
+        yield txt_file.name, f"{st.st_size}:{st.st_mtime_ns}", lambda txt_file=txt_file: txt_file.read_text(encoding="utf-8")
+
+
+class CorpusIndex:
+    """FTS5 index of document texts plus their labels."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+        version = self._meta("schema_version")
+        if version is None:
+            self._set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+        elif version != SCHEMA_VERSION:
+            raise ValueError(f"{self.db_path} has index schema {version}, expected {SCHEMA_VERSION}; delete it and rebuild")
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def update(self, data_dir) -> Dict[str, int]:
+        """Bring the index up to date with data_dir; returns added/updated/removed/unchanged counts."""
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = dict(self.conn.execute("SELECT name, version FROM files"))
+        with self.conn:
+            for name, version, load in _iter_sources(data_dir):
+                previous = known.pop(name, None)
+                if previous == version:
+                    counts["unchanged"] += 1
+                    continue
+                if previous is not None:
+                    self._delete(name)
+                cur = self.conn.execute("INSERT INTO docs (name, body) VALUES (?, ?)", (name, load()))
+                self.conn.execute("INSERT INTO files (name, doc_id, version) VALUES (?, ?, ?)", (name, cur.lastrowid, version))
+                counts["updated" if previous is not None else "added"] += 1
+            for name in known:
+                self._delete(name)
+                counts["removed"] += 1
+        return counts
+
+    def _delete(self, name: str):
+        self.conn.execute("DELETE FROM docs WHERE rowid = (SELECT doc_id FROM files WHERE name = ?)", (name,))
+        self.conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def sync_labels(self, labels_file) -> bool:
+        """Reload labels.json if it changed since the last sync; returns True if it was reloaded."""
+        labels_file = Path(labels_file)
+        if not labels_file.exists():
+            return False
+        st = labels_file.stat()
+        version = f"{labels_file.resolve()}:{st.st_size}:{st.st_mtime_ns}"
+        if self._meta("labels_version") == version:
+            return False
+        with labels_file.open("r", encoding="utf-8") as f:
+            labels = json.load(f)
+        with self.conn:
+            self.conn.execute("DELETE FROM labels")
+            self.conn.executemany("INSERT INTO labels (name, label) VALUES (?, ?)", labels.items())
+            self._set_meta("labels_version", version)
+        return True
+
+    def search(self, query: str, label: Optional[str] = None, limit: Optional[int] = 20) -> List[Dict]:
+        """Documents matching an FTS5 query, best first, with label and a snippet.
+
+        Raises sqlite3.OperationalError for malformed queries.
+        """
+        sql = "SELECT docs.name, labels.label, bm25(docs) AS score, snippet(docs, 1, '[', ']', ' … ', ?) FROM docs LEFT JOIN labels ON labels.name = docs.name WHERE docs MATCH ?"
+        params: list = [SNIPPET_TOKENS, query]
+        if label is not None:
+            sql += " AND labels.label = ?"
+            params.append(label)
+        sql += " ORDER BY score"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [{"name": name, "label": doc_label, "score": round(-score, 4), "snippet": " ".join(snippet.split())} for name, doc_label, score, snippet in self.conn.execute(sql, params)]
+
+    def count(self, query: str, label: Optional[str] = None) -> Dict[Optional[str], int]:
+        """Number of matching documents per label (None for unlabeled documents)."""
+        sql = "SELECT labels.label, COUNT(*) FROM docs LEFT JOIN labels ON labels.name = docs.name WHERE docs MATCH ?"
+        params = [query]
+        if label is not None:
+            sql += " AND labels.label = ?"
+            params.append(label)
+        return dict(self.conn.execute(sql + " GROUP BY labels.label", params).fetchall())
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text index and boolean/phrase queries over the processed text corpus.")
+    parser.add_argument("--db", type=str, default=DEFAULT_DB_PATH, help="Index database.")
+    parser.add_argument("--labels", type=str, default="data/labels.json", help="Labels JSON file joined with the results.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index new or changed documents and drop removed ones.")
+    build.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory or corpus store.")
+    query = sub.add_parser("query", help="Search the index (FTS5 syntax, e.g. '\"stomach contents\" AND empty').")
+    query.add_argument("query", type=str)
+    query.add_argument("--label", type=str, default=None, help="Only documents with this label (e.g. not-useful).")
+    query.add_argument("--limit", type=int, default=20, help="Maximum number of hits to print (0 for all).")
+    query.add_argument("--count", action="store_true", help="Only print the number of matching documents per label.")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not Path(args.data_dir).exists():
+            print(f"[ERROR] Data directory not found: {args.data_dir}")
+            sys.exit(1)
+        start = time.perf_counter()
+        with CorpusIndex(args.db) as index:
+            counts = index.update(args.data_dir)
+            index.sync_labels(args.labels)
+            print(f"[INFO] {len(index)} documents indexed in {args.db} ({', '.join(f'{v} {k}' for k, v in counts.items())}) in {time.perf_counter() - start:.1f}s")
+        return
+
+    if not Path(args.db).exists():
+        print(f"[ERROR] Index not found: {args.db} (run the build command first)")
+        sys.exit(1)
+    with CorpusIndex(args.db) as index:
+        index.sync_labels(args.labels)
+        start = time.perf_counter()
+        try:
+            if args.count:
+                counts = index.count(args.query, args.label)
+            else:
+                hits = index.search(args.query, args.label, args.limit or None)
+        except sqlite3.OperationalError as e:
+            print(f"[ERROR] Invalid query {args.query!r}: {e}")
+            sys.exit(1)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    if args.count:
+        for label, n in sorted(counts.items(), key=lambda item: str(item[0])):
+            print(f"{label or '(unlabeled)':<15} {n}")
+        print(f"[INFO] {sum(counts.values())} matching documents ({elapsed_ms:.1f} ms)")
+        return
+    for hit in hits:
+        print(f"{hit['name']}  [{hit['label'] or 'unlabeled'}]  score {hit['score']:.2f}")
+        print(f"    {hit['snippet']}")
+    print(f"[INFO] {len(hits)} hits ({elapsed_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Compact sharded store for extracted document text.
+
+Replaces a directory of loose .txt files with a few append-only shard files
+plus an offset index:
+
+    corpus/
+        index.jsonl          one {"name", "shard", "offset", "length"} record per write
+        shard-00000.bin      zlib-compressed document texts, back to back
+        shard-00001.bin
+        ...
+
+Documents are looked up by name (e.g. "Adams_1989.txt") through the index and
+read with a single seek. Re-adding a name appends a new copy and the newest
+index record wins. Shards roll over once they pass max_shard_bytes.
+
+Usage:
+    python src/preprocessing/corpus_store.py import data/processed-text data/corpus
+    python src/preprocessing/corpus_store.py export data/corpus data/processed-text
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+INDEX_FILE = "index.jsonl"
+DEFAULT_MAX_SHARD_BYTES = 256 * 1024 * 1024
+
+
+def is_corpus_store(path) -> bool:
+    return (Path(path) / INDEX_FILE).exists()
+
+
+def _fsync(path: Path):
+    with path.open("rb") as f:
+        os.fsync(f.fileno())
+
+
+class CorpusStore:
+    """Append-only, zlib-compressed shards of documents with a name -> offset index."""
+
+    def __init__(self, path, max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES, compression_level: int = 6):
+        self.path = Path(path)
+        self.max_shard_bytes = max_shard_bytes
+        self.compression_level = compression_level
+        self.index: Dict[str, Tuple[int, int, int]] = {}
+        self._handles = {}
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        index_path = self.path / INDEX_FILE
+        if not index_path.exists():
+            return
+        with index_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write; everything before it is valid
+                    continue
+                self.index[rec["name"]] = (rec["shard"], rec["offset"], rec["length"])
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.path / f"shard-{shard:05d}.bin"
+
+    def _current_shard(self) -> int:
+        shards = sorted(self.path.glob("shard-*.bin"))
+        if not shards:
+            return 0
+        last = int(shards[-1].stem.split("-")[1])
+        return last + 1 if shards[-1].stat().st_size >= self.max_shard_bytes else last
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def names(self):
+        return sorted(self.index)
+
+    def add(self, name: str, text: str):
+        """Append a document; replaces any earlier document with the same name."""
+        self.add_many([(name, text)])
+
+    def add_many(self, documents):
+        """Append (name, text) pairs, writing the shard data before the index records."""
+        shard = self._current_shard()
+        records = []
+        f = self._shard_path(shard).open("ab")
+        try:
+            for name, text in documents:
+                if f.tell() >= self.max_shard_bytes:
+                    f.close()
+                    shard += 1
+                    f = self._shard_path(shard).open("ab")
+                data = zlib.compress(text.encode("utf-8"), self.compression_level)
+                offset = f.tell()
+                f.write(data)
+                records.append({"name": name, "shard": shard, "offset": offset, "length": len(data)})
+        finally:
+            f.close()
+        self._close_handles()
+        with (self.path / INDEX_FILE).open("a", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+                self.index[rec["name"]] = (rec["shard"], rec["offset"], rec["length"])
+
+    def _read(self, shard: int, offset: int, length: int) -> str:
+        handle = self._handles.get(shard)
+        if handle is None:
+            handle = self._handles[shard] = self._shard_path(shard).open("rb")
+        handle.seek(offset)
+        return zlib.decompress(handle.read(length)).decode("utf-8")
+
+    def get(self, name: str) -> Optional[str]:
+        """Return a document's text by name, or None if it isn't stored."""
+        loc = self.index.get(name)
+        return self._read(*loc) if loc else None
+
+    def iter_documents(self) -> Iterator[Tuple[str, str]]:
+        """Yield (name, text) for every document in shard order (sequential reads)."""
+        for name, loc in sorted(self.index.items(), key=lambda item: item[1]):
+            yield name, self._read(*loc)
+
+    def compact(self):
+        """Rewrite the store keeping only the newest copy of each document.
+
+        The compacted shards and index are written to a temporary directory
+        next to the store, the shards are moved in under new numbers and the
+        index is swapped in last with os.replace, so a crash or a full disk
+        part way through leaves the old store intact. Superseded shards are
+        deleted once the new index is in place.
+        """
+        old_shards = sorted(self.path.glob("shard-*.bin"))
+        first = int(old_shards[-1].stem.split("-")[1]) + 1 if old_shards else 0
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{self.path.name}-compact-", dir=self.path.parent))
+        try:
+            with CorpusStore(tmp_dir, self.max_shard_bytes, self.compression_level) as compacted:
+                compacted.add_many(self.iter_documents())
+                index = {name: (shard + first, offset, length) for name, (shard, offset, length) in compacted.index.items()}
+            for shard in sorted(tmp_dir.glob("shard-*.bin")):
+                _fsync(shard)
+                os.replace(shard, self._shard_path(first + int(shard.stem.split("-")[1])))
+            tmp_index = tmp_dir / INDEX_FILE
+            with tmp_index.open("w", encoding="utf-8") as f:
+                for name, (shard, offset, length) in sorted(index.items(), key=lambda item: item[1]):
+                    f.write(json.dumps({"name": name, "shard": shard, "offset": offset, "length": length}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._close_handles()
+            os.replace(tmp_index, self.path / INDEX_FILE)
+            self.index = index
+            for shard in old_shards:
+                shard.unlink()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _close_handles(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    def close(self):
+        self._close_handles()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def import_directory(text_dir, store_path, max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES) -> int:
+    """Add every .txt file in text_dir to the store; returns the number imported."""
+    files = sorted(Path(text_dir).glob("*.txt"))
+    with CorpusStore(store_path, max_shard_bytes) as store:
+        store.add_many((f.name, f.read_text(encoding="utf-8")) for f in files)
+    return len(files)
+
+
+def export_directory(store_path, text_dir) -> int:
+    """Write every stored document back out as a .txt file; returns the number exported."""
+    out_dir = Path(text_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with CorpusStore(store_path) as store:
+        for name, text in store.iter_documents():
+            (out_dir / name).write_text(text, encoding="utf-8")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import/export processed text to/from a sharded corpus store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a directory of .txt files into a corpus store.")
+    imp.add_argument("text_dir", type=str)
+    imp.add_argument("store", type=str)
+    exp = sub.add_parser("export", help="Export a corpus store to a directory of .txt files.")
+    exp.add_argument("store", type=str)
+    exp.add_argument("text_dir", type=str)
+    comp = sub.add_parser("compact", help="Drop superseded copies of re-added documents.")
+    comp.add_argument("store", type=str)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        count = import_directory(args.text_dir, args.store)
+        print(f"Imported {count} documents into {args.store}")
+    elif args.command == "export":
+        count = export_directory(args.store, args.text_dir)
+        print(f"Exported {count} documents to {args.text_dir}")
+    else:
+        with CorpusStore(args.store) as store:
+            store.compact()
+            print(f"Compacted {args.store} ({len(store)} documents)")
+
+
+if __name__ == "__main__":
+    main()
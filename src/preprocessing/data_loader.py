@@ -1,7 +1,15 @@
 from pathlib import Path
+import sys
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.corpus_store import CorpusStore, is_corpus_store
 
+
+# Load every processed text from a directory of .txt files or a corpus store.
 def load_processed_text(directory="data/processed-text"):
+    if is_corpus_store(directory):
+        with CorpusStore(directory) as store:
+            return [text for _, text in store.iter_documents()]
     texts = []
     for txt_file in Path(directory).glob("*.txt"):
         with open(txt_file, "r", encoding="utf-8") as f:
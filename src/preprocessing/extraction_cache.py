@@ -0,0 +1,98 @@
+"""Content-addressed cache for extracted PDF text.
+
+Entries are keyed on the SHA-256 of the PDF bytes combined with the extractor
+version string, so a hit never needs to open the document. Each entry is a
+single UTF-8 text file; the cache directory is kept under a byte budget by
+evicting the least recently used entries (tracked with file mtimes).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = "data/extraction-cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
+
+def make_cache_key(pdf_bytes, version: str) -> str:
+    """Return the cache key for a PDF's raw bytes and an extractor version."""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    return hashlib.sha256(f"{digest}:{version}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of extracted text stored on disk.
+
+    Several processes may share one cache directory: writes are atomic and
+    eviction tolerates entries removed by another process.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    def _entries(self):
+        return self.cache_dir.glob("*/*.txt")
+
+    def _path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small for large corpora
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Refresh mtime so the entry counts as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        """Store text under key and evict old entries if over budget."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        # An overwritten entry no longer counts towards the total
+        try:
+            previous = path.stat().st_size
+        except FileNotFoundError:
+            previous = 0
+        os.replace(tmp_path, path)
+        self._total_bytes += len(data) - previous
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
@@ -0,0 +1,270 @@
+"""Near-duplicate detection for the extracted text corpus.
+
+Reprints, preprints and re-scans of the same paper end up in the corpus under
+different file names. This module finds them with MinHash signatures over
+word shingles and locality-sensitive hashing (LSH):
+
+ - each document's normalized text is cut into overlapping word n-grams
+   ("shingles") and summarized by num_perm min-hashes, whose agreement rate
+   estimates the Jaccard similarity of two shingle sets;
+ - signatures are split into bands; documents sharing any whole band land in
+   the same bucket and become candidate pairs, so only documents that
+   probably are similar are compared (no all-pairs scan);
+ - candidates whose estimated similarity is at least the threshold are
+   joined into clusters.
+
+The index (signatures plus a content digest per document) is saved to an
+.npz file so later runs only shingle new or changed documents.
+
+Usage:
+    python src/preprocessing/near_duplicates.py [--data-dir data/processed-text] [--threshold 0.8] [--output data/near-duplicates.json]
+
+Training can collapse each cluster to one document before the train/test
+split with `train_model.py --dedup`.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.corpus_store import CorpusStore, is_corpus_store
+
+DEFAULT_INDEX_PATH = "data/near-duplicates.npz"
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+SEED = 1
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHIFT = np.uint64(32)
+# Shingles hashed per block, bounding the (num_perm x block) temporary array
+_BLOCK = 8192
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Set of word n-grams of the lowercased, punctuation-free text (the whole text if shorter)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiply-shift hash functions h(x) = (a*x + b mod 2**64) >> 32 with odd a (no modulo by a prime, which is ~3x slower in numpy)."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signature(text: str, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = SEED) -> np.ndarray:
+    """MinHash signature (num_perm uint64 values) of a document's shingle set."""
+    a, b = _permutations(num_perm, seed)
+    signature = np.full(num_perm, _MAX_HASH, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text, shingle_size)), dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        block = hashes[start : start + _BLOCK]
+        # In place: one (num_perm x block) temporary instead of three
+        permuted = np.multiply.outer(a, block)
+        permuted += b[:, None]
+        permuted >>= _SHIFT
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to threshold."""
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(options, key=lambda br: abs((1.0 / br[0]) ** (1.0 / br[1]) - threshold))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of a corpus, updated incrementally and queried with LSH."""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = SEED):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.digests: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def update(self, documents: Iterable[Tuple[str, str]], prune: bool = True) -> int:
+        """Add new or changed (name, text) documents; returns how many were (re)hashed.
+
+        With prune, documents not in `documents` are dropped from the index.
+        """
+        seen = set()
+        updated = 0
+        for name, text in documents:
+            seen.add(name)
+            digest = _digest(text)
+            if self.digests.get(name) == digest:
+                continue
+            self.signatures[name] = minhash_signature(text, self.num_perm, self.shingle_size, self.seed)
+            self.digests[name] = digest
+            updated += 1
+        if prune:
+            for name in set(self.signatures) - seen:
+                del self.signatures[name]
+                del self.digests[name]
+        return updated
+
+    def similarity(self, a: str, b: str) -> float:
+        """Estimated Jaccard similarity of two indexed documents."""
+        return float(np.mean(self.signatures[a] == self.signatures[b]))
+
+    def candidate_pairs(self, threshold: float = DEFAULT_THRESHOLD) -> set:
+        """Pairs of names sharing at least one LSH band (documents without any words are left out)."""
+        bands, rows = lsh_params(threshold, self.num_perm)
+        pairs = set()
+        names = sorted(n for n, sig in self.signatures.items() if (sig != _MAX_HASH).any())
+        for band in range(bands):
+            buckets: Dict[bytes, List[str]] = {}
+            for name in names:
+                buckets.setdefault(self.signatures[name][band * rows : (band + 1) * rows].tobytes(), []).append(name)
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        pairs.add((members[i], members[j]))
+        return pairs
+
+    def clusters(self, threshold: float = DEFAULT_THRESHOLD) -> List[List[str]]:
+        """Groups of two or more documents connected by estimated similarity >= threshold."""
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in self.candidate_pairs(threshold):
+            if self.similarity(a, b) >= threshold:
+                parent[find(a)] = find(b)
+        groups: Dict[str, List[str]] = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: g[0])
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        names = sorted(self.signatures)
+        meta = {"num_perm": self.num_perm, "shingle_size": self.shingle_size, "seed": self.seed}
+        with path.open("wb") as f:
+            np.savez(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                names=np.array(names, dtype=str),
+                digests=np.array([self.digests[n] for n in names], dtype=str),
+                signatures=np.array([self.signatures[n] for n in names], dtype=np.uint64).reshape(len(names), self.num_perm),
+            )
+
+    @classmethod
+    def load(cls, path, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = SEED) -> "NearDuplicateIndex":
+        """Load a saved index; returns an empty one if it is missing or was built with other settings."""
+        index = cls(num_perm, shingle_size, seed)
+        path = Path(path)
+        if not path.exists():
+            return index
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            if meta != {"num_perm": num_perm, "shingle_size": shingle_size, "seed": seed}:
+                print(f"[WARN] {path} was built with different MinHash settings; rebuilding.")
+                return index
+            for name, digest, signature in zip(data["names"].tolist(), data["digests"].tolist(), data["signatures"]):
+                index.signatures[name] = signature
+                index.digests[name] = digest
+        return index
+
+
+def iter_corpus(data_dir) -> Iterable[Tuple[str, str]]:
+    """Yield (name, text) from a processed-text directory or a corpus store."""
+    if is_corpus_store(data_dir):
+        with CorpusStore(data_dir) as store:
+            yield from store.iter_documents()
+        return
+    for txt_file in sorted(Path(data_dir).glob("*.txt")):
+        yield txt_file.name, txt_file.read_text(encoding="utf-8")
+
+
+def update_index(documents: Iterable[Tuple[str, str]], index_path=DEFAULT_INDEX_PATH) -> NearDuplicateIndex:
+    """Load the saved index (if index_path is set), bring it up to date with documents and save it."""
+    index = NearDuplicateIndex.load(index_path) if index_path else NearDuplicateIndex()
+    updated = index.update(documents)
+    print(f"[INFO] Near-duplicate index: {len(index)} documents, {updated} new or changed")
+    if index_path:
+        index.save(index_path)
+    return index
+
+
+def collapse_duplicates(texts: List[str], labels: List[str], filenames: List[str], clusters: List[List[str]]):
+    """Keep one document per duplicate cluster; returns (texts, labels, filenames, dropped names).
+
+    The kept copy has the cluster's majority label (ties go to the first name)
+    and is the longest text with that label.
+    """
+    position = {name: i for i, name in enumerate(filenames)}
+    dropped = set()
+    for cluster in clusters:
+        members = [n for n in cluster if n in position]
+        if len(members) < 2:
+            continue
+        member_labels = [labels[position[n]] for n in members]
+        if len(set(member_labels)) > 1:
+            print(f"[WARN] Near-duplicates with conflicting labels: {', '.join(f'{n} ({l})' for n, l in zip(members, member_labels))}")
+        majority = Counter(member_labels).most_common(1)[0][0]
+        keep = max((n for n in members if labels[position[n]] == majority), key=lambda n: len(texts[position[n]]))
+        dropped.update(n for n in members if n != keep)
+    kept = [i for i, name in enumerate(filenames) if name not in dropped]
+    return [texts[i] for i in kept], [labels[i] for i in kept], [filenames[i] for i in kept], sorted(dropped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report near-duplicate documents in the processed text corpus.")
+    parser.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory or corpus store.")
+    parser.add_argument("--index", type=str, default=DEFAULT_INDEX_PATH, help="MinHash index, updated incrementally ('' to disable).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Estimated Jaccard similarity for two documents to count as duplicates.")
+    parser.add_argument("--output", type=str, default=None, help="Also write the clusters (with pairwise similarities) as JSON.")
+    args = parser.parse_args()
+
+    if not Path(args.data_dir).exists():
+        print(f"[ERROR] Data directory not found: {args.data_dir}")
+        sys.exit(1)
+    index = update_index(iter_corpus(args.data_dir), args.index)
+    clusters = index.clusters(args.threshold)
+
+    print(f"[INFO] {len(clusters)} duplicate clusters covering {sum(len(c) for c in clusters)} documents")
+    report = []
+    for cluster in clusters:
+        first = cluster[0]
+        report.append({"documents": cluster, "similarity_to_first": {n: round(index.similarity(first, n), 3) for n in cluster[1:]}})
+        print(f"  {first}: " + ", ".join(f"{n} ({index.similarity(first, n):.2f})" for n in cluster[1:]))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({"threshold": args.threshold, "clusters": report}, indent=2), encoding="utf-8")
+        print(f"[INFO] Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
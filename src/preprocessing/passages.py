@@ -0,0 +1,276 @@
+"""Candidate-passage index for the extraction model.
+
+Sending whole papers to a language model is too expensive at corpus scale,
+and the numbers we want (empty/non-empty stomach counts and their
+covariates) sit in a handful of sentences and tables. This module finds
+those passages in the extracted text and stores them, ranked, with their
+character offsets and page numbers:
+
+ - table-like regions: runs of lines dominated by numbers (plus a "Table ..."
+   caption line directly above);
+ - sentences mentioning empty stomachs / vacuity, stomach contents or diet,
+   sample sizes ("n = 42", "118 stomachs"), sampling locations (coordinates,
+   study sites) and years.
+
+Each passage is scored by the kinds of evidence it contains, and the top
+passages per document are written to <index_dir>/<document stem>.json:
+
+    {"document": "Adams_1989.txt", "source": {"size": ..., "mtime_ns": ...}, "pages": 12, "chars": 48211,
+     "passages": [{"rank": 1, "page": 4, "start": 10233, "end": 10391, "page_start": 1877,
+                   "kind": "sentence", "features": ["empty_stomach", "sample_size"], "score": 8.5, "text": "..."}]}
+
+start/end are offsets into the document's text, page_start is the offset
+within its page. Pages are recovered from the form feeds the extractor puts
+between pages (PAGE_SEPARATOR); text extracted before that has a single page.
+
+The index is built incrementally: documents whose text file is unchanged
+(same size and modification time) are skipped.
+
+Usage:
+    python src/preprocessing/passages.py build [--data-dir data/processed-text] [--index-dir data/passages]
+    python src/preprocessing/passages.py show Adams_1989.txt [--max-chars 4000]
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.pdf_text_extraction import PAGE_SEPARATOR
+
+DEFAULT_INDEX_DIR = "data/passages"
+DEFAULT_TOP_K = 25
+DEFAULT_MAX_CHARS = 6000
+
+# Evidence kinds and their weight in a passage's score
+FEATURE_PATTERNS = {
+    "empty_stomach": (
+        5.0,
+        re.compile(
+            r"\bempty\s+stomachs?\b|\bstomachs?\s+(?:\w+\s+){0,3}empty\b|\bvacuity\b|\bnon-?empty\b|\b(?:percent|proportion|number|frequency)\s+(?:of\s+)?empty\b",
+            re.IGNORECASE,
+        ),
+    ),
+    "stomach": (2.0, re.compile(r"\bstomachs?\b|\bgut\s+contents?\b|\bdiet(?:s|ary)?\b|\bprey\b|\bfeeding\b", re.IGNORECASE)),
+    "sample_size": (
+        3.0,
+        re.compile(
+            r"\b[nN]\s*=\s*\d[\d,]*|\bsample\s+sizes?\b|\b\d[\d,]*\s+(?:stomachs|individuals|specimens|fish|samples|animals|predators|birds|seals)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    "location": (
+        2.0,
+        re.compile(
+            r"\d+(?:\.\d+)?\s*°\s*\d*['′]?\s*[NSEW]\b|\b(?:latitude|longitude)\b|\b(?:study\s+(?:area|site)s?|sampling\s+(?:sites?|locations?|stations?)|collected\s+(?:in|from|at|off))\b",
+            re.IGNORECASE,
+        ),
+    ),
+    "year": (1.0, re.compile(r"\b(?:19[0-9]{2}|20[0-4][0-9])(?:\s*[-–]\s*(?:19|20)?[0-9]{2})?\b")),
+}
+TABLE_WEIGHT = 3.0
+# A table row has at least this many numbers making up at least this share of its tokens
+TABLE_MIN_NUMBERS = 2
+TABLE_MIN_NUMERIC_SHARE = 0.4
+TABLE_MIN_ROWS = 3
+# Tables OCR'd or extracted one cell per line: a run of this many lines of at most
+# TABLE_MAX_CELL_TOKENS tokens, at least half of them containing a number
+TABLE_MIN_CELL_LINES = 10
+TABLE_MAX_CELL_TOKENS = 3
+# Short lines directly above a table (column headers, "Table 2. ..." captions) are kept with it
+TABLE_MAX_HEADER_LINES = 2
+TABLE_MAX_HEADER_TOKENS = 12
+
+_NUMBER_RE = re.compile(r"^[(\[]?[-+±]?\d[\d,.]*%?[)\]]?$")
+_CAPTION_RE = re.compile(r"^\s*table\s+[0-9ivx]+", re.IGNORECASE)
+# A sentence runs to ., ! or ? followed by whitespace (or to the end of the paragraph)
+_SENTENCE_RE = re.compile(r"\S.*?(?:[.!?](?=\s)|(?=\n\s*\n)|$)", re.DOTALL)
+
+
+class Passage(NamedTuple):
+    """A candidate passage; start/end are offsets into the document text."""
+
+    page: int  # 1-based
+    start: int
+    end: int
+    page_start: int  # offset of the passage within its page
+    kind: str  # "sentence" or "table"
+    features: Tuple[str, ...]
+    score: float
+    text: str
+
+
+def split_pages(text: str) -> Iterator[Tuple[int, int, str]]:
+    """Yield (page number, offset in text, page text) for a document's extracted text."""
+    offset = 0
+    for number, page in enumerate(text.split(PAGE_SEPARATOR), 1):
+        yield number, offset, page
+        offset += len(page) + len(PAGE_SEPARATOR)
+
+
+def score_text(text: str) -> Tuple[Tuple[str, ...], float]:
+    """Evidence kinds found in text and the passage score (repeat mentions add a little)."""
+    features, score = [], 0.0
+    for name, (weight, pattern) in FEATURE_PATTERNS.items():
+        hits = len(pattern.findall(text))
+        if hits:
+            features.append(name)
+            score += weight + 0.25 * weight * min(hits - 1, 4)
+    return tuple(features), score
+
+
+def _is_table_row(line: str) -> bool:
+    tokens = line.split()
+    numbers = sum(1 for t in tokens if _NUMBER_RE.match(t))
+    return numbers >= TABLE_MIN_NUMBERS and numbers >= TABLE_MIN_NUMERIC_SHARE * len(tokens)
+
+
+def _table_spans(page: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of table-like line runs in a page, including header/caption lines above."""
+    lines, offset = [], 0
+    for line in page.splitlines(keepends=True):
+        lines.append((offset, line))
+        offset += len(line)
+    spans, run, rows, numeric = [], [], 0, 0
+    for i, (start, line) in enumerate(lines + [(offset, "")]):
+        tokens = line.split()
+        if i < len(lines) and (_is_table_row(line) or 0 < len(tokens) <= TABLE_MAX_CELL_TOKENS):
+            run.append(i)
+            rows += _is_table_row(line)
+            numeric += any(_NUMBER_RE.match(t) for t in tokens)
+            continue
+        # Trim leading/trailing label lines off the run
+        while run and not any(_NUMBER_RE.match(t) for t in lines[run[-1]][1].split()):
+            run.pop()
+        if rows >= TABLE_MIN_ROWS or (len(run) >= TABLE_MIN_CELL_LINES and numeric >= len(run) / 2):
+            first = run[0]
+            for _ in range(TABLE_MAX_HEADER_LINES):
+                above = lines[first - 1][1] if first > 0 else ""
+                if not above.strip() or len(above.split()) > TABLE_MAX_HEADER_TOKENS:
+                    break
+                first -= 1
+                if _CAPTION_RE.match(above):
+                    break
+            last_start, last_line = lines[run[-1]]
+            spans.append((lines[first][0], last_start + len(last_line.rstrip())))
+        run, rows, numeric = [], 0, 0
+    return spans
+
+
+def find_passages(text: str) -> List[Passage]:
+    """Every passage of a document with some evidence, in document order."""
+    passages = []
+    for number, page_offset, page in split_pages(text):
+        tables = _table_spans(page)
+        for start, end in tables:
+            features, score = score_text(page[start:end])
+            passages.append(Passage(number, page_offset + start, page_offset + end, start, "table", ("table",) + features, score + TABLE_WEIGHT, page[start:end]))
+        # Sentences are only looked for between tables
+        bounds = [0] + [b for span in tables for b in span] + [len(page)]
+        for seg_start, seg_end in zip(bounds[::2], bounds[1::2]):
+            for m in _SENTENCE_RE.finditer(page, seg_start, seg_end):
+                features, score = score_text(m.group())
+                # Years alone are mostly citations ("Smith 1998"); they only add to other evidence
+                if set(features) - {"year"}:
+                    passages.append(Passage(number, page_offset + m.start(), page_offset + m.end(), m.start(), "sentence", features, score, m.group()))
+    passages.sort(key=lambda p: p.start)
+    return passages
+
+
+def rank_passages(passages: List[Passage], top_k: int = DEFAULT_TOP_K) -> List[Passage]:
+    """The top_k passages by score (earlier passages first among equals)."""
+    return sorted(passages, key=lambda p: (-p.score, p.start))[:top_k]
+
+
+def candidate_slice(passages: List[Dict], max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    """Text for the extraction model: the best passages (as stored in the index) that fit in
+    max_chars, in document order, each prefixed with its page number."""
+    chosen, used = [], 0
+    for p in sorted(passages, key=lambda p: p["rank"]):
+        if used + len(p["text"]) > max_chars:
+            continue
+        chosen.append(p)
+        used += len(p["text"])
+    return "\n\n".join(f"[p. {p['page']}] {p['text'].strip()}" for p in sorted(chosen, key=lambda p: p["start"]))
+
+
+def index_document(name: str, text: str, top_k: int = DEFAULT_TOP_K) -> Dict:
+    ranked = rank_passages(find_passages(text), top_k)
+    return {
+        "document": name,
+        "pages": text.count(PAGE_SEPARATOR) + 1,
+        "chars": len(text),
+        "passages": [{"rank": rank, **p._asdict(), "features": list(p.features), "score": round(p.score, 3)} for rank, p in enumerate(ranked, 1)],
+    }
+
+
+def _entry_path(index_dir: Path, name: str) -> Path:
+    return index_dir / f"{Path(name).stem}.json"
+
+
+def build_index(data_dir=Path("data/processed-text"), index_dir=Path(DEFAULT_INDEX_DIR), top_k: int = DEFAULT_TOP_K) -> Tuple[int, int]:
+    """Index new or changed .txt files in data_dir; returns (indexed, unchanged) counts."""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    indexed = unchanged = 0
+    for txt_file in sorted(Path(data_dir).glob("*.txt")):
+        st = txt_file.stat()
+        source = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        entry_path = _entry_path(index_dir, txt_file.name)
+        if entry_path.exists():
+            try:
+                if json.loads(entry_path.read_text(encoding="utf-8")).get("source") == source:
+                    unchanged += 1
+                    continue
+            except ValueError:
+                pass  # a partially written entry is rebuilt
+        entry = index_document(txt_file.name, txt_file.read_text(encoding="utf-8"), top_k)
+        entry["source"] = source
+        entry_path.write_text(json.dumps(entry, ensure_ascii=False, indent=1), encoding="utf-8")
+        indexed += 1
+    return indexed, unchanged
+
+
+def load_entry(name: str, index_dir=Path(DEFAULT_INDEX_DIR)) -> Optional[Dict]:
+    """The stored passages of a document, or None if it hasn't been indexed."""
+    path = _entry_path(Path(index_dir), name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index candidate passages (tables, empty-stomach and sample-size sentences) for the extraction model.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index new or changed processed text files.")
+    build.add_argument("--data-dir", type=str, default="data/processed-text", help="Processed text directory.")
+    build.add_argument("--index-dir", type=str, default=DEFAULT_INDEX_DIR, help="Where to write one JSON file of passages per document.")
+    build.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Passages kept per document.")
+    show = sub.add_parser("show", help="Print the ranked slice of a document that the extraction model would see.")
+    show.add_argument("document", type=str, help="Text file name, e.g. Adams_1989.txt.")
+    show.add_argument("--index-dir", type=str, default=DEFAULT_INDEX_DIR, help="Passage index directory.")
+    show.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS, help="Size of the slice.")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not Path(args.data_dir).exists():
+            print(f"[ERROR] Data directory not found: {args.data_dir}")
+            sys.exit(1)
+        indexed, unchanged = build_index(args.data_dir, args.index_dir, args.top_k)
+        print(f"[INFO] Indexed passages of {indexed} documents ({unchanged} unchanged) in {args.index_dir}")
+        return
+
+    entry = load_entry(args.document, args.index_dir)
+    if entry is None:
+        print(f"[ERROR] {args.document} is not in the passage index {args.index_dir}")
+        sys.exit(1)
+    text = candidate_slice(entry["passages"], args.max_chars)
+    print(f"[INFO] {len(text)} of {entry['chars']} characters ({entry['pages']} pages)")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,63 +9,336 @@ automatically applies OCR when a page contains only images (e.g., scanned docume
 """
 
 # Extract all text from a PDF using PyMuPDF
-import fitz
-import pytesseract
-from PIL import Image
-import io
 import argparse
+import importlib.metadata
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 import sys
+import time
 
-Image.MAX_IMAGE_PIXELS = None
-fitz.TOOLS.mupdf_display_errors(False)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.preprocessing.extraction_cache import ExtractionCache, make_cache_key
+from src.utils import profiling
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    text = []
-    print(f"Extracting text from {pdf_path}.")
+# PyMuPDF, PIL and pytesseract are imported on first use, so --help, argument
+# errors and cache hits don't pay for loading them (nor do pool workers that
+# never render a page).
+@lru_cache(maxsize=None)
+def _fitz():
+    import fitz
+
+    fitz.TOOLS.mupdf_display_errors(False)
+    return fitz
+
+
+@lru_cache(maxsize=None)
+def _pil_image():
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = None
+    return Image
+
+
+@lru_cache(maxsize=None)
+def _pytesseract():
+    import pytesseract
+
+    return pytesseract
+
+
+# Bump whenever extraction or OCR output changes so cached text is invalidated
+EXTRACTOR_VERSION = "3"
+# Pages of the extracted text are separated by a form feed, so page numbers can be recovered from it
+PAGE_SEPARATOR = "\f"
+OCR_DPI = 300
+
+# Relative cost of an OCR'd page compared to a page with a text layer
+OCR_PAGE_COST = 50.0
+# Number of leading pages inspected when checking for a text layer
+TEXT_LAYER_SAMPLE_PAGES = 3
+
+
+@lru_cache(maxsize=None)
+def extractor_version() -> str:
+    """Return a string identifying the extractor and OCR settings, used in cache keys.
+
+    The PyMuPDF version is read from the package metadata so that a cache hit
+    doesn't import PyMuPDF.
+    """
+    try:
+        pymupdf_version = importlib.metadata.version("pymupdf")
+    except importlib.metadata.PackageNotFoundError:
+        pymupdf_version = _fitz().VersionBind
+    return f"{EXTRACTOR_VERSION}:pymupdf={pymupdf_version}:dpi={OCR_DPI}"
+
+
+def _page_text_layer(page) -> str:
+    """Return the text layer of a page with null bytes / UTF-16 artifacts removed."""
+    page_text = page.get_text("text")
+    if "\x00" in page_text:
+        page_text = page_text.replace("\x00", "")
+    return page_text
+
+
+def _render_page(page, page_stats: Optional[List[Dict]] = None):
+    """Render a page for OCR and wrap the pixmap samples in a PIL image without copying.
+
+    The page is rendered straight to grayscale, and the image shares the
+    pixmap's sample buffer instead of round-tripping through PNG. The image is
+    tagged as PPM so pytesseract hands it to Tesseract uncompressed. The pixmap
+    is returned as well: it must outlive the image, which should be closed
+    (see _ocr_image) before the pixmap is released.
+
+    If page_stats is a list, a dict with the render and conversion times and the
+    size of the pixmap buffer (the largest transient allocation) is appended;
+    _ocr_timed adds the Tesseract time to it as "ocr_s".
+    """
+    start = time.perf_counter()
+    pix = page.get_pixmap(dpi=OCR_DPI, colorspace=_fitz().csGRAY, alpha=False)
+    rendered = time.perf_counter()
+    mode = "L" if pix.n == 1 else "RGB"
+    img = _pil_image().frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    img.format = "PPM"
+    if page_stats is not None:
+        page_stats.append(
+            {
+                "page": page.number + 1,
+                "render_s": rendered - start,
+                "convert_s": time.perf_counter() - rendered,
+                "pixmap_bytes": pix.stride * pix.height,
+            }
+        )
+    return img, pix
+
+
+def _render_page_detached(page, page_stats: Optional[List[Dict]] = None):
+    """Render a page for OCR on another thread: the image owns its pixels and the pixmap is already freed.
+
+    Costs one copy of the samples (counted in convert_s), so no MuPDF object
+    is used or released off the rendering thread.
+    """
+    img, pix = _render_page(page, page_stats)
+    start = time.perf_counter()
+    detached = img.copy()
+    detached.format = "PPM"
+    img.close()
+    del pix
+    if page_stats is not None:
+        page_stats[-1]["convert_s"] += time.perf_counter() - start
+    return detached
+
+
+def _ocr_image(img, pix=None) -> str:
+    # pix is unused but keeps the buffer behind img alive until OCR finishes;
+    # the image is closed first so it releases its view of the pixmap samples
     try:
-        with fitz.open(pdf_path) as doc:
-            for page_num, page in enumerate(doc, start=1):
-                # Extract text from the page using PyMuPDF
-                page_text = page.get_text("text")
-
-                # Clean out null bytes or UTF-16 artifacts
-                if "\x00" in page_text:
-                    page_text = page_text.replace("\x00", "")
-
-                # If the page is mostly empty, treat as image and use OCR
-                if not page_text.strip():
-                    pix = page.get_pixmap(dpi=300)
-                    img = Image.open(io.BytesIO(pix.tobytes("png")))
-                    page_text = pytesseract.image_to_string(img)
-
-                text.append(page_text)
+        return _pytesseract().image_to_string(img)
+    finally:
+        img.close()
+
+
+def _ocr_timed(img, pix, render_s: float, stat: Optional[Dict] = None) -> Tuple[str, float]:
+    start = time.perf_counter()
+    text = _ocr_image(img, pix)
+    ocr_s = time.perf_counter() - start
+    if stat is not None:
+        stat["ocr_s"] = ocr_s
+    return text, render_s + ocr_s
+
+
+class PageText(NamedTuple):
+    """Text of one PDF page as produced by iter_pdf_pages."""
+
+    page_number: int  # 1-based
+    text: str
+    ocr: bool  # True if the page had no text layer and was OCR'd
+    seconds: float  # time spent extracting (and rendering/OCR'ing) this page
+
+
+@contextmanager
+def map_pdf_file(pdf_path):
+    """Memory-map a PDF file read-only and yield a memoryview over its bytes.
+
+    The view can be hashed or passed to PyMuPDF without reading the file into
+    Python memory; it is only valid inside the with block.
+    """
+    with open(pdf_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+@contextmanager
+def open_pdf(source):
+    """Open a PDF given a file path (memory-mapped) or an in-memory bytes-like object."""
+    if isinstance(source, (str, os.PathLike)):
+        with map_pdf_file(source) as view:
+            with _fitz().open(stream=view, filetype="pdf") as doc:
+                yield doc
+    else:
+        with _fitz().open(stream=source, filetype="pdf") as doc:
+            yield doc
+
+
+def _iter_doc_pages(doc, ocr_workers: int = 1, page_stats: Optional[List[Dict]] = None, start: int = 0, stop: Optional[int] = None) -> Iterator[PageText]:
+    """Yield PageText for pages [start, stop) of an open document, in page order.
+
+    Pages without a text layer are OCR'd. With ocr_workers > 1 those pages are
+    OCR'd concurrently: rendering stays on this thread (PyMuPDF objects are not
+    thread-safe) while Tesseract runs as a separate process per call, so the
+    worker threads OCR in parallel. Worker threads only get a PIL image that
+    owns a copy of the pixels; the pixmap is freed here. At most
+    2 * ocr_workers rendered pages are held in memory at once.
+    """
+    stop = doc.page_count if stop is None else min(stop, doc.page_count)
+    if ocr_workers <= 1:
+        for number in range(start, stop):
+            page_start = time.perf_counter()
+            page = doc[number]
+            page_text = _page_text_layer(page)
+            # If the page is mostly empty, treat as image and use OCR
+            ocr = not page_text.strip()
+            if ocr:
+                img, pix = _render_page(page, page_stats)
+                page_text, _ = _ocr_timed(img, pix, 0.0, page_stats[-1] if page_stats is not None else None)
+            yield PageText(number + 1, page_text, ocr, time.perf_counter() - page_start)
+        return
+
+    with ThreadPoolExecutor(max_workers=ocr_workers) as pool:
+        # Pages wait here in order; OCR'd pages hold a future until Tesseract finishes
+        queue = deque()
+        ocr_pending = 0
+        for number in range(start, stop):
+            page_start = time.perf_counter()
+            page = doc[number]
+            page_text = _page_text_layer(page)
+            if page_text.strip():
+                queue.append((number, page_text, time.perf_counter() - page_start))
+            else:
+                img = _render_page_detached(page, page_stats)
+                stat = page_stats[-1] if page_stats is not None else None
+                queue.append((number, pool.submit(_ocr_timed, img, None, time.perf_counter() - page_start, stat), None))
+                ocr_pending += 1
+            # Yield whatever is ready at the front, blocking only if too many pages are rendered
+            while queue and (not isinstance(queue[0][1], Future) or queue[0][1].done() or ocr_pending >= 2 * ocr_workers):
+                number_, result, seconds = queue.popleft()
+                if isinstance(result, Future):
+                    ocr_pending -= 1
+                    text, seconds = result.result()
+                    yield PageText(number_ + 1, text, True, seconds)
+                else:
+                    yield PageText(number_ + 1, result, False, seconds)
+        for number_, result, seconds in queue:
+            if isinstance(result, Future):
+                text, seconds = result.result()
+                yield PageText(number_ + 1, text, True, seconds)
+            else:
+                yield PageText(number_ + 1, result, False, seconds)
+
+
+def iter_pdf_pages(source, ocr_workers: int = 1, start: int = 0, stop: Optional[int] = None, page_stats: Optional[List[Dict]] = None) -> Iterator[PageText]:
+    """Lazily extract a PDF page by page.
+
+    source is a file path (memory-mapped rather than read) or a bytes-like
+    object. Pages are yielded in order as soon as they are ready, so callers
+    can stream text to disk or a classifier without holding the whole document.
+    Extraction errors propagate to the caller.
+    """
+    with open_pdf(source) as doc:
+        yield from _iter_doc_pages(doc, ocr_workers, page_stats, start, stop)
+
+
+def _extract_text(data, description: str, cache=None, ocr_workers: int = 1, page_stats: Optional[List[Dict]] = None) -> str:
+    key = None
+    if cache is not None:
+        key = make_cache_key(data, extractor_version())
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    try:
+        # Join all pages into a single string, one form feed between pages
+        result = PAGE_SEPARATOR.join(page.text for page in iter_pdf_pages(data, ocr_workers, page_stats=page_stats))
     except Exception as e:
+        print(f"[ERROR] Failed to extract text from {description}: {e}", file=sys.stderr)
+        return ""
+    if key is not None and result:
+        cache.put(key, result)
+    return result
+
+
+def extract_text_from_pdf(pdf_path: str, cache=None, ocr_workers: int = 1, page_stats: Optional[List[Dict]] = None) -> str:
+    """Extract text from a PDF file, memory-mapping it instead of reading it into memory.
+
+    See extract_text_from_pdf_bytes for cache, ocr_workers and page_stats.
+    """
+    print(f"Extracting text from {pdf_path}.")
+    try:
+        with map_pdf_file(pdf_path) as view:
+            return _extract_text(view, pdf_path, cache, ocr_workers, page_stats)
+    except (OSError, ValueError) as e:
+        # Missing, unreadable or empty (unmappable) files
         print(f"[ERROR] Failed to extract text from {pdf_path}: {e}", file=sys.stderr)
         return ""
-    # Join all pages into a single string separated by newlines
-    return "\n".join(text)
 
 
-def extract_text_from_pdf_bytes(data: bytes) -> str:
-    """Extract text from an in-memory PDF without writing the PDF to disk."""
-    text = []
+def extract_text_from_pdf_bytes(data: bytes, cache=None, ocr_workers: int = 1, page_stats: Optional[List[Dict]] = None) -> str:
+    """Extract text from an in-memory PDF without writing the PDF to disk.
+
+    ocr_workers > 1 OCRs image-only pages concurrently (see _iter_doc_pages).
+    page_stats collects per-page OCR render/conversion timings (see _render_page).
+
+    If an ExtractionCache is given, previously extracted text for the same bytes
+    and extractor version is returned without opening the document.
+    """
+    return _extract_text(data, "PDF bytes", cache, ocr_workers, page_stats)
+
+
+def extract_page_range(pdf_path: str, start: int = 0, stop: Optional[int] = None, ocr_workers: int = 1) -> Tuple[List[str], int]:
+    """Extract the text of pages [start, stop) of a PDF.
+
+    Returns the list of page texts and the document's total page count, so
+    callers can extract a document in stages without re-reading earlier pages.
+    On failure an empty list and a page count of 0 are returned.
+    """
     try:
-        with fitz.open(stream=data, filetype="pdf") as doc:
-            for page_num, page in enumerate(doc, start=1):
-                page_text = page.get_text("text")
-                if "\x00" in page_text:
-                    page_text = page_text.replace("\x00", "")
-                if not page_text.strip():
-                    pix = page.get_pixmap(dpi=300)
-                    img = Image.open(io.BytesIO(pix.tobytes("png")))
-                    page_text = pytesseract.image_to_string(img)
-                text.append(page_text)
+        with open_pdf(pdf_path) as doc:
+            return [page.text for page in _iter_doc_pages(doc, ocr_workers, start=start, stop=stop)], doc.page_count
     except Exception as e:
-        print(f"[ERROR] Failed to extract text from PDF bytes: {e}", file=sys.stderr)
-        return ""
-    return "\n".join(text)
+        print(f"[ERROR] Failed to extract pages {start}-{stop} from {pdf_path}: {e}", file=sys.stderr)
+        return [], 0
+
+
+def estimate_extraction_cost(pdf_path: str) -> float:
+    """Estimate the relative cost of extracting text from a PDF.
+
+    The estimate combines page count, file size and whether the first few pages
+    have a text layer (pages without one are sent through OCR). It is only used
+    to order jobs so the most expensive documents start first.
+    """
+    try:
+        size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+    except OSError:
+        return 0.0
+    try:
+        with _fitz().open(pdf_path) as doc:
+            page_count = doc.page_count
+            sample = min(page_count, TEXT_LAYER_SAMPLE_PAGES)
+            no_text = sum(1 for i in range(sample) if not doc[i].get_text("text").strip())
+    except Exception:
+        # Unreadable documents fail fast, so size is the best remaining signal
+        return size_mb
+    ocr_fraction = no_text / sample if sample else 0.0
+    return page_count * (1.0 + OCR_PAGE_COST * ocr_fraction) + size_mb
 
 
 # Save extracted text to a file.
@@ -81,6 +354,9 @@ def save_to_file(text: str, output_path: str):
 def main():
     parser = argparse.ArgumentParser(description="Extract text from PDF using PyMuPDF.")
     parser.add_argument("pdf", type=str, help="Path to the input PDF file.")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Reuse extracted text from this content-addressed cache directory.")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="OCR image-only pages on this many threads in parallel.")
+    parser.add_argument("--profile", type=str, default=None, metavar="DIR", help="Write CPU/memory profiles and a hot-spot summary to DIR.")
     args = parser.parse_args()
 
     pdf_path = Path(args.pdf)
@@ -89,11 +365,18 @@ def main():
         sys.exit(1)
 
     # Perform extraction
-    text = extract_text_from_pdf(str(pdf_path))
+    cache = ExtractionCache(args.cache_dir) if args.cache_dir else None
+    if args.profile:
+        profiling.enable(args.profile)
+    with profiling.stage(f"extract-{pdf_path.stem}"):
+        text = extract_text_from_pdf(str(pdf_path), cache=cache, ocr_workers=args.ocr_workers)
 
     output_path = Path("data/processed-text") / pdf_path.with_suffix(".txt").name
 
-    save_to_file(text, str(output_path))
+    with profiling.stage("write"):
+        save_to_file(text, str(output_path))
+    if args.profile:
+        print(f"[INFO] Profile summary written to {profiling.write_summary()}")
 
 
 if __name__ == "__main__":
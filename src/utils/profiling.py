@@ -0,0 +1,150 @@
+"""
+Opt-in CPU and memory profiling for the command-line entry points
+-------------------------
+
+Entry points call enable(output_dir) when --profile is given; code paths
+wrap their stages (one document, one batch, model training, ...) in
+stage(name), which does nothing unless profiling is enabled. Each stage writes
+
+    <output_dir>/<stage>.prof          cProfile stats (open with pstats or snakeviz)
+    <output_dir>/<stage>.alloc.json    wall/CPU time, tracemalloc peak and the
+                                       allocation sites that grew the most
+
+and write_summary(output_dir) merges every stage in the directory (including
+stages written by pool worker processes) into summary.txt: the hottest
+functions by cumulative and own time, the largest allocation sites, and a
+per-stage table.
+
+Stages don't nest: a stage opened while another is running in the same
+process is folded into the outer one.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+TOP_ALLOCATIONS = 25
+
+_output_dir = None
+_active = False
+
+
+def enable(output_dir):
+    """Turn profiling on for this process, writing profiles to output_dir."""
+    global _output_dir
+    _output_dir = Path(output_dir)
+    _output_dir.mkdir(parents=True, exist_ok=True)
+
+
+def init_worker(output_dir):
+    """ProcessPoolExecutor initializer: profile the stages run in a worker process."""
+    if output_dir:
+        enable(output_dir)
+
+
+def output_dir():
+    """The directory profiles are written to, or None when profiling is off."""
+    return _output_dir
+
+
+def _stage_path(name):
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "stage"
+    path = _output_dir / f"{safe}.prof"
+    n = 1
+    while path.exists():
+        n += 1
+        path = _output_dir / f"{safe}-{n}.prof"
+    return path
+
+
+@contextmanager
+def stage(name):
+    """Profile the enclosed block as one stage (a no-op unless enable() was called)."""
+    global _active
+    if _output_dir is None or _active:
+        yield
+        return
+
+    _active = True
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+        _active = False
+
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        growth = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        allocations = [{"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_diff": s.size_diff, "count_diff": s.count_diff} for s in growth[:TOP_ALLOCATIONS] if s.size_diff > 0]
+
+        path = _stage_path(name)
+        profiler.dump_stats(str(path))
+        info = {"stage": name, "pid": os.getpid(), "wall_s": round(wall, 6), "cpu_s": round(cpu, 6), "peak_bytes": peak, "allocations": allocations}
+        path.with_suffix(".alloc.json").write_text(json.dumps(info, indent=2), encoding="utf-8")
+
+
+def summarize(directory, top=20):
+    """Return a text summary of every stage profile in directory."""
+    directory = Path(directory)
+    prof_files = sorted(directory.glob("*.prof"))
+    if not prof_files:
+        return f"No profiles found in {directory}"
+    stages = []
+    for prof in prof_files:
+        info_path = prof.with_suffix(".alloc.json")
+        if info_path.exists():
+            stages.append(json.loads(info_path.read_text(encoding="utf-8")))
+
+    out = io.StringIO()
+    stats = pstats.Stats(*(str(p) for p in prof_files), stream=out)
+    stats.strip_dirs()
+    out.write(f"=== Hot functions by cumulative time ({len(prof_files)} stages) ===\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write("=== Hot functions by own time ===\n")
+    stats.sort_stats("tottime").print_stats(top)
+
+    sites = {}
+    for info in stages:
+        for a in info["allocations"]:
+            site = sites.setdefault(a["site"], {"size": 0, "count": 0, "stages": 0})
+            site["size"] += a["size_diff"]
+            site["count"] += a["count_diff"]
+            site["stages"] += 1
+    out.write("=== Largest allocation sites (memory retained at the end of each stage, summed) ===\n")
+    for name, s in sorted(sites.items(), key=lambda item: item[1]["size"], reverse=True)[:top]:
+        out.write(f"{s['size'] / 1e6:10.2f} MB {s['count']:>9} blocks {s['stages']:>5} stages  {name}\n")
+
+    out.write("\n=== Stages ===\n")
+    out.write(f"{'wall_s':>9} {'cpu_s':>9} {'peak_MB':>9}  stage\n")
+    for info in sorted(stages, key=lambda i: i["wall_s"], reverse=True):
+        out.write(f"{info['wall_s']:9.3f} {info['cpu_s']:9.3f} {info['peak_bytes'] / 1e6:9.2f}  {info['stage']}\n")
+    return out.getvalue()
+
+
+def write_summary(directory=None, top=20):
+    """Write summary.txt for a profile directory (default: the enabled one) and return its path."""
+    directory = Path(directory or _output_dir)
+    path = directory / "summary.txt"
+    path.write_text(summarize(directory, top), encoding="utf-8")
+    return path
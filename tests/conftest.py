@@ -0,0 +1,36 @@
+import pytest
+import joblib
+import xgboost as xgb
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+
+@pytest.fixture
+def model_dir_with_mock_model(tmp_path):
+    """Prepare a minimal XGBoost model, vectorizer, and label encoder on disk."""
+    model_dir = tmp_path / "models"
+    model_dir.mkdir(parents=True)
+
+    # Fake small training dataset
+    texts = ["predator stomach content", "fish prey analysis", "rock study geology", "mineral content paper"]
+    labels = ["useful", "useful", "not useful", "not useful"]
+
+    # Encode labels
+    enc = LabelEncoder()
+    y = enc.fit_transform(labels)
+
+    # Vectorize text
+    vectorizer = TfidfVectorizer(max_features=6)
+    X = vectorizer.fit_transform(texts)
+
+    # Train tiny XGBoost model
+    dtrain = xgb.DMatrix(X, label=y)
+    params = {"objective": "binary:logistic", "eval_metric": "logloss"}
+    model = xgb.train(params, dtrain, num_boost_round=3)
+
+    # Save artifacts
+    model.save_model(str(model_dir / "pdf_classifier.json"))
+    joblib.dump(vectorizer, model_dir / "tfidf_vectorizer.pkl")
+    joblib.dump(enc, model_dir / "label_encoder.pkl")
+
+    return model_dir
@@ -0,0 +1,158 @@
+import http.client
+import json
+import os
+import socket
+import stat
+import threading
+import time
+import urllib.request
+import fitz
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+from src.model import pdf_classifier
+from src.model.pdf_classifier import load_classifier
+from src.model.classifier_service import BatchPredictor, make_server
+
+
+def _start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def running_server(model_dir_with_mock_model):
+    # Extraction is mocked in these tests, and mocks can't be sent to worker processes
+    server = make_server(load_classifier(model_dir_with_mock_model), port=0, extractor=ThreadPoolExecutor(4))
+    yield _start(server)
+    _stop(server)
+
+
+def _post(url, body, content_type):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_batch_predictor_groups_concurrent_requests(model_dir_with_mock_model):
+    predictor = BatchPredictor(load_classifier(model_dir_with_mock_model), max_batch=8, max_wait=0.2)
+    futures = [predictor.submit("predator stomach content") for _ in range(5)]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert all(r["label"] in {"useful", "not useful"} for r in results)
+    assert max(r["batch_size"] for r in results) > 1
+    assert all(r["timings"]["queue_s"] >= 0 for r in results)
+
+
+def test_health(running_server):
+    with urllib.request.urlopen(running_server + "/health") as resp:
+        assert json.loads(resp.read()) == {"status": "ok"}
+
+
+@patch("src.model.pdf_classifier.extract_text_from_pdf", return_value="predator stomach content analysis")
+def test_classify_by_path(mock_extract, running_server, tmp_path):
+    pdf_path = tmp_path / "paper.pdf"
+    pdf_path.touch()
+    status, result = _post(running_server + "/classify", json.dumps({"pdf_path": str(pdf_path)}).encode(), "application/json")
+
+    assert status == 200
+    assert result["file"] == str(pdf_path)
+    assert result["label"] in {"useful", "not useful"}
+    assert set(result["timings"]) == {"extract_s", "queue_s", "predict_s", "total_s"}
+
+
+@patch("src.model.classifier_service.extract_text_from_pdf_bytes", return_value="fish prey analysis")
+def test_classify_raw_bytes(mock_extract, running_server):
+    status, result = _post(running_server + "/classify", b"%PDF-1.4", "application/pdf")
+    assert status == 200
+    mock_extract.assert_called_once_with(b"%PDF-1.4")
+
+
+def test_classify_missing_file(running_server, tmp_path):
+    status, result = _post(running_server + "/classify", json.dumps({"pdf_path": str(tmp_path / "missing.pdf")}).encode(), "application/json")
+    assert status == 404
+
+
+def test_classify_bad_request(running_server):
+    status, result = _post(running_server + "/classify", b"not json", "application/json")
+    assert status == 400
+
+
+def test_invalid_content_length(running_server):
+    conn = http.client.HTTPConnection(running_server.removeprefix("http://"))
+    conn.putrequest("POST", "/classify")
+    conn.putheader("Content-Length", "abc")
+    conn.endheaders()
+    assert conn.getresponse().status == 400
+    conn.close()
+
+
+def test_concurrent_requests_share_a_prediction_batch(model_dir_with_mock_model):
+    server = make_server(load_classifier(model_dir_with_mock_model), port=0, max_wait=0.1, extractor=ThreadPoolExecutor(4))
+    url = _start(server)
+    # Every extraction waits for the others, so this only passes if requests extract concurrently
+    barrier = threading.Barrier(4, timeout=5)
+
+    def slow_extract(data):
+        barrier.wait()
+        return "fish prey analysis"
+
+    try:
+        with (
+            patch("src.model.classifier_service.extract_text_from_pdf_bytes", side_effect=slow_extract),
+            patch.object(pdf_classifier, "predict_texts", wraps=pdf_classifier.predict_texts) as mock_predict,
+        ):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(_post(url + "/classify", b"%PDF-1.4", "application/pdf"))) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+    finally:
+        _stop(server)
+    assert [status for status, _ in results] == [200] * 4
+    assert max(len(call.args[1]) for call in mock_predict.call_args_list) > 1
+
+
+def test_default_extractor_runs_in_worker_processes(model_dir_with_mock_model):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "predator stomach content")
+    data = doc.tobytes()
+    doc.close()
+
+    server = make_server(load_classifier(model_dir_with_mock_model), port=0, extract_workers=2)
+    url = _start(server)
+    try:
+        status, result = _post(url + "/classify", data, "application/pdf")
+    finally:
+        _stop(server)
+    assert status == 200
+    assert result["label"] in {"useful", "not useful"}
+
+
+def test_unix_socket_replaces_stale_socket(model_dir_with_mock_model, tmp_path):
+    socket_path = tmp_path / "svc.sock"
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    server = make_server(load_classifier(model_dir_with_mock_model), socket_path=socket_path)
+    server.server_close()
+    assert stat.S_ISSOCK(os.lstat(socket_path).st_mode)
+
+
+def test_unix_socket_refuses_to_delete_regular_file(model_dir_with_mock_model, tmp_path):
+    path = tmp_path / "important.txt"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        make_server(load_classifier(model_dir_with_mock_model), socket_path=path)
+    assert path.read_text(encoding="utf-8") == "keep me"
@@ -0,0 +1,89 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from src.preprocessing.corpus_index import CorpusIndex
+from src.preprocessing.corpus_store import import_directory
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    data_dir = tmp_path / "processed-text"
+    data_dir.mkdir()
+    (data_dir / "a.txt").write_text("Stomach contents of seals; 12 stomachs were empty.\fPage two.", encoding="utf-8")
+    (data_dir / "b.txt").write_text("The stomach was full and its contents were fish. Nothing was empty.", encoding="utf-8")
+    (data_dir / "c.txt").write_text("Igneous rock stability study. Café samples.", encoding="utf-8")
+    labels = tmp_path / "labels.json"
+    labels.write_text(json.dumps({"a.txt": "useful", "b.txt": "not-useful", "c.txt": "not-useful"}), encoding="utf-8")
+    return data_dir, labels
+
+
+def test_boolean_phrase_and_label_queries(tmp_path, corpus):
+    data_dir, labels = corpus
+    with CorpusIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(data_dir) == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+        index.sync_labels(labels)
+        assert sorted(h["name"] for h in index.search("stomach AND empty")) == ["a.txt", "b.txt"]
+        assert [h["name"] for h in index.search('"stomach contents"')] == ["a.txt"]
+        assert [h["name"] for h in index.search('rock OR ("stomach contents" NOT seals)')] == ["c.txt"]
+        hits = index.search("stomach AND empty", label="not-useful")
+        assert [(h["name"], h["label"]) for h in hits] == [("b.txt", "not-useful")]
+        assert "[empty]" in hits[0]["snippet"]
+        assert [h["name"] for h in index.search("cafe")] == ["c.txt"]
+        assert index.count("stomach") == {"useful": 1, "not-useful": 1}
+        with pytest.raises(sqlite3.OperationalError):
+            index.search('"unbalanced')
+
+
+def test_update_is_incremental(tmp_path, corpus):
+    data_dir, _ = corpus
+    db = tmp_path / "index.sqlite"
+    with CorpusIndex(db) as index:
+        index.update(data_dir)
+    (data_dir / "b.txt").write_text("Now about penguins.", encoding="utf-8")
+    os.utime(data_dir / "b.txt", ns=(1, 1))
+    (data_dir / "c.txt").unlink()
+    (data_dir / "d.txt").write_text("More penguins.", encoding="utf-8")
+    with CorpusIndex(db) as index:
+        assert index.update(data_dir) == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+        assert len(index) == 3
+        assert sorted(h["name"] for h in index.search("penguins")) == ["b.txt", "d.txt"]
+        assert index.search("rock") == []
+        assert index.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 3
+
+
+def test_labels_reload_when_changed(tmp_path, corpus):
+    data_dir, labels = corpus
+    with CorpusIndex(tmp_path / "index.sqlite") as index:
+        index.update(data_dir)
+        assert index.sync_labels(labels)
+        assert not index.sync_labels(labels)
+        labels.write_text(json.dumps({"a.txt": "not-useful"}), encoding="utf-8")
+        os.utime(labels, ns=(2, 2))
+        assert index.sync_labels(labels)
+        assert index.count("stomach") == {"not-useful": 1, None: 1}
+
+
+def test_indexes_corpus_store(tmp_path, corpus):
+    data_dir, _ = corpus
+    import_directory(data_dir, tmp_path / "store")
+    with CorpusIndex(tmp_path / "index.sqlite") as index:
+        assert index.update(tmp_path / "store")["added"] == 3
+        assert index.update(tmp_path / "store")["unchanged"] == 3
+        assert [h["name"] for h in index.search("seals")] == ["a.txt"]
+
+
+def test_cli_build_and_query(tmp_path, corpus):
+    data_dir, labels = corpus
+    db = tmp_path / "index.sqlite"
+    cli = [sys.executable, "src/preprocessing/corpus_index.py", "--db", str(db), "--labels", str(labels)]
+    assert subprocess.run(cli + ["build", "--data-dir", str(data_dir)], capture_output=True, text=True).returncode == 0
+    result = subprocess.run(cli + ["query", "stomach AND empty", "--label", "not-useful"], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert "b.txt  [not-useful]" in result.stdout
+    assert "a.txt" not in result.stdout
+    bad = subprocess.run(cli + ["query", "non-empty"], capture_output=True, text=True)
+    assert bad.returncode == 1
+    assert "[ERROR] Invalid query" in bad.stdout
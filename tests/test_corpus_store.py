@@ -0,0 +1,131 @@
+import json
+import pytest
+import subprocess
+from pathlib import Path
+from src.preprocessing import corpus_store
+from src.preprocessing.corpus_store import CorpusStore, import_directory, export_directory, is_corpus_store
+from src.preprocessing.data_loader import load_processed_text
+from src.model.train_model import load_labeled_data
+
+
+@pytest.fixture
+def text_dir(tmp_path):
+    data_dir = tmp_path / "processed-text"
+    data_dir.mkdir()
+    (data_dir / "useful1.txt").write_text("predator diet stomach contents", encoding="utf-8")
+    (data_dir / "useful2.txt").write_text("Café empty stomachs " * 50, encoding="utf-8")
+    (data_dir / "notuseful1.txt").write_text("igneous rock stability study", encoding="utf-8")
+    return data_dir
+
+
+def test_add_and_get(tmp_path):
+    with CorpusStore(tmp_path / "corpus") as store:
+        store.add("a.txt", "first")
+        store.add("b.txt", "second")
+        assert store.get("a.txt") == "first"
+        assert store.get("b.txt") == "second"
+        assert store.get("missing.txt") is None
+        assert "a.txt" in store
+        assert len(store) == 2
+
+
+def test_readd_replaces_and_persists(tmp_path):
+    with CorpusStore(tmp_path / "corpus") as store:
+        store.add("a.txt", "old")
+        store.add("a.txt", "new")
+    with CorpusStore(tmp_path / "corpus") as reopened:
+        assert reopened.get("a.txt") == "new"
+        assert len(reopened) == 1
+
+
+def test_shards_roll_over(tmp_path):
+    with CorpusStore(tmp_path / "corpus", max_shard_bytes=10) as store:
+        store.add_many((f"doc{i}.txt", f"text number {i}") for i in range(5))
+        assert len(list((tmp_path / "corpus").glob("shard-*.bin"))) == 5
+        assert [name for name, _ in store.iter_documents()] == [f"doc{i}.txt" for i in range(5)]
+        assert store.get("doc3.txt") == "text number 3"
+
+
+def test_torn_index_line_is_ignored(tmp_path):
+    with CorpusStore(tmp_path / "corpus") as store:
+        store.add("a.txt", "first")
+    with open(tmp_path / "corpus" / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"name": "b.txt", "sha')
+    assert CorpusStore(tmp_path / "corpus").names() == ["a.txt"]
+
+
+def test_compact_drops_superseded_copies(tmp_path):
+    with CorpusStore(tmp_path / "corpus") as store:
+        store.add("a.txt", "x" * 1000)
+        store.add("a.txt", "y")
+        before = sum(p.stat().st_size for p in (tmp_path / "corpus").glob("shard-*.bin"))
+        store.compact()
+        after = sum(p.stat().st_size for p in (tmp_path / "corpus").glob("shard-*.bin"))
+        assert store.get("a.txt") == "y"
+    assert after < before
+
+
+def test_compact_survives_reopen_and_multiple_shards(tmp_path):
+    with CorpusStore(tmp_path / "corpus", max_shard_bytes=64) as store:
+        for i in range(10):
+            store.add(f"doc{i}.txt", f"old {i} " * 20)
+        for i in range(10):
+            store.add(f"doc{i}.txt", f"new {i}")
+        store.compact()
+    with CorpusStore(tmp_path / "corpus") as reopened:
+        assert dict(reopened.iter_documents()) == {f"doc{i}.txt": f"new {i}" for i in range(10)}
+    assert [p.name for p in tmp_path.iterdir()] == ["corpus"]
+
+
+def test_failed_compact_leaves_store_intact(tmp_path, monkeypatch):
+    with CorpusStore(tmp_path / "corpus") as store:
+        store.add("a.txt", "x" * 1000)
+        store.add("a.txt", "y")
+        store.add("b.txt", "b")
+    real_replace = corpus_store.os.replace
+
+    def failing_replace(src, dst):
+        if Path(dst).name == "index.jsonl":
+            raise OSError(28, "No space left on device")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(corpus_store.os, "replace", failing_replace)
+    with CorpusStore(tmp_path / "corpus") as store:
+        with pytest.raises(OSError):
+            store.compact()
+    monkeypatch.undo()
+    with CorpusStore(tmp_path / "corpus") as reopened:
+        assert dict(reopened.iter_documents()) == {"a.txt": "y", "b.txt": "b"}
+    assert [p.name for p in tmp_path.iterdir()] == ["corpus"]
+
+
+def test_import_export_roundtrip(text_dir, tmp_path):
+    store_path = tmp_path / "corpus"
+    assert import_directory(text_dir, store_path) == 3
+    assert is_corpus_store(store_path)
+    assert export_directory(store_path, tmp_path / "exported") == 3
+    for f in text_dir.glob("*.txt"):
+        assert (tmp_path / "exported" / f.name).read_text(encoding="utf-8") == f.read_text(encoding="utf-8")
+
+
+def test_loaders_read_corpus_store(text_dir, tmp_path):
+    store_path = tmp_path / "corpus"
+    import_directory(text_dir, store_path)
+    labels_file = tmp_path / "labels.json"
+    labels_file.write_text(json.dumps({"useful1.txt": "useful", "notuseful1.txt": "not useful"}), encoding="utf-8")
+
+    assert sorted(load_processed_text(str(store_path))) == sorted(f.read_text(encoding="utf-8") for f in text_dir.glob("*.txt"))
+
+    texts, labels, filenames = load_labeled_data(store_path, labels_file)
+    assert sorted(filenames) == ["notuseful1.txt", "useful1.txt"]
+    assert dict(zip(filenames, labels)) == {"useful1.txt": "useful", "notuseful1.txt": "not useful"}
+
+
+def test_cli_import(text_dir, tmp_path):
+    result = subprocess.run(
+        ["python", "src/preprocessing/corpus_store.py", "import", str(text_dir), str(tmp_path / "corpus")],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "Imported 3 documents" in result.stdout
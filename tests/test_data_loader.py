@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
 from src.preprocessing.data_loader import load_processed_text
+import os
 import subprocess
 import shutil
 
@@ -88,11 +89,13 @@ def test_data_loader_main_executes(tmp_path):
     tmp_script_path = tmp_path / "data_loader.py"
     shutil.copy(script_path, tmp_script_path)
 
+    # The copy lives outside the repo, so point it at the repo's src package
     result = subprocess.run(
         ["python", str(tmp_script_path)],
         cwd=tmp_path,
         capture_output=True,
         text=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])},
     )
 
     assert result.returncode == 0
@@ -0,0 +1,306 @@
+import threading
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from scripts.google_drive import drive_io
+from scripts.google_drive.drive_io import ConcurrentDownloader, MemoryBudget, SpooledPDF, download_file_spooled
+
+
+class FakeMedia:
+    def __init__(self, data, error=None):
+        self.data = data
+        self.error = error
+
+
+class FakeService:
+    """files().get_media() for a fixed set of contents; `errors` are raised by the next download of a file, one per attempt."""
+
+    def __init__(self, contents, errors=None):
+        self.contents = contents
+        self.errors = errors or {}
+        self.requests = []
+
+    def files(self):
+        return self
+
+    def get_media(self, fileId, supportsAllDrives=False):
+        self.requests.append(fileId)
+        pending = self.errors.get(fileId)
+        return FakeMedia(self.contents.get(fileId, b""), pending.pop(0) if pending else None)
+
+
+class FakeMediaDownload:
+    """Stands in for MediaIoBaseDownload: writes the media to fd in chunksize pieces."""
+
+    def __init__(self, fd, request, chunksize):
+        self.fd = fd
+        self.request = request
+        self.chunksize = chunksize
+        self.pos = 0
+
+    def next_chunk(self):
+        if self.request.error is not None:
+            raise self.request.error
+        chunk = self.request.data[self.pos : self.pos + self.chunksize]
+        self.fd.write(chunk)
+        self.pos += len(chunk)
+        return None, self.pos >= len(self.request.data)
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"error")
+
+
+@pytest.fixture(autouse=True)
+def fake_media_download(monkeypatch):
+    monkeypatch.setattr(drive_io, "MediaIoBaseDownload", FakeMediaDownload)
+    monkeypatch.setattr(drive_io.time, "sleep", lambda seconds: None)
+
+
+def make_downloader(service, **kwargs):
+    downloader = ConcurrentDownloader(credentials=object(), **kwargs)
+    downloader._service = lambda: service
+    return downloader
+
+
+def files_of(sizes):
+    return [{"id": f"f{i}", "name": f"f{i}.pdf", "size": str(size)} for i, size in enumerate(sizes)]
+
+
+def test_spooled_pdf_stays_in_memory_below_threshold():
+    with SpooledPDF(threshold=10) as payload:
+        payload.write(b"12345")
+        payload.write(b"67890")
+        assert not payload.spooled
+        assert bytes(payload.view()) == b"1234567890"
+        assert payload.nbytes == 10
+
+
+def test_spooled_pdf_spills_to_disk_past_threshold():
+    with SpooledPDF(threshold=8) as payload:
+        payload.write(b"12345")
+        assert not payload.spooled
+        payload.write(b"6789")
+        assert payload.spooled
+        payload.write(b"abc")
+        assert bytes(payload.view()) == b"123456789abc"
+        assert payload.nbytes == 12
+
+
+def test_spooled_pdf_size_hint_spools_up_front():
+    with SpooledPDF(threshold=8, size_hint=100) as payload:
+        assert payload.spooled
+        assert bytes(payload.view()) == b""
+
+
+def test_spooled_pdf_close_runs_on_close_once():
+    calls = []
+    payload = SpooledPDF(threshold=4, on_close=lambda: calls.append(1))
+    payload.write(b"123456")
+    payload.view()
+    payload.close()
+    payload.close()
+    assert calls == [1]
+    assert payload.closed
+
+
+def test_download_file_spooled_spools_large_files():
+    service = FakeService({"big": b"x" * 5000, "small": b"y" * 10})
+    with download_file_spooled(service, {"id": "big", "size": "5000"}, threshold=1024) as payload:
+        assert payload.spooled
+        assert bytes(payload.view()) == b"x" * 5000
+    with download_file_spooled(service, {"id": "small", "size": "10"}, threshold=1024) as payload:
+        assert not payload.spooled
+
+
+def test_memory_budget_non_blocking_acquire():
+    budget = MemoryBudget(100)
+    assert budget.acquire(60) == 60
+    assert budget.acquire(60, blocking=False) is None
+    budget.release(60)
+    assert budget.acquire(60, blocking=False) == 60
+    assert budget.peak == 60
+
+
+def test_memory_budget_caps_oversized_requests():
+    budget = MemoryBudget(100)
+    assert budget.acquire(500) == 100
+    assert budget.acquire(1, blocking=False) is None
+    budget.release(100)
+    assert budget.in_use == 0
+
+
+def test_memory_budget_release_wakes_waiter():
+    budget = MemoryBudget(100)
+    budget.acquire(100)
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (budget.acquire(50), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.05)
+    budget.release(100)
+    waiter.join(timeout=5)
+    assert acquired.is_set()
+
+
+def test_download_releases_budget_as_payloads_close():
+    files = files_of([100, 200, 300])
+    service = FakeService({f["id"]: b"x" * int(f["size"]) for f in files})
+    budget = MemoryBudget(1000)
+    downloader = make_downloader(service, workers=2, budget=budget)
+
+    received = {}
+    for f, payload in downloader.download(files):
+        with payload:
+            assert budget.in_use >= int(f["size"])
+            received[f["id"]] = bytes(payload.view())
+    assert received == {f["id"]: b"x" * int(f["size"]) for f in files}
+    assert budget.in_use == 0
+    assert budget.peak <= 1000
+
+
+def test_download_stays_within_budget():
+    files = files_of([400] * 6)
+    service = FakeService({f["id"]: b"x" * 400 for f in files})
+    budget = MemoryBudget(1000)
+    downloader = make_downloader(service, workers=4, budget=budget)
+    for _, payload in downloader.download(files):
+        payload.close()
+    assert budget.peak <= 800
+    assert budget.in_use == 0
+
+
+def test_download_releases_budget_when_consumer_stops_early():
+    files = files_of([100] * 6)
+    service = FakeService({f["id"]: b"x" * 100 for f in files})
+    budget = MemoryBudget(10_000)
+    downloader = make_downloader(service, workers=2, budget=budget)
+
+    stream = downloader.download(files)
+    _, payload = next(stream)
+    payload.close()
+    stream.close()
+    assert budget.in_use == 0
+
+
+def test_download_releases_budget_on_failure():
+    files = files_of([100, 100, 100])
+    service = FakeService({f["id"]: b"x" * 100 for f in files}, errors={"f1": [http_error(404)]})
+    budget = MemoryBudget(10_000)
+    downloader = make_downloader(service, workers=2, budget=budget)
+
+    with pytest.raises(HttpError):
+        for _, payload in downloader.download(files):
+            payload.close()
+    assert budget.in_use == 0
+
+
+def test_download_can_return_exceptions():
+    files = files_of([100, 100, 100])
+    service = FakeService({f["id"]: b"x" * 100 for f in files}, errors={"f1": [http_error(404)]})
+    budget = MemoryBudget(10_000)
+    downloader = make_downloader(service, workers=2, budget=budget)
+
+    results = {}
+    for f, payload in downloader.download(files, return_exceptions=True):
+        if isinstance(payload, Exception):
+            results[f["id"]] = "error"
+        else:
+            payload.close()
+            results[f["id"]] = "ok"
+    assert results == {"f0": "ok", "f1": "error", "f2": "ok"}
+    assert budget.in_use == 0
+
+
+def test_file_larger_than_budget_is_admitted_alone():
+    files = files_of([100, 5000, 100])
+    service = FakeService({f["id"]: b"x" * int(f["size"]) for f in files})
+    budget = MemoryBudget(1000)
+    downloader = make_downloader(service, workers=2, budget=budget, spool_threshold=512)
+    done = []
+
+    def consume():
+        for f, payload in downloader.download(files):
+            with payload:
+                done.append((f["id"], payload.nbytes))
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    consumer.join(timeout=5)
+    assert not consumer.is_alive(), "download deadlocked"
+    assert sorted(done) == [("f0", 100), ("f1", 5000), ("f2", 100)]
+    assert budget.in_use == 0
+    assert budget.peak <= 1000
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(drive_io.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried_with_backoff(status, sleeps):
+    service = FakeService({"f0": b"pdf"}, errors={"f0": [http_error(status), http_error(status)]})
+    retries = []
+    downloader = make_downloader(service, max_retries=3, on_download=lambda f, nbytes, seconds, n: retries.append(n))
+
+    with downloader.download_one({"id": "f0", "name": "f0.pdf"}) as payload:
+        assert bytes(payload.view()) == b"pdf"
+    assert service.requests == ["f0"] * 3
+    assert retries == [2]
+    assert len(sleeps) == 2
+    assert 1 <= sleeps[0] <= 2 and 2 <= sleeps[1] <= 3
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_other_client_errors_are_not_retried(status, sleeps):
+    service = FakeService({"f0": b"pdf"}, errors={"f0": [http_error(status)]})
+    downloader = make_downloader(service, max_retries=3)
+    with pytest.raises(HttpError):
+        downloader.download_one({"id": "f0", "name": "f0.pdf"})
+    assert service.requests == ["f0"]
+    assert sleeps == []
+
+
+def test_network_errors_are_retried(sleeps):
+    service = FakeService({"f0": b"pdf"}, errors={"f0": [ConnectionResetError("reset"), httplib2.HttpLib2Error("bad")]})
+    downloader = make_downloader(service, max_retries=3)
+    with downloader.download_one({"id": "f0", "name": "f0.pdf"}) as payload:
+        assert bytes(payload.view()) == b"pdf"
+    assert len(sleeps) == 2
+
+
+def test_gives_up_after_max_retries(sleeps):
+    service = FakeService({"f0": b"pdf"}, errors={"f0": [http_error(503)] * 10})
+    downloader = make_downloader(service, max_retries=2)
+    with pytest.raises(HttpError):
+        downloader.download_one({"id": "f0", "name": "f0.pdf"})
+    assert service.requests == ["f0"] * 3
+    assert len(sleeps) == 2
+
+
+def test_other_exceptions_are_not_retried(sleeps):
+    service = FakeService({"f0": b"pdf"}, errors={"f0": [ValueError("bug")]})
+    downloader = make_downloader(service, max_retries=3)
+    with pytest.raises(ValueError):
+        downloader.download_one({"id": "f0", "name": "f0.pdf"})
+    assert sleeps == []
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        (None, 1024 * 1024),
+        (0, 1024 * 1024),
+        (1, drive_io.MIN_CHUNK_SIZE),
+        (drive_io.MIN_CHUNK_SIZE, drive_io.MIN_CHUNK_SIZE),
+        (drive_io.MIN_CHUNK_SIZE + 1, 2 * drive_io.MIN_CHUNK_SIZE),
+        (drive_io.MAX_CHUNK_SIZE - 1, drive_io.MAX_CHUNK_SIZE),
+        (drive_io.MAX_CHUNK_SIZE, drive_io.MAX_CHUNK_SIZE),
+        (drive_io.MAX_CHUNK_SIZE + 1, drive_io.MAX_CHUNK_SIZE),
+        (10 * drive_io.MAX_CHUNK_SIZE, drive_io.MAX_CHUNK_SIZE),
+    ],
+)
+def test_chunk_size_for(size, expected):
+    assert drive_io.chunk_size_for(size) == expected
@@ -0,0 +1,93 @@
+import os
+import pytest
+import fitz
+from unittest.mock import patch
+from src.preprocessing.extraction_cache import ExtractionCache, make_cache_key
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf_bytes, extract_text_from_pdf
+
+
+def _pdf_bytes(text):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_cache_key_depends_on_bytes_and_version():
+    assert make_cache_key(b"abc", "1") == make_cache_key(b"abc", "1")
+    assert make_cache_key(b"abc", "1") != make_cache_key(b"abd", "1")
+    assert make_cache_key(b"abc", "1") != make_cache_key(b"abc", "2")
+
+
+def test_cache_put_and_get(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, "stomach contents")
+    assert cache.get("ab" * 32) == "stomach contents"
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=25)
+    cache.put("aa" * 32, "x" * 10)
+    cache.put("bb" * 32, "y" * 10)
+    # Make the first entry the oldest, then touch it so the second becomes LRU
+    os.utime(cache._path("aa" * 32), (1, 1))
+    os.utime(cache._path("bb" * 32), (2, 2))
+    cache.get("aa" * 32)
+    cache.put("cc" * 32, "z" * 10)
+
+    assert cache.get("bb" * 32) is None
+    assert cache.get("aa" * 32) == "x" * 10
+    assert cache.get("cc" * 32) == "z" * 10
+
+
+def test_cache_size_is_restored_on_reopen(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    cache.put("aa" * 32, "x" * 10)
+    reopened = ExtractionCache(tmp_path / "cache")
+    assert reopened._total_bytes == 10
+
+
+def test_cache_overwrite_replaces_size(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=100)
+    cache.put("bb" * 32, "y" * 30)
+    for _ in range(5):
+        cache.put("aa" * 32, "x" * 60)
+    assert cache._total_bytes == 90
+    cache.put("aa" * 32, "x" * 20)
+    assert cache._total_bytes == 50
+    assert cache.get("bb" * 32) == "y" * 30
+
+
+def test_extract_bytes_hit_skips_fitz(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    data = _pdf_bytes("predator diet survey")
+
+    first = extract_text_from_pdf_bytes(data, cache=cache)
+    assert "predator diet survey" in first
+
+    with patch("fitz.open", side_effect=AssertionError("fitz opened")):
+        second = extract_text_from_pdf_bytes(data, cache=cache)
+    assert second == first
+    assert cache.hits == 1
+
+
+def test_extract_bytes_failure_is_not_cached(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    assert extract_text_from_pdf_bytes(b"not a pdf", cache=cache) == ""
+    assert list((tmp_path / "cache").glob("*/*.txt")) == []
+
+
+def test_extract_path_uses_cache(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(_pdf_bytes("empty stomachs"))
+
+    extract_text_from_pdf(str(pdf_path), cache=cache)
+    text = extract_text_from_pdf(str(pdf_path), cache=cache)
+    assert "empty stomachs" in text
+    assert cache.hits == 1
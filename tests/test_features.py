@@ -0,0 +1,66 @@
+import joblib
+import numpy as np
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.model.features import HashingTfidfVectorizer, make_vectorizer
+from src.model.train_model import train_pdf_classifier
+from src.model.pdf_classifier import classify_pdfs
+
+TEXTS = [
+    "predator stomach contents were examined",
+    "empty stomachs of predatory fish",
+    "igneous rock stability study",
+    "basalt chemistry of the mantle",
+    "fish prey analysis of stomach contents",
+    "mineral concentration profile",
+]
+LABELS = ["useful", "useful", "not useful", "not useful", "useful", "not useful"]
+
+
+def test_hashing_matches_tfidf_without_collisions():
+    params = {"ngram_range": (1, 1), "stop_words": None}
+    hashed = HashingTfidfVectorizer(n_features=2**20, **params).fit_transform(TEXTS)
+    exact = TfidfVectorizer(**params).fit_transform(TEXTS)
+
+    # Same documents, same weights, just different column positions
+    for i in range(len(TEXTS)):
+        assert np.allclose(np.sort(hashed[i].data), np.sort(exact[i].data), atol=1e-6)
+
+
+def test_hashing_transform_uses_fitted_idf():
+    vec = HashingTfidfVectorizer(n_features=2**12).fit(TEXTS)
+    X = vec.transform(["stomach contents", "unseen words entirely"])
+    assert X.shape == (2, 2**12)
+    assert np.allclose(np.sqrt(X.multiply(X).sum(axis=1)).A1, 1.0)
+
+
+def test_hashing_parallel_shards_match_serial():
+    serial = HashingTfidfVectorizer(n_features=2**12, shard_size=2).fit_transform(TEXTS)
+    parallel = HashingTfidfVectorizer(n_features=2**12, shard_size=2, n_jobs=2).fit_transform(TEXTS)
+    assert (serial != parallel).nnz == 0
+
+
+def test_hashing_vectorizer_pickles_small(tmp_path):
+    vec = HashingTfidfVectorizer(n_features=2**12, n_jobs=4).fit(TEXTS)
+    joblib.dump(vec, tmp_path / "vec.pkl")
+    loaded = joblib.load(tmp_path / "vec.pkl")
+    assert loaded.n_jobs == 1
+    assert (loaded.transform(TEXTS) != vec.transform(TEXTS)).nnz == 0
+
+
+def test_make_vectorizer_unknown_backend():
+    with pytest.raises(ValueError):
+        make_vectorizer("word2vec")
+
+
+def test_train_and_classify_with_hashing_backend(tmp_path):
+    output_dir = tmp_path / "models"
+    result = train_pdf_classifier(TEXTS, LABELS, output_dir, feature_backend="hashing")
+    assert result is not None
+    assert isinstance(joblib.load(output_dir / "tfidf_vectorizer.pkl"), HashingTfidfVectorizer)
+
+    with patch("src.model.pdf_classifier.extract_text_from_pdf", return_value="predator stomach contents"):
+        records = list(classify_pdfs([Path("a.pdf")], output_dir))
+    assert records[0]["label"] in {"useful", "not useful"}
@@ -0,0 +1,112 @@
+import json
+import numpy as np
+import pytest
+from pathlib import Path
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.model.hyperparameter_search import fold_data, grid_candidates, random_candidates, run_search, search_pdf_classifier
+
+SPACE = {"eta": [0.1, 0.3], "max_depth": [2, 3], "subsample": [1.0]}
+
+
+@pytest.fixture
+def separable_features():
+    rng = np.random.default_rng(0)
+    y = np.array([0, 1] * 12)
+    X = rng.random((24, 8))
+    X[:, 0] += 2 * y  # first column separates the classes
+    return sparse.csr_matrix(X), y
+
+
+def test_grid_candidates_cover_every_combination():
+    candidates = grid_candidates(SPACE)
+    assert len(candidates) == 4
+    assert {"eta": 0.1, "max_depth": 2, "subsample": 1.0} in candidates
+
+
+def test_random_candidates_are_reproducible_and_distinct():
+    space = {"eta": [0.01, 0.1, 0.3], "max_depth": [2, 4, 6, 8]}
+    first = random_candidates(space, 5, seed=1)
+    assert first == random_candidates(space, 5, seed=1)
+    assert len({tuple(sorted(c.items())) for c in first}) == 5
+    assert len(random_candidates(space, 100)) == 12
+
+
+def test_run_search_ranks_by_logloss(separable_features):
+    X, y = separable_features
+    results = run_search(X, y, SPACE, strategy="grid", n_folds=3, num_boost_round=30)
+    assert len(results) == 4
+    losses = [r["logloss"] for r in results]
+    assert losses == sorted(losses)
+    assert all(r["best_rounds"] <= 30 for r in results)
+
+
+def test_run_search_parallel_matches_serial(separable_features):
+    X, y = separable_features
+    serial = run_search(X, y, SPACE, strategy="grid", n_folds=3, num_boost_round=20)
+    parallel = run_search(X, y, SPACE, strategy="grid", n_folds=3, num_boost_round=20, n_jobs=2)
+    assert [r["trial"] for r in serial] == [r["trial"] for r in parallel]
+    assert np.allclose([r["logloss"] for r in serial], [r["logloss"] for r in parallel])
+
+
+def test_successive_halving_narrows_candidates(separable_features):
+    X, y = separable_features
+    space = {"eta": [0.05, 0.1, 0.2, 0.3], "max_depth": [2, 3]}
+    results = run_search(X, y, space, strategy="halving", n_trials=8, n_folds=3, num_boost_round=45, min_rounds=5, factor=3)
+    per_rung = {}
+    for r in results:
+        per_rung.setdefault(r["rung"], []).append(r)
+    assert [len(per_rung[k]) for k in sorted(per_rung)] == [8, 3, 1]
+    assert [per_rung[k][0]["budget"] for k in sorted(per_rung)] == [5, 15, 45]
+    assert results[0]["rung"] == 2
+
+
+def test_fold_data_fits_vectorizer_on_training_texts_only():
+    texts = ["alpha shared", "beta shared", "gamma shared", "delta shared"]
+    y = np.array([0, 1, 0, 1])
+    folds = [(np.array([0, 1]), np.array([2, 3])), (np.array([2, 3]), np.array([0, 1]))]
+    fitted = []
+
+    def factory():
+        vectorizer = TfidfVectorizer()
+        fitted.append(vectorizer)
+        return vectorizer
+
+    data = fold_data(texts, y, folds, factory)
+    assert len(fitted) == 2
+    assert sorted(fitted[0].vocabulary_) == ["alpha", "beta", "shared"]
+    assert sorted(fitted[1].vocabulary_) == ["delta", "gamma", "shared"]
+    X_train, y_train, X_val, y_val = data[0]
+    assert X_train.shape == (2, 3) and X_val.shape == (2, 3)
+    assert list(y_train) == [0, 1] and list(y_val) == [0, 1]
+
+
+def test_run_search_with_per_fold_vectorizer():
+    texts = ["predator stomach prey", "fish diet stomach", "rock mineral basalt", "sediment grain rock"] * 4
+    y = np.array([1, 1, 0, 0] * 4)
+    results = run_search(texts, y, SPACE, strategy="grid", n_folds=2, num_boost_round=10, n_jobs=2, vectorizer_factory=TfidfVectorizer)
+    assert sorted(r["trial"] for r in results) == [0, 1, 2, 3]
+
+
+def test_run_search_rejects_unknown_strategy(separable_features):
+    X, y = separable_features
+    with pytest.raises(ValueError):
+        run_search(X, y, SPACE, strategy="bayes")
+
+
+def test_search_pdf_classifier_writes_results_and_best_model(tmp_path):
+    texts = ["predator stomach contents prey", "fish diet stomach analysis", "prey items in stomachs", "feeding ecology of predators", "diet of sharks stomach"] * 2
+    texts += ["igneous rock chemistry", "basalt mantle minerals", "sediment grain size", "geological survey of rocks", "mineral concentration profile"] * 2
+    labels = ["useful"] * 10 + ["not useful"] * 10
+
+    result = search_pdf_classifier(texts, labels, tmp_path, space=SPACE, strategy="grid", n_folds=2)
+    assert result is not None
+    assert (tmp_path / "pdf_classifier.json").exists()
+    assert (tmp_path / "search_results.csv").exists()
+    saved = json.loads((tmp_path / "search_results.json").read_text(encoding="utf-8"))
+    assert saved[0]["trial"] == result["best"]["trial"]
+
+
+def test_search_pdf_classifier_single_class(tmp_path, capsys):
+    assert search_pdf_classifier(["a", "b"], ["useful", "useful"], tmp_path) is None
+    assert "[ERROR]" in capsys.readouterr().out
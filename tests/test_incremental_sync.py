@@ -0,0 +1,189 @@
+import json
+import pytest
+from pathlib import Path
+import scripts.full_pipeline as full_pipeline
+from scripts.google_drive.drive_io import PDF_MIME_TYPE, SpooledPDF, incremental_changes, load_manifest
+from scripts.pipeline_metrics import PipelineMetrics
+
+
+class _Request:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeDrive:
+    """Just enough of the Drive v3 files/changes API for incremental_changes."""
+
+    def __init__(self, folders):
+        self.folders = folders  # folder id -> list of file dicts
+        self.changes_since = {}  # page token -> list of change dicts
+        self.token = "token-1"
+
+    def files(self):
+        return self
+
+    def changes(self):
+        return self
+
+    def list(self, **params):
+        if "pageToken" in params and params["pageToken"] in self.changes_since:
+            return _Request({"changes": self.changes_since[params["pageToken"]], "newStartPageToken": self.token})
+        folder_id = params["q"].split("'")[1]
+        return _Request({"files": list(self.folders.get(folder_id, []))})
+
+    def getStartPageToken(self, **params):
+        return _Request({"startPageToken": self.token})
+
+
+def pdf(file_id, md5, name=None, folder="U"):
+    return {"id": file_id, "name": name or f"{file_id}.pdf", "md5Checksum": md5, "modifiedTime": f"2024-01-01T00:00:00Z-{md5}", "size": "4", "mimeType": PDF_MIME_TYPE, "parents": [folder]}
+
+
+def change(f=None, file_id=None, removed=False):
+    return {"fileId": file_id or f["id"], "removed": removed, "file": f}
+
+
+FOLDERS = {"U": "useful", "N": "not-useful"}
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Run process_api_incremental against a FakeDrive; each PDF's 'text' is its md5."""
+    monkeypatch.chdir(tmp_path)
+    drive = FakeDrive({"U": [], "N": []})
+    downloaded = []
+
+    def download_stream(service, files, *args):
+        for f in files:
+            downloaded.append(f["id"])
+            payload = SpooledPDF()
+            payload.write(f["md5Checksum"].encode("utf-8"))
+            yield f, payload
+
+    monkeypatch.setattr(full_pipeline, "_connect_drive_folders", lambda: (drive, "U", "N"))
+    monkeypatch.setattr(full_pipeline, "_download_stream", download_stream)
+    monkeypatch.setattr(full_pipeline, "_extract_bytes", lambda view, name, cache, metrics: bytes(view).decode("utf-8"))
+
+    def run():
+        downloaded.clear()
+        full_pipeline.process_api_incremental(manifest_path=tmp_path / "manifest.json", metrics=PipelineMetrics("test"))
+        labels = json.loads(Path("data/labels.json").read_text(encoding="utf-8"))
+        return labels, load_manifest(tmp_path / "manifest.json")
+
+    run.drive = drive
+    run.downloaded = downloaded
+    return run
+
+
+def test_first_run_lists_every_pdf():
+    drive = FakeDrive({"U": [pdf("a", "m1")], "N": [pdf("b", "m2", folder="N")]})
+    delta = incremental_changes(drive, FOLDERS, {"page_token": None, "files": {}})
+    assert [(f["id"], f["label"]) for f in delta["pending"]] == [("a", "useful"), ("b", "not-useful")]
+    assert delta["duplicates"] == [] and delta["removed"] == []
+    assert delta["page_token"] == "token-1"
+
+
+def test_unchanged_file_in_changes_is_not_pending():
+    drive = FakeDrive({})
+    drive.changes_since["token-1"] = [change(pdf("a", "m1"))]
+    manifest = {"page_token": "token-1", "files": {"a": {"name": "a.pdf", "label": "useful", "txt_name": "a.txt", "md5Checksum": "m1"}}}
+    assert incremental_changes(drive, FOLDERS, manifest)["pending"] == []
+
+
+def test_moved_out_of_folders_counts_as_removed():
+    drive = FakeDrive({})
+    drive.changes_since["token-1"] = [change(pdf("a", "m1", folder="elsewhere")), change(pdf("z", "m9", folder="elsewhere"))]
+    manifest = {"page_token": "token-1", "files": {"a": {"name": "a.pdf", "label": "useful", "txt_name": "a.txt", "md5Checksum": "m1"}}}
+    assert incremental_changes(drive, FOLDERS, manifest)["removed"] == ["a"]
+
+
+def test_moved_to_other_folder_is_relabeled():
+    drive = FakeDrive({})
+    drive.changes_since["token-1"] = [change(pdf("a", "m1", folder="N"))]
+    manifest = {"page_token": "token-1", "files": {"a": {"name": "a.pdf", "label": "useful", "txt_name": "a.txt", "md5Checksum": "m1"}}}
+    delta = incremental_changes(drive, FOLDERS, manifest)
+    assert delta["pending"] == []
+    assert [(f["id"], f["label"]) for f in delta["relabeled"]] == [("a", "not-useful")]
+
+
+def test_first_run_with_duplicate_across_folders(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "same")], "N": [pdf("b", "same", folder="N")]}
+    labels, manifest = pipeline()
+    assert pipeline.downloaded == ["a"]
+    assert labels == {"a.txt": "useful"}
+    assert manifest["files"]["b"]["txt_name"] is None
+    assert manifest["page_token"] == "token-1"
+
+
+def test_new_modified_and_removed(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "m1"), pdf("b", "m2")], "N": [pdf("c", "m3", folder="N")]}
+    pipeline()
+    pipeline.drive.token = "token-2"
+    pipeline.drive.changes_since["token-1"] = [change(pdf("a", "m1-edited")), change(file_id="b", removed=True), change(pdf("d", "m4", folder="N"))]
+
+    labels, manifest = pipeline()
+
+    assert sorted(pipeline.downloaded) == ["a", "d"]
+    assert labels == {"a.txt": "useful", "c.txt": "not-useful", "d.txt": "not-useful"}
+    assert Path("data/processed-text/a.txt").read_text(encoding="utf-8") == "m1-edited"
+    assert not Path("data/processed-text/b.txt").exists()
+    assert set(manifest["files"]) == {"a", "c", "d"}
+    assert manifest["files"]["a"]["md5Checksum"] == "m1-edited"
+    assert manifest["page_token"] == "token-2"
+
+
+def test_duplicate_of_synced_file_is_skipped(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "same")], "N": []}
+    pipeline()
+    pipeline.drive.changes_since["token-1"] = [change(pdf("b", "same", folder="N"))]
+
+    labels, manifest = pipeline()
+
+    assert pipeline.downloaded == []
+    assert labels == {"a.txt": "useful"}
+    assert manifest["files"]["b"]["txt_name"] is None
+
+
+def test_duplicate_is_promoted_when_original_is_removed(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "same")], "N": [pdf("b", "same", folder="N")]}
+    pipeline()
+    pipeline.drive.changes_since["token-1"] = [change(file_id="a", removed=True)]
+
+    labels, manifest = pipeline()
+
+    assert pipeline.downloaded == ["b"]
+    assert labels == {"b.txt": "not-useful"}
+    assert not Path("data/processed-text/a.txt").exists()
+    assert set(manifest["files"]) == {"b"}
+    assert manifest["files"]["b"]["txt_name"] == "b.txt"
+
+
+def test_failed_document_keeps_page_token_and_is_retried(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "m1"), pdf("b", "")], "N": []}
+    labels, manifest = pipeline()
+    assert labels == {"a.txt": "useful"}
+    assert set(manifest["files"]) == {"a"}
+    assert manifest["page_token"] is None
+
+    pipeline.drive.folders["U"][1] = pdf("b", "m2")
+    labels, manifest = pipeline()
+    assert pipeline.downloaded == ["b"]
+    assert labels == {"a.txt": "useful", "b.txt": "useful"}
+    assert manifest["page_token"] == "token-1"
+
+
+def test_moved_file_is_relabeled_without_download(pipeline):
+    pipeline.drive.folders = {"U": [pdf("a", "m1"), pdf("b", "m2")], "N": []}
+    pipeline()
+    pipeline.drive.changes_since["token-1"] = [change(pdf("a", "m1", folder="N"))]
+
+    labels, manifest = pipeline()
+
+    assert pipeline.downloaded == []
+    assert labels == {"a.txt": "not-useful", "b.txt": "useful"}
+    assert manifest["files"]["a"]["label"] == "not-useful"
+    assert manifest["files"]["a"]["txt_name"] == "a.txt"
+    assert Path("data/processed-text/a.txt").read_text(encoding="utf-8") == "m1"
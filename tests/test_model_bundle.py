@@ -0,0 +1,77 @@
+import json
+import joblib
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.feature_extraction.text import TfidfVectorizer
+from src.model.features import HashingTfidfVectorizer
+from src.model.model_bundle import BUNDLE_FILE, convert_artifacts, load_bundle, save_bundle
+from src.model.pdf_classifier import load_classifier, predict_texts
+
+TEXTS = ["predator stomach content", "fish prey analysis", "rock study geology", "mineral content paper"]
+
+
+def test_converted_bundle_predicts_like_artifacts(model_dir_with_mock_model):
+    legacy = load_classifier(model_dir_with_mock_model)
+    bundle_path = convert_artifacts(model_dir_with_mock_model)
+    assert bundle_path == model_dir_with_mock_model / BUNDLE_FILE
+
+    bundled = load_bundle(bundle_path)
+    legacy_probs, legacy_labels = predict_texts(legacy, TEXTS)
+    probs, labels = predict_texts(bundled, TEXTS)
+    assert np.allclose(probs, legacy_probs)
+    assert list(labels) == list(legacy_labels)
+    assert bundled["threshold"] == legacy["threshold"]
+
+
+def test_load_classifier_prefers_bundle(model_dir_with_mock_model):
+    convert_artifacts(model_dir_with_mock_model, threshold=0.25)
+    # The separate artifacts are no longer needed once a bundle exists
+    for name in ("pdf_classifier.json", "tfidf_vectorizer.pkl", "label_encoder.pkl"):
+        (model_dir_with_mock_model / name).unlink()
+    classifier = load_classifier(model_dir_with_mock_model)
+    assert classifier["threshold"] == 0.25
+
+
+def test_bundle_drops_pruned_stop_words(tmp_path):
+    texts = [" ".join(f"word{i}_{j}" for j in range(200)) for i in range(20)]
+    vectorizer = TfidfVectorizer(max_features=50, ngram_range=(1, 2))
+    X = vectorizer.fit_transform(texts)
+    model = xgb.train({"objective": "binary:logistic"}, xgb.DMatrix(X, label=[0, 1] * 10), num_boost_round=2)
+
+    # Older scikit-learn releases keep every n-gram pruned by max_features on the fitted vectorizer
+    vectorizer.stop_words_ = {f"pruned{i} term{i}" for i in range(20000)}
+    save_bundle(tmp_path / BUNDLE_FILE, model, vectorizer, ["a", "b"], 0.5)
+    joblib.dump(vectorizer, tmp_path / "vectorizer.pkl")
+    assert (tmp_path / BUNDLE_FILE).stat().st_size < (tmp_path / "vectorizer.pkl").stat().st_size
+
+    loaded = load_bundle(tmp_path / BUNDLE_FILE)["vectorizer"]
+    assert (loaded.transform(texts[:3]) != vectorizer.transform(texts[:3])).nnz == 0
+
+
+def test_hashing_bundle_roundtrip(tmp_path):
+    vectorizer = HashingTfidfVectorizer(n_features=2**10)
+    X = vectorizer.fit_transform(TEXTS)
+    model = xgb.train({"objective": "binary:logistic"}, xgb.DMatrix(X, label=[1, 1, 0, 0]), num_boost_round=2)
+    save_bundle(tmp_path / BUNDLE_FILE, model, vectorizer, ["not useful", "useful"], 0.7)
+
+    loaded = load_bundle(tmp_path / BUNDLE_FILE)
+    assert isinstance(loaded["vectorizer"], HashingTfidfVectorizer)
+    assert (loaded["vectorizer"].transform(TEXTS) != X).nnz == 0
+    assert list(loaded["encoder"].inverse_transform([0, 1])) == ["not useful", "useful"]
+
+
+def test_unknown_format_version_is_rejected(model_dir_with_mock_model, capsys):
+    path = convert_artifacts(model_dir_with_mock_model)
+    with np.load(path) as data:
+        arrays = dict(data)
+    meta = json.loads(arrays["meta"].tobytes())
+    meta["format_version"] = 99
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), np.uint8)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+    with pytest.raises(ValueError):
+        load_bundle(path)
+    assert load_classifier(model_dir_with_mock_model) is None
+    assert "[ERROR]" in capsys.readouterr().out
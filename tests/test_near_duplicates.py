@@ -0,0 +1,82 @@
+import random
+import numpy as np
+from src.preprocessing.near_duplicates import (
+    NearDuplicateIndex,
+    collapse_duplicates,
+    lsh_params,
+    minhash_signature,
+    shingles,
+    update_index,
+)
+
+random.seed(0)
+WORDS = [f"w{i}" for i in range(5000)]
+
+
+def make_doc(n=400):
+    return " ".join(random.choice(WORDS) for _ in range(n))
+
+
+def perturb(text, fraction=0.02):
+    tokens = text.split()
+    for i in random.sample(range(len(tokens)), int(len(tokens) * fraction)):
+        tokens[i] = random.choice(WORDS)
+    return " ".join(tokens)
+
+
+def test_shingles_normalize_case_and_punctuation():
+    assert shingles("The Diet, of  SEALS!", size=2) == shingles("the diet of seals", size=2) == {"the diet", "diet of", "of seals"}
+    assert shingles("two words", size=5) == {"two words"}
+    assert shingles("", size=5) == set()
+
+
+def test_signature_estimates_jaccard():
+    a = make_doc(2000)
+    b = perturb(a, 0.05)
+    sa, sb = shingles(a), shingles(b)
+    true_jaccard = len(sa & sb) / len(sa | sb)
+    estimate = np.mean(minhash_signature(a, num_perm=256) == minhash_signature(b, num_perm=256))
+    assert abs(estimate - true_jaccard) < 0.1
+
+
+def test_lsh_params_cover_signature():
+    bands, rows = lsh_params(0.8, 128)
+    assert bands * rows == 128
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+
+
+def test_clusters_find_near_duplicates_only():
+    base = make_doc()
+    other = make_doc()
+    index = NearDuplicateIndex()
+    index.update([("a.txt", base), ("a-reprint.txt", perturb(base, 0.01)), ("a-scan.txt", base.upper()), ("b.txt", other), ("empty1.txt", ""), ("empty2.txt", "")])
+    assert index.clusters(0.8) == [["a-reprint.txt", "a-scan.txt", "a.txt"]]
+
+
+def test_update_is_incremental_and_persists(tmp_path):
+    path = tmp_path / "index.npz"
+    docs = [("a.txt", make_doc()), ("b.txt", make_doc())]
+    first = update_index(docs, path)
+    reloaded = NearDuplicateIndex.load(path)
+    assert reloaded.update(docs) == 0
+    assert all(np.array_equal(first.signatures[n], reloaded.signatures[n]) for n in first.signatures)
+    assert reloaded.update(docs[:1] + [("c.txt", docs[0][1])]) == 1
+    assert sorted(reloaded.signatures) == ["a.txt", "c.txt"]
+    assert reloaded.clusters() == [["a.txt", "c.txt"]]
+
+
+def test_load_with_other_settings_rebuilds(tmp_path):
+    path = tmp_path / "index.npz"
+    update_index([("a.txt", make_doc())], path)
+    assert len(NearDuplicateIndex.load(path, num_perm=64)) == 0
+
+
+def test_collapse_keeps_majority_label_longest_text():
+    texts = ["short", "a much longer copy", "mid copy", "unrelated"]
+    labels = ["useful", "not-useful", "useful", "useful"]
+    names = ["a.txt", "b.txt", "c.txt", "d.txt"]
+    texts2, labels2, names2, dropped = collapse_duplicates(texts, labels, names, [["a.txt", "b.txt", "c.txt"], ["x.txt", "d.txt"]])
+    assert names2 == ["c.txt", "d.txt"]
+    assert labels2 == ["useful", "useful"]
+    assert texts2 == ["mid copy", "unrelated"]
+    assert dropped == ["a.txt", "b.txt"]
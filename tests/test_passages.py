@@ -0,0 +1,75 @@
+import json
+from src.preprocessing.passages import build_index, candidate_slice, find_passages, index_document, load_entry, rank_passages, score_text, split_pages
+
+DOC = (
+    "Introduction. Seals are important predators in the Baltic (Smith 1998).\n\n"
+    "Samples were collected off the coast at 54.3° N between 1998-2003. A total of 118 stomachs were examined.\n"
+    "Of these, 32 stomachs were empty (27%).\n"
+    "Table 2. Prey by season\n"
+    "Season  N  Empty  Prey\n"
+    "Spring  40  12  5.2\n"
+    "Summer  38  9   4.1\n"
+    "Autumn  40  11  3.9\n"
+    "The rest of the methods.\f"
+    "Page two says the diet was dominated by herring (n = 86). Funding was received in 2005."
+)
+
+
+def test_split_pages_offsets():
+    pages = list(split_pages("one\ftwo\fthree"))
+    assert [(n, off) for n, off, _ in pages] == [(1, 0), (2, 4), (3, 8)]
+    assert list(split_pages("no form feeds")) == [(1, 0, "no form feeds")]
+
+
+def test_score_text_features():
+    features, score = score_text("Of 118 stomachs, 32 were empty; stomachs were empty in 1999.")
+    assert set(features) == {"empty_stomach", "stomach", "sample_size", "year"}
+    assert score > score_text("The diet of seals.")[1] > 0
+    assert score_text("Nothing relevant here.") == ((), 0.0)
+
+
+def test_find_passages_offsets_pages_and_tables():
+    passages = find_passages(DOC)
+    assert all(DOC[p.start : p.end] == p.text for p in passages)
+    tables = [p for p in passages if p.kind == "table"]
+    assert len(tables) == 1
+    assert tables[0].text.startswith("Table 2. Prey by season\nSeason")
+    assert tables[0].text.endswith("Autumn  40  11  3.9")
+    texts = [p.text for p in passages]
+    assert "Funding was received in 2005." not in texts  # a year alone is not evidence
+    assert any(t.startswith("Samples were collected off the coast") for t in texts)
+    herring = next(p for p in passages if "herring" in p.text)
+    assert herring.page == 2
+    assert herring.page_start == 0
+
+
+def test_ranking_puts_empty_stomach_sentence_first():
+    ranked = rank_passages(find_passages(DOC), top_k=2)
+    assert len(ranked) == 2
+    assert ranked[0].text == "Of these, 32 stomachs were empty (27%)."
+    assert "empty_stomach" in ranked[0].features
+
+
+def test_candidate_slice_respects_budget_and_document_order():
+    entry = index_document("doc.txt", DOC)
+    assert entry["pages"] == 2
+    assert [p["rank"] for p in entry["passages"]] == list(range(1, len(entry["passages"]) + 1))
+    slice_ = candidate_slice(entry["passages"], max_chars=100)
+    assert slice_.startswith("[p. 1] A total of 118 stomachs were examined.")
+    assert "[p. 1] Of these, 32 stomachs were empty (27%)." in slice_
+    assert len(slice_) < 150
+
+
+def test_build_index_is_incremental(tmp_path):
+    data_dir, index_dir = tmp_path / "processed-text", tmp_path / "passages"
+    data_dir.mkdir()
+    (data_dir / "a.txt").write_text(DOC, encoding="utf-8")
+    (data_dir / "b.txt").write_text("Nothing about diets here.", encoding="utf-8")
+    assert build_index(data_dir, index_dir) == (2, 0)
+    assert build_index(data_dir, index_dir) == (0, 2)
+    (data_dir / "b.txt").write_text("The diet of 12 seals was studied.", encoding="utf-8")
+    assert build_index(data_dir, index_dir) == (1, 1)
+    entry = load_entry("b.txt", index_dir)
+    assert entry["passages"][0]["features"] == ["stomach", "sample_size"]
+    assert json.loads((index_dir / "a.txt".replace(".txt", ".json")).read_text(encoding="utf-8"))["document"] == "a.txt"
+    assert load_entry("missing.txt", index_dir) is None
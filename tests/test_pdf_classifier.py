@@ -6,38 +6,7 @@ import xgboost as xgb
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import LabelEncoder
 from unittest.mock import patch
-from src.model.pdf_classifier import classify_pdf
-
-
-@pytest.fixture
-def model_dir_with_mock_model(tmp_path):
-    """Prepare a minimal XGBoost model, vectorizer, and label encoder on disk."""
-    model_dir = tmp_path / "models"
-    model_dir.mkdir(parents=True)
-
-    # Fake small training dataset
-    texts = ["predator stomach content", "fish prey analysis", "rock study geology", "mineral content paper"]
-    labels = ["useful", "useful", "not useful", "not useful"]
-
-    # Encode labels
-    enc = LabelEncoder()
-    y = enc.fit_transform(labels)
-
-    # Vectorize text
-    vectorizer = TfidfVectorizer(max_features=6)
-    X = vectorizer.fit_transform(texts)
-
-    # Train tiny XGBoost model
-    dtrain = xgb.DMatrix(X, label=y)
-    params = {"objective": "binary:logistic", "eval_metric": "logloss"}
-    model = xgb.train(params, dtrain, num_boost_round=3)
-
-    # Save artifacts
-    model.save_model(str(model_dir / "pdf_classifier.json"))
-    joblib.dump(vectorizer, model_dir / "tfidf_vectorizer.pkl")
-    joblib.dump(enc, model_dir / "label_encoder.pkl")
-
-    return model_dir
+from src.model.pdf_classifier import classify_pdf, classify_pdfs, collect_pdf_paths, load_classifier, model_files_exist, predict_matrix, predict_texts, screen_pdf, screen_pdfs
 
 
 @patch("src.model.pdf_classifier.extract_text_from_pdf", return_value="predator stomach content analysis")
@@ -87,3 +56,151 @@ def test_classify_pdf_handles_nonexistent_dir(tmp_path, capsys):
     output = capsys.readouterr().out
     assert "[ERROR]" in output
     assert "Missing model" in output
+
+
+def test_load_classifier_missing_returns_none(tmp_path, capsys):
+    assert load_classifier(tmp_path) is None
+    assert "Missing model" in capsys.readouterr().out
+
+
+@patch("src.model.pdf_classifier.extract_text_from_pdf", side_effect=lambda p: "" if "blank" in p else "predator stomach content analysis")
+def test_classify_pdfs_yields_one_record_per_pdf(mock_extract, model_dir_with_mock_model):
+    paths = [Path("a.pdf"), Path("blank.pdf"), Path("b.pdf"), Path("c.pdf")]
+    records = {r["file"]: r for r in classify_pdfs(paths, model_dir_with_mock_model, batch_size=2)}
+
+    assert sorted(records) == ["a.pdf", "b.pdf", "blank.pdf", "c.pdf"]
+    assert records["blank.pdf"]["error"] == "No text extracted"
+    for r in (records["a.pdf"], records["b.pdf"], records["c.pdf"]):
+        assert r["label"] in {"useful", "not useful"}
+        assert 0.0 <= r["probability"] <= 1.0
+        assert r["threshold"] == 0.70
+        assert set(r["timings"]) == {"extract_s", "predict_s"}
+
+
+@patch("src.model.pdf_classifier.extract_text_from_pdf", return_value="predator stomach content analysis")
+def test_classify_pdfs_loads_model_once(mock_extract, model_dir_with_mock_model):
+    with patch("joblib.load", wraps=joblib.load) as mock_load:
+        records = list(classify_pdfs([Path(f"{i}.pdf") for i in range(5)], model_dir_with_mock_model))
+    assert len(records) == 5
+    assert mock_load.call_count == 2
+
+
+def test_classify_pdfs_missing_model_yields_nothing(tmp_path):
+    assert list(classify_pdfs([Path("a.pdf")], tmp_path)) == []
+
+
+def test_model_files_exist(model_dir_with_mock_model, tmp_path):
+    assert model_files_exist(model_dir_with_mock_model)
+    (model_dir_with_mock_model / "label_encoder.pkl").unlink()
+    assert not model_files_exist(model_dir_with_mock_model)
+    assert not model_files_exist(tmp_path / "missing")
+
+
+def test_screen_pdfs_with_workers_does_not_load_model_in_parent(model_dir_with_mock_model):
+    with patch("src.model.pdf_classifier.load_classifier") as mock_load:
+        assert list(screen_pdfs([], model_dir_with_mock_model, workers=2)) == []
+    mock_load.assert_not_called()
+
+
+def test_screen_pdfs_with_workers_missing_model_yields_nothing(tmp_path, capsys):
+    assert list(screen_pdfs([Path("a.pdf")], tmp_path, workers=2)) == []
+    assert "[ERROR] Missing model" in capsys.readouterr().out
+
+
+def test_collect_pdf_paths(tmp_path):
+    (tmp_path / "b.pdf").touch()
+    (tmp_path / "a.pdf").touch()
+    (tmp_path / "notes.txt").touch()
+    file_list = tmp_path / "list.txt"
+    file_list.write_text("extra/one.pdf\n\nextra/two.pdf\n", encoding="utf-8")
+
+    paths = collect_pdf_paths(tmp_path, file_list)
+    assert [p.name for p in paths] == ["a.pdf", "b.pdf", "one.pdf", "two.pdf"]
+
+
+def _fake_page_range(page_count):
+    calls = []
+
+    def fake(pdf_path, start=0, stop=None):
+        calls.append((start, stop))
+        stop = page_count if stop is None else min(stop, page_count)
+        return [f"predator stomach content page {i}" for i in range(start, stop)], page_count
+
+    return fake, calls
+
+
+def test_screen_pdf_stops_after_prefix_when_confident(model_dir_with_mock_model):
+    fake, calls = _fake_page_range(40)
+    with patch("src.model.pdf_classifier.extract_page_range", side_effect=fake):
+        result = screen_pdf(Path("a.pdf"), load_classifier(model_dir_with_mock_model), stages=(3, 10, None), margin=0.0)
+
+    assert calls == [(0, 3)]
+    assert result["pages_used"] == 3
+    assert result["page_count"] == 40
+    assert result["escalations"] == 0
+    assert result["decided_early"] is True
+
+
+def test_screen_pdf_escalates_when_ambiguous(model_dir_with_mock_model):
+    fake, calls = _fake_page_range(40)
+    with patch("src.model.pdf_classifier.extract_page_range", side_effect=fake):
+        result = screen_pdf(Path("a.pdf"), load_classifier(model_dir_with_mock_model), stages=(3, 10, None), margin=1.0)
+
+    # Each stage only extracts pages not read before
+    assert calls == [(0, 3), (3, 10), (10, None)]
+    assert result["pages_used"] == 40
+    assert result["escalations"] == 2
+    assert result["decided_early"] is False
+    assert result["label"] in {"useful", "not useful"}
+
+
+def test_screen_pdf_keeps_last_score_when_stages_run_out(model_dir_with_mock_model):
+    fake, calls = _fake_page_range(40)
+    with patch("src.model.pdf_classifier.extract_page_range", side_effect=fake):
+        result = screen_pdf(Path("a.pdf"), load_classifier(model_dir_with_mock_model), stages=(3, 10), margin=1.0)
+
+    assert calls == [(0, 3), (3, 10)]
+    assert "error" not in result
+    assert result["pages_used"] == 10
+    assert result["escalations"] == 1
+    assert result["decided_early"] is False
+    assert 0.0 <= result["probability"] <= 1.0
+
+
+def test_screen_pdf_short_document(model_dir_with_mock_model):
+    fake, calls = _fake_page_range(2)
+    with patch("src.model.pdf_classifier.extract_page_range", side_effect=fake):
+        result = screen_pdf(Path("a.pdf"), load_classifier(model_dir_with_mock_model), margin=1.0)
+
+    assert calls == [(0, 3)]
+    assert result["pages_used"] == 2
+
+
+@patch("src.model.pdf_classifier.extract_page_range", return_value=([], 0))
+def test_screen_pdf_no_text(mock_range, model_dir_with_mock_model):
+    result = screen_pdf(Path("a.pdf"), load_classifier(model_dir_with_mock_model))
+    assert result["error"] == "No text extracted"
+
+
+def test_predict_matrix_matches_dmatrix_path(model_dir_with_mock_model):
+    classifier = load_classifier(model_dir_with_mock_model, nthread=1)
+    texts = ["predator stomach content", "rock study geology", "fish prey content analysis", "nothing known"]
+    X = classifier["vectorizer"].transform(texts)
+    expected = classifier["model"].predict(xgb.DMatrix(X))
+
+    probs, labels = predict_matrix(classifier, X)
+    assert isinstance(probs, np.ndarray) and isinstance(labels, np.ndarray)
+    np.testing.assert_allclose(probs, expected, rtol=1e-6)
+    assert list(labels) == list(classifier["encoder"].inverse_transform((expected >= classifier["threshold"]).astype(int)))
+
+    text_probs, text_labels = predict_texts(classifier, texts)
+    np.testing.assert_allclose(text_probs, probs)
+    assert list(text_labels) == list(labels)
+
+
+def test_predict_does_not_change_shared_booster(model_dir_with_mock_model):
+    classifier = load_classifier(model_dir_with_mock_model, nthread=2)
+    with patch.object(classifier["model"], "set_param") as mock_set_param:
+        predict_texts(classifier, ["predator stomach content"])
+    mock_set_param.assert_not_called()
+    assert '"nthread":"2"' in classifier["model"].save_config()
@@ -3,7 +3,8 @@ import subprocess
 import fitz
 from pathlib import Path
 import sys
-from src.preprocessing.pdf_text_extraction import extract_text_from_pdf, save_to_file, main
+from unittest.mock import patch
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf, save_to_file, main, estimate_extraction_cost
 
 
 def test_extract_text_exists():
@@ -89,3 +90,214 @@ def test_main_cli(tmp_path):
     assert result.returncode == 0
     assert output_file.exists()
     assert output_file.stat().st_size > 0
+
+
+def _make_pdf(path, pages, with_text):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        if with_text:
+            page.insert_text((72, 72), f"Stomach contents page {i}")
+    doc.save(path)
+    doc.close()
+
+
+def test_estimate_extraction_cost_weights_pages_without_text(tmp_path):
+    text_pdf = tmp_path / "text.pdf"
+    scanned_pdf = tmp_path / "scanned.pdf"
+    _make_pdf(text_pdf, 4, with_text=True)
+    _make_pdf(scanned_pdf, 4, with_text=False)
+
+    assert estimate_extraction_cost(str(scanned_pdf)) > estimate_extraction_cost(str(text_pdf))
+
+
+def test_estimate_extraction_cost_grows_with_page_count(tmp_path):
+    short_pdf = tmp_path / "short.pdf"
+    long_pdf = tmp_path / "long.pdf"
+    _make_pdf(short_pdf, 2, with_text=True)
+    _make_pdf(long_pdf, 20, with_text=True)
+
+    assert estimate_extraction_cost(str(long_pdf)) > estimate_extraction_cost(str(short_pdf))
+
+
+def test_estimate_extraction_cost_missing_file(tmp_path):
+    assert estimate_extraction_cost(str(tmp_path / "missing.pdf")) == 0.0
+
+
+def _make_scanned_pdf(path, widths):
+    doc = fitz.open()
+    for width in widths:
+        doc.new_page(width=width, height=200)
+    doc.save(path)
+    doc.close()
+
+
+def test_parallel_ocr_keeps_page_order(tmp_path):
+    import threading
+    import time
+
+    pdf_path = tmp_path / "scan.pdf"
+    widths = [100, 150, 200, 250, 300, 350]
+    _make_scanned_pdf(pdf_path, widths)
+
+    lock = threading.Lock()
+    state = {"active": 0, "max_active": 0}
+
+    def fake_ocr(img):
+        with lock:
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        # Earlier (narrower) pages finish last to exercise reordering
+        time.sleep(0.05 * (2000 - img.width) / 1000)
+        with lock:
+            state["active"] -= 1
+        return f"page width {img.width}"
+
+    with patch("pytesseract.image_to_string", side_effect=fake_ocr):
+        sequential = extract_text_from_pdf(str(pdf_path))
+        parallel = extract_text_from_pdf(str(pdf_path), ocr_workers=3)
+
+    assert parallel == sequential
+    page_widths = [int(line.split()[-1]) for line in parallel.splitlines()]
+    assert len(page_widths) == len(widths)
+    assert page_widths == sorted(page_widths)
+    assert state["max_active"] > 1
+
+
+def test_parallel_ocr_failure_returns_empty(tmp_path):
+    pdf_path = tmp_path / "scan.pdf"
+    _make_scanned_pdf(pdf_path, [100, 100])
+    with patch("pytesseract.image_to_string", side_effect=RuntimeError("tesseract missing")):
+        assert extract_text_from_pdf(str(pdf_path), ocr_workers=2) == ""
+
+
+def test_ocr_uses_grayscale_pixmap_without_png(tmp_path):
+    pdf_path = tmp_path / "scan.pdf"
+    _make_scanned_pdf(pdf_path, [72, 144])
+    seen = []
+
+    def fake_ocr(img):
+        seen.append((img.mode, img.size, img.format))
+        return "ocr text"
+
+    page_stats = []
+    with patch("pytesseract.image_to_string", side_effect=fake_ocr), patch.object(fitz.Pixmap, "tobytes", side_effect=AssertionError("PNG encode")):
+        text = extract_text_from_pdf(str(pdf_path), page_stats=page_stats)
+
+    assert text == "ocr text\focr text"
+    # 72pt and 144pt wide pages rendered at 300 dpi
+    assert seen == [("L", (300, 834), "PPM"), ("L", (600, 834), "PPM")]
+    assert [s["page"] for s in page_stats] == [1, 2]
+    assert page_stats[0]["pixmap_bytes"] >= 300 * 834
+    assert all(s["render_s"] >= 0 and s["convert_s"] >= 0 for s in page_stats)
+
+
+def test_parallel_ocr_workers_get_detached_images(tmp_path):
+    import threading
+    from src.preprocessing import pdf_text_extraction
+
+    pdf_path = tmp_path / "scan.pdf"
+    _make_scanned_pdf(pdf_path, [72, 144, 72])
+    main_thread = threading.current_thread()
+    real_ocr_timed = pdf_text_extraction._ocr_timed
+    submitted = []
+
+    def ocr_timed(img, pix, render_s, stat=None):
+        submitted.append((pix, img.format, threading.current_thread() is main_thread))
+        return real_ocr_timed(img, pix, render_s, stat)
+
+    with patch("pytesseract.image_to_string", side_effect=lambda img: f"{img.mode} {len(img.tobytes())}"), patch.object(pdf_text_extraction, "_ocr_timed", side_effect=ocr_timed):
+        text = extract_text_from_pdf(str(pdf_path), ocr_workers=2)
+
+    assert text.split("\f") == ["L 250200", "L 500400", "L 250200"]
+    assert submitted == [(None, "PPM", False)] * 3
+
+
+def test_extract_page_range(tmp_path):
+    from src.preprocessing.pdf_text_extraction import extract_page_range
+
+    pdf_path = tmp_path / "doc.pdf"
+    _make_pdf(pdf_path, 5, with_text=True)
+
+    pages, page_count = extract_page_range(str(pdf_path), 1, 3)
+    assert page_count == 5
+    assert len(pages) == 2
+    assert "page 1" in pages[0] and "page 2" in pages[1]
+
+    pages, _ = extract_page_range(str(pdf_path), 3, None)
+    assert len(pages) == 2
+    assert extract_page_range(str(pdf_path), 10, 20) == ([], 5)
+    assert extract_page_range(str(tmp_path / "missing.pdf"), 0, 3) == ([], 0)
+
+
+def _make_mixed_pdf(path):
+    """Pages 1 and 3 have a text layer, pages 2 and 4 are image-only."""
+    doc = fitz.open()
+    for i in range(4):
+        page = doc.new_page(width=100 + i, height=200)
+        if i % 2 == 0:
+            page.insert_text((10, 50), f"text page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+
+@pytest.mark.parametrize("ocr_workers", [1, 2])
+def test_iter_pdf_pages_yields_page_metadata(tmp_path, ocr_workers):
+    from src.preprocessing.pdf_text_extraction import iter_pdf_pages
+
+    pdf_path = tmp_path / "mixed.pdf"
+    _make_mixed_pdf(pdf_path)
+    with patch("pytesseract.image_to_string", side_effect=lambda img: f"ocr width {img.width}"):
+        pages = list(iter_pdf_pages(str(pdf_path), ocr_workers=ocr_workers))
+
+    assert [p.page_number for p in pages] == [1, 2, 3, 4]
+    assert [p.ocr for p in pages] == [False, True, False, True]
+    assert "text page 1" in pages[0].text
+    assert pages[1].text.startswith("ocr width")
+    assert all(p.seconds >= 0 for p in pages)
+
+
+def test_iter_pdf_pages_accepts_bytes_and_page_range(tmp_path):
+    from src.preprocessing.pdf_text_extraction import iter_pdf_pages
+
+    pdf_path = tmp_path / "doc.pdf"
+    _make_pdf(pdf_path, 5, with_text=True)
+    pages = list(iter_pdf_pages(pdf_path.read_bytes(), start=2, stop=4))
+    assert [p.page_number for p in pages] == [3, 4]
+
+
+def test_iter_pdf_pages_can_stop_early(tmp_path):
+    from src.preprocessing.pdf_text_extraction import iter_pdf_pages
+
+    pdf_path = tmp_path / "doc.pdf"
+    _make_pdf(pdf_path, 5, with_text=True)
+    pages = iter_pdf_pages(str(pdf_path))
+    assert next(pages).page_number == 1
+    pages.close()
+    # File mapping is released, so the file can be replaced
+    pdf_path.unlink()
+
+
+def test_extract_text_from_empty_file(tmp_path):
+    empty = tmp_path / "empty.pdf"
+    empty.touch()
+    assert extract_text_from_pdf(str(empty)) == ""
+
+
+@pytest.mark.parametrize("ocr_workers", [1, 2])
+def test_page_stats_record_ocr_time(tmp_path, ocr_workers):
+    import time
+
+    pdf_path = tmp_path / "scan.pdf"
+    _make_scanned_pdf(pdf_path, [72, 144])
+
+    def slow_ocr(img):
+        time.sleep(0.02)
+        return "ocr text"
+
+    page_stats = []
+    with patch("pytesseract.image_to_string", side_effect=slow_ocr):
+        extract_text_from_pdf(str(pdf_path), ocr_workers=ocr_workers, page_stats=page_stats)
+
+    assert [s["page"] for s in page_stats] == [1, 2]
+    assert all(s["ocr_s"] >= 0.02 for s in page_stats)
@@ -0,0 +1,113 @@
+import json
+import re
+import pytest
+from scripts.pipeline_metrics import METRIC_PREFIX, PipelineMetrics, _percentile, ocr_summary
+
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{((?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*",?)*)\} (\S+)$')
+
+
+def test_percentile_empty_and_single_value():
+    assert _percentile([], 50) is None
+    assert _percentile([3.0], 50) == 3.0
+    assert _percentile([3.0], 95) == 3.0
+
+
+def test_percentile_interpolates():
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert _percentile(values, 0) == 1.0
+    assert _percentile(values, 100) == 4.0
+    assert _percentile(values, 50) == pytest.approx(2.5)
+    assert _percentile(values, 95) == pytest.approx(3.85)
+
+
+def test_ocr_summary():
+    stats = [{"render_s": 0.5, "convert_s": 0.25, "ocr_s": 2.0}, {"render_s": 0.25, "ocr_s": 1.0}]
+    assert ocr_summary(stats) == {"ocr_pages": 2, "render_s": 1.0, "ocr_s": 3.0}
+    assert ocr_summary([]) == {"ocr_pages": 0, "render_s": 0.0, "ocr_s": 0.0}
+
+
+def test_stage_records_failures_and_reraises():
+    metrics = PipelineMetrics("test")
+    with metrics.stage("write", "a.txt") as obs:
+        obs["bytes"] = 10
+    with pytest.raises(ValueError):
+        with metrics.stage("write", "b.txt"):
+            raise ValueError("disk full")
+    with metrics.stage("train") as obs:
+        obs["failed"] = True
+        obs["error"] = "exit 1"
+
+    assert [(o["document"], o["bytes"], o["failed"], o["error"]) for o in metrics.observations] == [
+        ("a.txt", 10, False, None),
+        ("b.txt", 0, True, "ValueError: disk full"),
+        (None, 0, True, "exit 1"),
+    ]
+
+
+def test_stage_summary():
+    metrics = PipelineMetrics("test")
+    for i, seconds in enumerate([1.0, 2.0, 3.0, 4.0]):
+        metrics.observe("extract", seconds, f"doc{i}", nbytes=100, failed=i == 3, error="No text extracted" if i == 3 else None)
+    metrics.observe("write", 0.5, "doc0", nbytes=7)
+
+    summary = metrics.stage_summary()
+    assert list(summary) == ["extract", "write"]
+    assert summary["extract"] == {"count": 4, "failures": 1, "bytes": 400, "total_s": 10.0, "p50_s": 2.5, "p95_s": 3.85, "max_s": 4.0}
+    assert summary["write"]["p95_s"] == 0.5
+
+
+def test_json_report(tmp_path):
+    metrics = PipelineMetrics("full_pipeline", mode="local")
+    metrics.observe("extract", 1.0, "good.pdf", nbytes=5)
+    metrics.observe("extract", 0.0, "bad.pdf", failed=True, error="No text extracted")
+    metrics.count("cache_hits")
+    metrics.count("cache_hits", 2)
+
+    report = metrics.write_json(tmp_path / "reports" / "run.json")
+
+    assert json.loads((tmp_path / "reports" / "run.json").read_text(encoding="utf-8")) == report
+    assert report["pipeline"] == "full_pipeline" and report["mode"] == "local"
+    assert report["stages"]["extract"]["count"] == 2
+    assert report["counters"] == {"cache_hits": 3}
+    assert report["failures"] == [{"stage": "extract", "document": "bad.pdf", "error": "No text extracted"}]
+    assert report["started_at"] <= report["finished_at"]
+
+
+def test_prometheus_text_format():
+    metrics = PipelineMetrics("full_pipeline", mode="api")
+    metrics.observe("extract", 2.0, "a.pdf", nbytes=50)
+    metrics.count("ocr-pages.total", 4)
+
+    text = metrics.prometheus_text()
+
+    assert text.endswith("\n") and not text.endswith("\n\n")
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(rf"^# (HELP|TYPE) {METRIC_PREFIX}_[a-zA-Z0-9_]+ ", line)
+            continue
+        match = SAMPLE_LINE.match(line)
+        assert match, line
+        float(match.group(3))
+        samples[match.group(1) + "{" + match.group(2) + "}"] = match.group(3)
+    assert samples[f'{METRIC_PREFIX}_stage_documents_total{{pipeline="full_pipeline",mode="api",stage="extract"}}'] == "1"
+    assert samples[f'{METRIC_PREFIX}_stage_bytes_total{{pipeline="full_pipeline",mode="api",stage="extract"}}'] == "50"
+    assert samples[f'{METRIC_PREFIX}_stage_document_seconds{{pipeline="full_pipeline",mode="api",stage="extract",quantile="0.95"}}'] == "2.0"
+    assert samples[f'{METRIC_PREFIX}_ocr_pages_total_total{{pipeline="full_pipeline",mode="api"}}'] == "4"
+
+
+def test_prometheus_escapes_label_values():
+    metrics = PipelineMetrics('odd "pipeline"\\', mode="line\nbreak")
+    metrics.observe("extract", 1.0)
+    line = next(sample for sample in metrics.prometheus_text().splitlines() if sample.startswith(f"{METRIC_PREFIX}_stage_documents_total"))
+    assert 'pipeline="odd \\"pipeline\\"\\\\",mode="line\\nbreak"' in line
+    assert SAMPLE_LINE.match(line)
+
+
+def test_write_prometheus_leaves_no_temp_file(tmp_path):
+    metrics = PipelineMetrics("test")
+    metrics.observe("extract", 1.0)
+    path = tmp_path / "textfile" / "pipeline.prom"
+    metrics.write_prometheus(path)
+    assert f'{METRIC_PREFIX}_stage_documents_total{{pipeline="test",stage="extract"}} 1\n' in path.read_text(encoding="utf-8")
+    assert [p.name for p in path.parent.iterdir()] == ["pipeline.prom"]
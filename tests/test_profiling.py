@@ -0,0 +1,65 @@
+import json
+import pytest
+from src.utils import profiling
+
+
+@pytest.fixture(autouse=True)
+def reset_profiling():
+    yield
+    profiling._output_dir = None
+    profiling._active = False
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(500)]
+
+
+def test_stage_is_noop_when_disabled(tmp_path):
+    with profiling.stage("extract"):
+        busy_work()
+    assert profiling.output_dir() is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stage_writes_profile_and_allocations(tmp_path):
+    profiling.enable(tmp_path)
+    with profiling.stage("extract-a.pdf"):
+        busy_work()
+        kept = allocate()
+
+    info = json.loads((tmp_path / "extract-a.pdf.alloc.json").read_text())
+    assert (tmp_path / "extract-a.pdf.prof").exists()
+    assert info["stage"] == "extract-a.pdf"
+    assert info["peak_bytes"] >= 500 * 1024
+    assert any("test_profiling.py" in a["site"] for a in info["allocations"])
+    assert len(kept) == 500
+
+
+def test_repeated_and_nested_stages(tmp_path):
+    profiling.enable(tmp_path)
+    for _ in range(2):
+        with profiling.stage("predict batch"):
+            with profiling.stage("inner"):
+                busy_work()
+    names = sorted(p.name for p in tmp_path.glob("*.prof"))
+    assert names == ["predict_batch-2.prof", "predict_batch.prof"]
+
+
+def test_summary_lists_hot_functions_and_stages(tmp_path):
+    profiling.enable(tmp_path)
+    with profiling.stage("one"):
+        busy_work()
+    with profiling.stage("two"):
+        allocate()
+    summary = profiling.write_summary().read_text()
+    assert "busy_work" in summary
+    assert "Largest allocation sites" in summary
+    assert "one" in summary and "two" in summary
+
+
+def test_summary_without_profiles(tmp_path):
+    assert "No profiles" in profiling.summarize(tmp_path)
@@ -0,0 +1,143 @@
+import json
+import pytest
+from pathlib import Path
+import scripts.full_pipeline as full_pipeline
+from scripts.google_drive.drive_io import SpooledPDF
+from scripts.pipeline_metrics import PipelineMetrics
+from scripts.run_journal import RunJournal
+
+
+def records(path):
+    return [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines()]
+
+
+def test_append_and_reload(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    (tmp_path / "a.txt").write_text("text", encoding="utf-8")
+    with RunJournal(path) as journal:
+        journal.done("local:a.pdf", "v1", "a.txt", "useful")
+    assert [r["status"] for r in records(path)] == ["done"]
+
+    with RunJournal(path, resume=True) as resumed:
+        assert resumed.labels() == {"a.txt": "useful"}
+        assert not resumed.should_process("local:a.pdf", "v1", tmp_path)
+        assert resumed.should_process("local:a.pdf", "v2", tmp_path)
+        assert resumed.skipped == 1
+
+
+def test_without_resume_starts_over(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.done("local:a.pdf", "v1", "a.txt", "useful")
+    with RunJournal(path) as fresh:
+        assert fresh.labels() == {}
+    assert path.read_text(encoding="utf-8") == ""
+
+
+def test_done_requires_text_file(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    with RunJournal(path) as journal:
+        journal.done("local:a.pdf", "v1", "a.txt", "useful")
+    with RunJournal(path, resume=True) as resumed:
+        assert resumed.should_process("local:a.pdf", "v1", tmp_path)
+
+
+def test_failed_is_retried_until_max_attempts(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    for attempt in range(2):
+        with RunJournal(path, resume=True, max_attempts=2) as journal:
+            assert journal.should_process("drive:x", "v1", tmp_path)
+            journal.failed("drive:x", "v1", "RuntimeError: No text extracted")
+    with RunJournal(path, resume=True, max_attempts=2) as journal:
+        assert not journal.should_process("drive:x", "v1", tmp_path)
+        assert journal.gave_up == 1
+        # A new version of the file gets a fresh set of attempts
+        assert journal.should_process("drive:x", "v2", tmp_path)
+        assert journal.labels() == {}
+
+
+def test_done_after_failure_clears_it_and_failure_after_done_drops_label(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    (tmp_path / "a.txt").write_text("text", encoding="utf-8")
+    with RunJournal(path) as journal:
+        journal.failed("local:a.pdf", "v1", "boom")
+        journal.done("local:a.pdf", "v1", "a.txt", "useful")
+        journal.failed("local:b.pdf", "v1", "boom")
+    with RunJournal(path, resume=True) as resumed:
+        assert resumed.failures == {"local:b.pdf": ("v1", 1)}
+        assert resumed.labels() == {"a.txt": "useful"}
+        resumed.failed("local:a.pdf", "v2", "boom")
+        assert resumed.labels() == {}
+
+
+def test_torn_last_line_is_ignored_and_terminated(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    (tmp_path / "a.txt").write_text("text", encoding="utf-8")
+    with RunJournal(path) as journal:
+        journal.done("local:a.pdf", "v1", "a.txt", "useful")
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"key": "local:b.pdf", "version": "v1", "sta')
+
+    with RunJournal(path, resume=True) as resumed:
+        assert resumed.labels() == {"a.txt": "useful"}
+        assert resumed.should_process("local:b.pdf", "v1", tmp_path)
+        resumed.done("local:b.pdf", "v1", "b.txt", "not-useful")
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["key"] == "local:b.pdf"
+    with RunJournal(path, resume=True) as again:
+        assert again.labels() == {"a.txt": "useful", "b.txt": "not-useful"}
+
+
+@pytest.fixture
+def local_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for folder, name in [("useful", "good.pdf"), ("not-useful", "corrupt.pdf")]:
+        (tmp_path / "pdfs" / folder).mkdir(parents=True)
+        (tmp_path / "pdfs" / folder / name).write_bytes(b"%PDF")
+    texts = {"good.pdf": "extracted text", "corrupt.pdf": ""}
+    monkeypatch.setattr(full_pipeline, "_extract_local_pdf", lambda path, cache=None: (texts[Path(path).name], {"seconds": 0.0, "bytes": 4, "page_stats": []}))
+    return tmp_path / "pdfs"
+
+
+def test_local_mode_journals_empty_text_as_failed(local_data, tmp_path):
+    metrics = PipelineMetrics("test")
+    with RunJournal(tmp_path / "journal.jsonl") as journal:
+        full_pipeline.process_local_mode(local_data, metrics=metrics, journal=journal)
+    status = {r["key"]: r["status"] for r in records(tmp_path / "journal.jsonl")}
+    assert status == {"local:useful/good.pdf": "done", "local:not-useful/corrupt.pdf": "failed"}
+    assert not Path("data/processed-text/corrupt.txt").exists()
+    assert json.loads(Path("data/labels.json").read_text(encoding="utf-8")) == {"good.txt": "useful"}
+    assert metrics.stage_summary()["extract"]["failures"] == 1
+
+    with RunJournal(tmp_path / "journal.jsonl", resume=True) as journal:
+        full_pipeline.process_local_mode(local_data, metrics=PipelineMetrics("test"), journal=journal)
+        assert journal.skipped == 1
+    assert [r["key"] for r in records(tmp_path / "journal.jsonl")][-1] == "local:not-useful/corrupt.pdf"
+
+
+def test_api_mode_journals_download_errors_and_continues(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    files = {"U": [{"id": "a", "name": "a.pdf"}, {"id": "b", "name": "b.pdf"}], "N": []}
+
+    def download_stream(service, pending, *args):
+        for f in pending:
+            yield f, (ConnectionError("quota exceeded") if f["id"] == "a" else _payload(b"text of b"))
+
+    monkeypatch.setattr(full_pipeline, "_connect_drive_folders", lambda: (None, "U", "N"))
+    monkeypatch.setattr(full_pipeline, "list_pdfs_in_folder", lambda service, folder_id, max_files=None: files[folder_id])
+    monkeypatch.setattr(full_pipeline, "_download_stream", download_stream)
+    monkeypatch.setattr(full_pipeline, "_extract_bytes", lambda view, name, cache, metrics: bytes(view).decode("utf-8"))
+
+    with RunJournal(tmp_path / "journal.jsonl") as journal:
+        full_pipeline.process_api_mode(metrics=PipelineMetrics("test"), journal=journal)
+    by_key = {r["key"]: r for r in records(tmp_path / "journal.jsonl")}
+    assert by_key["drive:a"]["status"] == "failed" and "quota exceeded" in by_key["drive:a"]["error"]
+    assert by_key["drive:b"]["status"] == "done"
+    assert json.loads(Path("data/labels.json").read_text(encoding="utf-8")) == {"b.txt": "useful"}
+
+
+def _payload(data):
+    payload = SpooledPDF()
+    payload.write(data)
+    return payload
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import pytest
+
+HEAVY_MODULES = {"fitz", "pymupdf", "pytesseract", "PIL", "xgboost", "sklearn", "joblib"}
+
+
+def imported_modules(args):
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True)
+    return {line.rsplit("|", 1)[1].strip().split(".")[0] for line in result.stderr.splitlines() if line.startswith("import time:") and "|" in line}, result
+
+
+@pytest.mark.parametrize("script", ["src/preprocessing/pdf_text_extraction.py", "src/model/pdf_classifier.py"])
+def test_cli_help_skips_heavy_imports(script):
+    modules, result = imported_modules([script, "--help"])
+    assert result.returncode == 0
+    assert not modules & HEAVY_MODULES
+
+
+def test_classifier_missing_pdf_fails_before_loading_model():
+    modules, result = imported_modules(["src/model/pdf_classifier.py", "--pdf-path", "tests/does-not-exist.pdf"])
+    assert result.returncode == 1
+    assert "[ERROR] File not found" in result.stdout
+    assert not modules & {"xgboost", "sklearn"}
+
+
+def test_extraction_cache_hit_skips_pymupdf(tmp_path):
+    script = f"""
+import sys
+from src.preprocessing.extraction_cache import ExtractionCache, make_cache_key
+from src.preprocessing.pdf_text_extraction import extract_text_from_pdf_bytes, extractor_version
+cache = ExtractionCache({str(tmp_path)!r})
+cache.put(make_cache_key(b"%PDF-1.4 cached", extractor_version()), "cached text")
+assert extract_text_from_pdf_bytes(b"%PDF-1.4 cached", cache=cache) == "cached text"
+print(sorted(m for m in ("fitz", "pymupdf") if m in sys.modules))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
@@ -101,3 +101,91 @@ def test_train_pdf_classifier_output_accuracy_range(sample_data, tmp_path):
 
     assert result is not None
     assert 0.0 <= result["accuracy"] <= 1.0
+
+
+def test_feature_cache_reused_between_runs(sample_data, tmp_path):
+    from unittest.mock import patch
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    data_dir, labels_file = sample_data
+    texts, labels, _ = load_labeled_data(data_dir, labels_file)
+    cache_dir = tmp_path / "feature-cache"
+
+    first = train_pdf_classifier(texts, labels, tmp_path / "models1", feature_cache_dir=cache_dir)
+    entries = list(cache_dir.iterdir())
+    assert len(entries) == 1
+    assert (entries[0] / "complete").exists()
+    assert sorted(p.name for p in entries[0].iterdir()) == ["complete", "test.dmatrix", "train.dmatrix", "vectorizer.pkl"]
+
+    with patch.object(TfidfVectorizer, "fit_transform", side_effect=AssertionError("refit")):
+        second = train_pdf_classifier(texts, labels, tmp_path / "models2", feature_cache_dir=cache_dir)
+
+    assert second["accuracy"] == first["accuracy"]
+    assert (tmp_path / "models2" / "tfidf_vectorizer.pkl").exists()
+
+
+def test_feature_cache_key_changes_with_inputs():
+    from src.model.train_model import feature_cache_key, VECTORIZER_PARAMS
+
+    base = feature_cache_key(["a b", "c d"], ["e f"], [0, 1], [1])
+    assert base == feature_cache_key(["a b", "c d"], ["e f"], [0, 1], [1])
+    assert base != feature_cache_key(["a b", "c x"], ["e f"], [0, 1], [1])
+    assert base != feature_cache_key(["a b", "c d"], ["e f"], [1, 0], [1])
+    assert base != feature_cache_key(["a b", "c d"], ["e f"], [0, 1], [1], {**VECTORIZER_PARAMS, "max_features": 5})
+
+
+def test_incomplete_cache_entry_is_rebuilt(sample_data, tmp_path):
+    data_dir, labels_file = sample_data
+    texts, labels, _ = load_labeled_data(data_dir, labels_file)
+    cache_dir = tmp_path / "feature-cache"
+
+    train_pdf_classifier(texts, labels, tmp_path / "models", feature_cache_dir=cache_dir)
+    entry = next(cache_dir.iterdir())
+    (entry / "complete").unlink()
+    (entry / "train.dmatrix").write_bytes(b"corrupt")
+
+    result = train_pdf_classifier(texts, labels, tmp_path / "models", feature_cache_dir=cache_dir)
+    assert result is not None
+    assert (entry / "complete").exists()
+
+
+def test_prune_feature_cache_keeps_most_recently_used(tmp_path):
+    import os
+    from src.model.train_model import prune_feature_cache
+
+    entries = []
+    for i in range(5):
+        entry = tmp_path / (f"{i}" * 64)
+        entry.mkdir()
+        (entry / "complete").touch()
+        os.utime(entry / "complete", (1000 + i, 1000 + i))
+        entries.append(entry)
+    (tmp_path / "unrelated").mkdir()
+
+    prune_feature_cache(tmp_path, keep=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([entries[3].name, entries[4].name, "unrelated"])
+
+
+def test_train_pdf_classifier_xgb_params_override(sample_data, tmp_path):
+    import xgboost as xgb
+    from unittest.mock import patch
+
+    texts, labels, _ = load_labeled_data(*sample_data)
+    with patch("src.model.train_model.xgb.train", wraps=xgb.train) as train:
+        train_pdf_classifier(texts, labels, tmp_path / "models", xgb_params={"max_depth": 2, "eta": 0.3}, num_boost_round=7)
+
+    params = train.call_args.args[0]
+    assert params["max_depth"] == 2 and params["eta"] == 0.3
+    assert params["subsample"] == 0.8  # untouched defaults are kept
+    assert train.call_args.kwargs["num_boost_round"] == 7
+
+
+def test_train_pdf_classifier_writes_bundle(sample_data, tmp_path):
+    from src.model.model_bundle import BUNDLE_FILE
+    from src.model.pdf_classifier import load_classifier, predict_texts
+
+    texts, labels, _ = load_labeled_data(*sample_data)
+    train_pdf_classifier(texts, labels, tmp_path / "models")
+    assert (tmp_path / "models" / BUNDLE_FILE).exists()
+    _, predicted = predict_texts(load_classifier(tmp_path / "models"), texts)
+    assert set(predicted) <= set(labels)